@@ -0,0 +1,77 @@
+from __future__ import annotations
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+
+from src.config import DEM_RESOLUTION_M
+from .utils import slope_degrees_from_dem_m
+
+
+def _tile_windows(height: int, width: int, tile: int) -> Iterator[Tuple[Window, Window, Tuple[int, int]]]:
+    """
+    Yield (core, halo, offset) per tile: the output window, the read window grown by one
+    pixel on each side (clipped to the raster), and the core's offset inside the halo array.
+    """
+    for row0 in range(0, height, tile):
+        for col0 in range(0, width, tile):
+            rows = min(tile, height - row0); cols = min(tile, width - col0)
+            r_lo = max(row0 - 1, 0); c_lo = max(col0 - 1, 0)
+            r_hi = min(row0 + rows + 1, height); c_hi = min(col0 + cols + 1, width)
+            core = Window(col0, row0, cols, rows)
+            halo = Window(c_lo, r_lo, c_hi - c_lo, r_hi - r_lo)
+            yield core, halo, (row0 - r_lo, col0 - c_lo)
+
+
+def overview_factors(pixel_size_m: float, model_resolution_m: Optional[float]) -> List[int]:
+    """Powers of two from 2 up to the first factor that reaches model resolution."""
+    if not model_resolution_m or model_resolution_m <= pixel_size_m:
+        return []
+    factors, f = [], 2
+    while True:
+        factors.append(f)
+        if pixel_size_m * f >= model_resolution_m:
+            return factors
+        f *= 2
+
+
+def ingest_dem_windowed(source_path: str, out_path: Optional[str] = None,
+                        tile_size: int = 2048, block_size: int = 256,
+                        model_resolution_m: Optional[float] = DEM_RESOLUTION_M) -> str:
+    """
+    Stream a (possibly huge) single-band elevation raster into a tiled, deflate-compressed
+    2-band GeoTIFF (Band1=elevation_m, Band2=slope_deg) with average-resampled overviews
+    down to model_resolution_m.
+
+    Tiles are read with a one-pixel halo so slope from the numba kernel (parallel over rows)
+    is identical to a whole-array computation; memory is bounded by the tile size.
+    Nodata cells are written as NaN.
+    """
+    if out_path is None:
+        with tempfile.NamedTemporaryFile(suffix=".tif", delete=False) as f:
+            out_path = f.name
+
+    with rasterio.open(source_path) as src:
+        dx = abs(src.transform.a); dy = abs(src.transform.e)
+        prof = dict(driver="GTiff", height=src.height, width=src.width, count=2, dtype="float32",
+                    crs=src.crs, transform=src.transform, nodata=np.nan,
+                    tiled=True, blockxsize=block_size, blockysize=block_size,
+                    compress="deflate", predictor=3, interleave="pixel", BIGTIFF="IF_SAFER")
+        with rasterio.open(out_path, "w", **prof) as dst:
+            dst.set_band_description(1, "elevation_m"); dst.set_band_description(2, "slope_deg")
+            for core, halo, (r_off, c_off) in _tile_windows(src.height, src.width, tile_size):
+                elev = src.read(1, window=halo, masked=True).astype(np.float64).filled(np.nan)
+                slope = slope_degrees_from_dem_m(elev, float(dx), float(dy))
+                h, w = int(core.height), int(core.width)
+                dst.write(elev[r_off:r_off + h, c_off:c_off + w].astype(np.float32), 1, window=core)
+                dst.write(slope[r_off:r_off + h, c_off:c_off + w], 2, window=core)
+
+    factors = overview_factors(min(dx, dy), model_resolution_m)
+    if factors:
+        with rasterio.open(out_path, "r+") as dst:
+            dst.build_overviews(factors, Resampling.average)
+            dst.update_tags(ns="rio_overview", resampling="average")
+    return out_path
@@ -1,107 +1,41 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Optional, Sequence
 import tempfile
 import os
 
-import geopandas as gpd
-import rasterio
-from rasterio.crs import CRS
-from rasterio.transform import rowcol
-from pyproj import Transformer
-
 from src.config import BREEDING_MONTHS
+from src.dem_sampler import DemSampler
+
+# AOI bounds and nests shared by both generators
+LAT_MIN, LAT_MAX = -34.2, -33.6
+LON_MIN, LON_MAX = 25.3, 25.9
+NEST_LOCATIONS = [(-33.920, 25.620), (-33.880, 25.580)]
 
 
-def _build_dem_sampler(dem_path):
+def _build_dem_sampler(dem_path, mode="nearest"):
     """
     Build a fast sampler for elevation (m) and slope (deg) for either:
       - GeoTIFF (preferred): band 1 = elevation (m), band 2 = slope (deg, optional)
       - GeoJSON (square grid) with 'elevation' and 'slope' fields.
     Returns a tuple: (sampler_fn, metadata_dict)
-      sampler_fn(lat, lon) -> (elev_m, slope_deg)
+      sampler_fn(lat, lon) -> (elev_m, slope_deg), scalars or arrays (NaN outside coverage)
     """
-    ext = os.path.splitext(dem_path)[1].lower()
-
-    if ext in (".tif", ".tiff"):
-        src = rasterio.open(dem_path)
-        elev = src.read(1)  # (rows, cols)
-        slope = src.read(2) if src.count >= 2 else None
-        crs = src.crs
-        transform = src.transform
-
-        # If slope band is missing, approximate via numeric gradient (meters)
-        if slope is None:
-            dx = abs(transform.a)
-            dy = abs(transform.e)
-            gy, gx = np.gradient(elev.astype(np.float64), dy, dx)
-            slope = np.degrees(np.arctan(np.sqrt(gx * gx + gy * gy))).astype(np.float32)
-
-        # Prepare transformer to dataset CRS (likely UTM)
-        to_src = None
-        if crs and CRS.from_user_input(crs).is_projected:
-            to_src = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
-
-        n_rows, n_cols = elev.shape
-
-        def sample_fn(lat, lon):
-            # Transform lon/lat -> dataset CRS if needed
-            if to_src is not None:
-                x, y = to_src.transform(lon, lat)
-            else:
-                x, y = lon, lat
-            # Convert map coords -> row/col (nearest)
-            r, c = rowcol(transform, x, y, op=round)
-            if r < 0 or r >= n_rows or c < 0 or c >= n_cols:
-                return np.nan, np.nan
-            return float(elev[r, c]), float(slope[r, c])
-
-        return sample_fn, {"type": "raster", "crs": crs, "transform": transform, "shape": elev.shape, "src": src}
-
-    # GeoJSON fallback (square grid)
-    dem = gpd.read_file(dem_path)
-    lat = np.array([p.y for p in dem.geometry], dtype=np.float64)
-    lon = np.array([p.x for p in dem.geometry], dtype=np.float64)
-    elevation = dem["elevation"].values.astype(np.float32)
-    slope = dem["slope"].values.astype(np.float32)
-
-    n = int(np.sqrt(len(lat)))
-    if n * n != len(lat):
-        raise ValueError("GeoJSON DEM must be a square grid of points.")
-
-    lat_grid = lat.reshape((n, n))
-    lon_grid = lon.reshape((n, n))
-    elev_grid = elevation.reshape((n, n))
-    slope_grid = slope.reshape((n, n))
-
-    # Build monotonically increasing axes
-    lat_axis = np.unique(np.round(lat_grid[:, 0], 12)).astype(np.float64)
-    lon_axis = np.unique(np.round(lon_grid[0, :], 12)).astype(np.float64)
-    # Ensure ascending axes and flip arrays if needed
-    if lat_axis[0] > lat_axis[-1]:
-        lat_axis = lat_axis[::-1].copy()
-        elev_grid = elev_grid[::-1, :]
-        slope_grid = slope_grid[::-1, :]
-    if lon_axis[0] > lon_axis[-1]:
-        lon_axis = lon_axis[::-1].copy()
-        elev_grid = elev_grid[:, ::-1]
-        slope_grid = slope_grid[:, ::-1]
-
-    def _nearest_index(axis, value):
-        idx = np.searchsorted(axis, value)
-        if idx <= 0:
-            return 0
-        if idx >= len(axis):
-            return len(axis) - 1
-        # pick closest neighbor
-        return idx if (axis[idx] - value) < (value - axis[idx - 1]) else idx - 1
+    dem = DemSampler.from_path(dem_path)
 
     def sample_fn(lat, lon):
-        i = _nearest_index(lat_axis, lat)
-        j = _nearest_index(lon_axis, lon)
-        return float(elev_grid[i, j]), float(slope_grid[i, j])
+        elev, slope = dem.sample(lon, lat, mode=mode)
+        if np.ndim(elev) == 0:
+            return float(elev), float(slope)
+        return elev, slope
 
-    return sample_fn, {"type": "geojson", "lat_axis": lat_axis, "lon_axis": lon_axis}
+    ext = os.path.splitext(dem_path)[1].lower()
+    kind = "raster" if ext in (".tif", ".tiff") else "geojson"
+    return sample_fn, {"type": kind, "crs": dem.crs, "transform": dem.transform,
+                       "shape": dem.elevation.shape, "sampler": dem}
 
 
 def generate_harrier_gps(seed=42, num_harriers=10, points_per_harrier=1500, dem_path=None):
@@ -120,9 +54,6 @@ def generate_harrier_gps(seed=42, num_harriers=10, points_per_harrier=1500, dem_
 
     # Constants (AOI bounds)
     START_DATE = datetime(2023, 1, 1)
-    LAT_MIN, LAT_MAX = -34.2, -33.6
-    LON_MIN, LON_MAX = 25.3, 25.9
-    NEST_LOCATIONS = [(-33.920, 25.620), (-33.880, 25.580)]
 
     # Optional DEM sampler
     sampler = None
@@ -222,3 +153,149 @@ def generate_harrier_gps(seed=42, num_harriers=10, points_per_harrier=1500, dem_
     with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
         df.to_csv(f.name, index=False)
         return f.name
+
+
+def _reflect(x, lo, hi):
+    """Fold values back into [lo, hi] (reflecting walls), elementwise."""
+    span = hi - lo
+    y = np.mod(x - lo, 2.0 * span)
+    return lo + np.where(y > span, 2.0 * span - y, y)
+
+
+def _segment_walk(anchor, steps, run_start, roaming):
+    """
+    Random walk restarted at every roaming run: position = anchor of the run + cumsum of the
+    run's steps. anchor/steps are (n, 2); run_start marks the first fix of each run.
+    """
+    csum = np.cumsum(np.where(roaming[:, None], steps, 0.0), axis=0)
+    run_id = np.cumsum(run_start) - 1
+    base = (csum - steps)[run_start]            # cumsum just before each run
+    return anchor[run_start][run_id] + csum - base[run_id]
+
+
+def _simulate_harrier_track(harrier_id, seed_seq, points, sampler=None,
+                            start_date="2023-01-01", fix_interval_min=(60, 120)):
+    """
+    Array version of one harrier's track from generate_harrier_gps.
+
+    Breeding-month fixes are Gaussian draws around a nest; other fixes are a random walk
+    from the previous fix. Steps are cumulative sums reflected into the AOI, and the slope
+    step scaling is evaluated at the positions of an unscaled first pass, so the whole
+    track needs two batched DEM lookups instead of one call per fix.
+    """
+    rng = np.random.default_rng(seed_seq)
+    start = rng.uniform([LAT_MIN, LON_MIN], [LAT_MAX, LON_MAX])
+
+    intervals = rng.choice(np.asarray(fix_interval_min, dtype=np.int64), size=points)
+    offsets = np.concatenate([[0], np.cumsum(intervals[:-1])]).astype("timedelta64[m]")
+    times = (np.datetime64(start_date, "m") + offsets).astype("datetime64[s]")
+    months = times.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    breeding = np.isin(months, BREEDING_MONTHS)
+    roaming = ~breeding
+
+    nests = np.asarray(NEST_LOCATIONS, dtype=np.float64)
+    nest_pos = nests[rng.integers(len(nests), size=points)] + rng.normal(0.0, 0.005, size=(points, 2))
+    nest_pos[:, 0] = np.clip(nest_pos[:, 0], LAT_MIN, LAT_MAX)
+    nest_pos[:, 1] = np.clip(nest_pos[:, 1], LON_MIN, LON_MAX)
+    steps = rng.uniform(-0.01, 0.01, size=(points, 2))
+
+    # Each roaming run starts from the fix before it (a nest fix, or the start position)
+    prev_is_breeding = np.concatenate([[True], breeding[:-1]])
+    run_start = roaming & prev_is_breeding
+    anchor = np.vstack([start, nest_pos[:-1]])
+
+    pos = nest_pos.copy()
+    if roaming.any():
+        walk = _segment_walk(anchor, steps, run_start, roaming)
+        if sampler is not None:
+            prev = np.vstack([start, np.where(breeding[:, None], nest_pos, walk)[:-1]])
+            prev[:, 0] = _reflect(prev[:, 0], LAT_MIN, LAT_MAX)
+            prev[:, 1] = _reflect(prev[:, 1], LON_MIN, LON_MAX)
+            _, slope_prev = sampler(prev[:, 0], prev[:, 1])
+            slope_prev = np.nan_to_num(slope_prev, nan=0.0)
+            # shrink step up to -60% by 20° slope
+            steps = steps * (1.0 - np.minimum(slope_prev, 20.0) / 20.0 * 0.6)[:, None]
+            walk = _segment_walk(anchor, steps, run_start, roaming)
+        pos[roaming, 0] = _reflect(walk[roaming, 0], LAT_MIN, LAT_MAX)
+        pos[roaming, 1] = _reflect(walk[roaming, 1], LON_MIN, LON_MAX)
+
+    base_speed = np.where(breeding, rng.uniform(2, 8, points), rng.uniform(5, 15, points))
+    alt_agl = np.where(breeding, rng.uniform(20, 50, points), rng.uniform(60, 100, points))
+
+    if sampler is not None:
+        elev_m, slope_deg = sampler(pos[:, 0], pos[:, 1])
+        outside = np.isnan(elev_m)
+        elev_m = np.where(outside, 0.0, elev_m)
+        slope_deg = np.where(outside, 0.0, slope_deg)
+    else:
+        elev_m = np.zeros(points); slope_deg = np.zeros(points)
+
+    speed = np.maximum(base_speed * (1.0 - np.clip(slope_deg, 0.0, 20.0) / 20.0 * 0.5), 0.1)
+
+    return pd.DataFrame({
+        "harrier_id": np.full(points, harrier_id, dtype=np.int32),
+        "timestamp": times,
+        "lat": pos[:, 0], "lon": pos[:, 1],
+        "alt": (elev_m + alt_agl).astype(np.float32),
+        "speed": speed.astype(np.float32),
+        "elev_m": elev_m.astype(np.float32),
+        "slope_deg": slope_deg.astype(np.float32),
+        "alt_agl": alt_agl.astype(np.float32),
+    })
+
+
+_WORKER_SAMPLERS = {}
+
+
+def _worker_sampler(dem_path):
+    # One DEM read per worker process, reused for every harrier it generates
+    if dem_path is None:
+        return None
+    if dem_path not in _WORKER_SAMPLERS:
+        _WORKER_SAMPLERS[dem_path] = _build_dem_sampler(dem_path)[0]
+    return _WORKER_SAMPLERS[dem_path]
+
+
+def _write_harrier_partition(task):
+    harrier_id, seed_seq, points, dem_path, out_dir, fix_interval_min = task
+    df = _simulate_harrier_track(harrier_id, seed_seq, points, _worker_sampler(dem_path),
+                                 fix_interval_min=fix_interval_min)
+    part_dir = os.path.join(out_dir, f"harrier_id={harrier_id}")
+    os.makedirs(part_dir, exist_ok=True)
+    df.drop(columns="harrier_id").to_parquet(os.path.join(part_dir, "part-0.parquet"), index=False)
+    return len(df)
+
+
+def generate_harrier_gps_parquet(seed=42, num_harriers=10, points_per_harrier=1500, dem_path=None,
+                                 workers: int = 1, out_dir: Optional[str] = None,
+                                 fix_interval_min: Sequence[int] = (60, 120)):
+    """
+    Vectorized, parallel counterpart of generate_harrier_gps.
+
+    Each harrier gets its own child stream of np.random.SeedSequence(seed), so the output
+    is identical for a given seed at any worker count. Tracks are written as a Parquet
+    dataset partitioned by harrier_id (hive layout: out_dir/harrier_id=N/part-0.parquet).
+
+    fix_interval_min: minutes between fixes, drawn uniformly from this set
+                      (default 1–2 hours as before; (5,) for 5-minute fixes).
+
+    Returns:
+        Path to the Parquet dataset directory.
+    """
+    if out_dir is None:
+        out_dir = tempfile.mkdtemp(suffix=".parquet")
+    children = np.random.SeedSequence(seed).spawn(num_harriers)
+    tasks = [(hid, children[hid - 1], points_per_harrier, dem_path, out_dir, tuple(fix_interval_min))
+             for hid in range(1, num_harriers + 1)]
+
+    if workers is None or workers <= 1:
+        for task in tasks:
+            _write_harrier_partition(task)
+    else:
+        chunksize = max(1, num_harriers // (4 * workers))
+        # spawn: forking after numba/TBB threads have started can hang the pool at shutdown
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            for _ in pool.map(_write_harrier_partition, tasks, chunksize=chunksize):
+                pass
+    return out_dir
@@ -1,9 +1,10 @@
 from typing import Optional, Tuple
 import rasterio
 
-from .terrain import build_dem_geotiff
+from .terrain import build_dem_geotiff, build_dem_geotiff_tiled
 from .conversions import raster_to_geojson_points
-from .utils import slope_degrees_from_dem_m  # used if we add slope to a real DEM
+from .dem_ingest import ingest_dem_windowed
+from src.config import DEM_RESOLUTION_M
 
 def generate_lidar_dem_geotiff(
     seed: int,
@@ -17,27 +18,34 @@ def generate_lidar_dem_geotiff(
     elev_clip: Tuple[float, float] = (0.0, 500.0),
     source_path: Optional[str] = None,
     compute_slope_if_missing: bool = True,
+    model_resolution_m: Optional[float] = DEM_RESOLUTION_M,
+    tile_size: Optional[int] = None,
+    workers: int = 1,
 ) -> str:
     """
     Returns path to a 2-band GeoTIFF (Band1=elevation_m, Band2=slope_deg), UTM CRS.
-    If source_path is provided (real DEM), return it if it already has slope; else compute slope & write a 2-band copy.
+    If source_path is provided (real DEM), return it if it already has slope; else stream it
+    through the windowed ingest (tiled slope, overviews down to model_resolution_m).
+    With tile_size set, synthetic terrain is generated tile-parallel (hashed-gradient noise,
+    so the landscape differs from the untiled generator for the same seed) and streamed to disk.
     """
     if source_path:
         with rasterio.open(source_path) as src:
             if src.count >= 2:
                 return source_path
-            elev = src.read(1)
-            dx = abs(src.transform.a); dy = abs(src.transform.e)
-            slope = slope_degrees_from_dem_m(elev.astype("float64"), dx, dy).astype("float32")
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".tif", delete=False) as f:
-                out = f.name
-            prof = src.profile.copy(); prof.update(count=2, dtype="float32", compress="deflate",
-                                                   tiled=True, interleave="pixel")
-            with rasterio.open(out, "w", **prof) as dst:
-                dst.write(elev.astype("float32"), 1); dst.set_band_description(1, "elevation_m")
-                dst.write(slope, 2); dst.set_band_description(2, "slope_deg")
-            return out
+        return ingest_dem_windowed(source_path, model_resolution_m=model_resolution_m)
+
+    if tile_size:
+        path, _utm = build_dem_geotiff_tiled(
+            seed=seed, n_x=n_x, n_y=n_y,
+            lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max,
+            feature_scale_m=feature_scale_m,
+            octaves=octaves, persistence=persistence, lacunarity=lacunarity,
+            base_min=base_min, base_span=base_span,
+            noise_amplitude=noise_amplitude, elev_clip=elev_clip,
+            tile_size=tile_size, workers=workers,
+        )
+        return path
 
     path, _utm = build_dem_geotiff(
         seed=seed, n_x=n_x, n_y=n_y,
@@ -62,7 +70,9 @@ def generate_lidar_dem(
     source_path: Optional[str] = None,
 ) -> str:
     """
-    Backward-compatible: returns a WGS84 GeoJSON sampled from a 2-band GeoTIFF.
+    GeoJSON export: returns a WGS84 point GeoJSON sampled from the 2-band GeoTIFF.
+    The GeoTIFF from generate_lidar_dem_geotiff is the canonical DEM for the pipeline;
+    use this only to hand the DEM to tools that need point features.
     """
     tif = generate_lidar_dem_geotiff(
         seed=seed, n_x=n_x, n_y=n_y,
@@ -1,11 +1,20 @@
 from __future__ import annotations
+from typing import Optional
 from .weather_io import read_dem_grid
-from .weather_core import build_weather_dataset, write_weather_netcdf
+from .weather_core import build_weather_dataset, write_weather_netcdf, write_weather_zarr
 
-def generate_weather_nc(lidar_file: str, seed: int) -> str:
+def generate_weather_nc(lidar_file: str, seed: int, resolution_m: Optional[float] = None,
+                        pack: bool = True, zarr: bool = False) -> str:
     """
     Public API: read DEM (GeoJSON or GeoTIFF), synthesize weather, return NetCDF path.
+    resolution_m: weather grid spacing for large GeoTIFF DEMs (read from overviews).
+    The store holds both layouts. The spatial layout at the root, which model builds scan
+    whole, stays uncompressed float32 so those scans are not CPU-bound on decompression;
+    the time-series copy, read a few cells at a time, is compressed and (with pack)
+    stored as scaled int16. zarr writes a Zarr store instead.
     """
-    lat_axis, lon_axis, elevation_grid, slope_grid = read_dem_grid(lidar_file)
+    lat_axis, lon_axis, elevation_grid, slope_grid = read_dem_grid(lidar_file, resolution_m)
     ds = build_weather_dataset(lat_axis, lon_axis, elevation_grid, slope_grid, seed)
-    return write_weather_netcdf(ds)
+    if zarr:
+        return write_weather_zarr(ds, zlib=False, timeseries_zlib=True, timeseries_pack=pack)
+    return write_weather_netcdf(ds, timeseries_copy=True, timeseries_zlib=True, timeseries_pack=pack)
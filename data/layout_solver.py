@@ -0,0 +1,234 @@
+from __future__ import annotations
+import tempfile
+from typing import Optional, Tuple
+
+import numpy as np
+from numba import njit
+from scipy.optimize import OptimizeResult
+
+import src.config as config
+
+_M_PER_DEG = 111_320.0
+_POWER_SPEEDS = np.array([s for s, _ in config.TURBINE_POWER_CURVE], dtype=np.float64)
+_POWER_OUTPUT = np.array([p for _, p in config.TURBINE_POWER_CURVE], dtype=np.float64)
+
+
+def cell_energy_grid(wind_data, time_chunk: int = 744) -> np.ndarray:
+    """
+    Annual energy (kWh) a turbine would produce at every (lat, lon) cell.
+    Same power curve as simulate_layout_energy, evaluated over the cube in blocks of
+    about time_chunk x lat x lon values aligned to the store's chunks, so each stored
+    chunk is read (and decompressed) once whether the store is laid out for spatial
+    slices or for per-cell time series.
+    """
+    from data.weather_core import storage_chunks
+    n_time, n_lat, n_lon = wind_data.shape
+    energy = np.zeros((n_lat, n_lon), dtype=np.float64)
+    ct, cy, cx = storage_chunks(wind_data) or (1, n_lat, n_lon)
+    t_step = -(-time_chunk // ct) * ct
+    cells = max(time_chunk * n_lat * n_lon // t_step, cy * cx)
+    rows = min(n_lat, max(cy, cells // n_lon // cy * cy))
+    cols = min(n_lon, max(cx, cells // rows // cx * cx))
+    for r0 in range(0, n_lat, rows):
+        for c0 in range(0, n_lon, cols):
+            for t0 in range(0, n_time, t_step):
+                ws = np.asarray(wind_data[t0:t0 + t_step, r0:r0 + rows, c0:c0 + cols].values, dtype=np.float64)
+                energy[r0:r0 + rows, c0:c0 + cols] += np.interp(ws, _POWER_SPEEDS, _POWER_OUTPUT,
+                                                              left=0.0, right=0.0).sum(axis=0)
+    return energy
+
+
+def cell_scores(energy: np.ndarray,
+                risk: Optional[np.ndarray] = None,
+                risk_weight: float = 0.0,
+                zone_mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Per-cell score = energy - risk_weight * risk. Cells outside zone_mask (or NaN) get -inf.
+    """
+    scores = np.asarray(energy, dtype=np.float64).copy()
+    if risk is not None:
+        scores -= float(risk_weight) * np.asarray(risk, dtype=np.float64)
+    if zone_mask is not None:
+        scores[~np.asarray(zone_mask, dtype=bool)] = -np.inf
+    scores[np.isnan(scores)] = -np.inf
+    return scores
+
+
+def exclusion_disk(lat_grid: np.ndarray, lon_grid: np.ndarray, min_spacing_m: float) -> np.ndarray:
+    """
+    Boolean (2R+1, 2R+1) stencil of cell offsets closer than min_spacing_m to the centre cell.
+    Cell spacing is taken from the grid at its central latitude.
+    """
+    lat_c = float(np.mean(lat_grid))
+    dy = abs(float(np.mean(np.diff(lat_grid)))) * _M_PER_DEG if len(lat_grid) > 1 else np.inf
+    dx = abs(float(np.mean(np.diff(lon_grid)))) * _M_PER_DEG * np.cos(np.radians(lat_c)) if len(lon_grid) > 1 else np.inf
+    ry = int(np.ceil(min_spacing_m / dy)) if np.isfinite(dy) else 0
+    rx = int(np.ceil(min_spacing_m / dx)) if np.isfinite(dx) else 0
+    r = max(ry, rx)
+    di, dj = np.mgrid[-r:r + 1, -r:r + 1]
+    dist2 = (di * (dy if np.isfinite(dy) else 0.0)) ** 2 + (dj * (dx if np.isfinite(dx) else 0.0)) ** 2
+    return dist2 < float(min_spacing_m) ** 2
+
+
+@njit(cache=True)
+def _stamp(cover, owner, disk, r0, c0, tid, sign):
+    h, w = cover.shape
+    R = disk.shape[0] // 2
+    for a in range(disk.shape[0]):
+        r = r0 + a - R
+        if r < 0 or r >= h:
+            continue
+        for b in range(disk.shape[1]):
+            if not disk[a, b]:
+                continue
+            c = c0 + b - R
+            if c < 0 or c >= w:
+                continue
+            cover[r, c] += sign
+            owner[r, c] += sign * (tid + 1)
+
+
+@njit(cache=True)
+def _greedy(order, scores, disk, n_turbines, cover, owner, sel_r, sel_c):
+    h, w = scores.shape
+    n = 0
+    for k in range(order.shape[0]):
+        if n >= n_turbines:
+            break
+        idx = order[k]
+        r = idx // w; c = idx % w
+        if cover[r, c] != 0:
+            continue
+        sel_r[n] = r; sel_c[n] = c
+        _stamp(cover, owner, disk, r, c, n, 1)
+        n += 1
+    return n
+
+
+@njit(cache=True)
+def _swap_search(pool, scores, disk, n, cover, owner, sel_r, sel_c, max_passes):
+    """
+    First-improvement 1-for-1 swaps. Each candidate is evaluated in O(1) from the cover/owner
+    grids: a free cell replaces the worst turbine, a cell blocked by exactly one turbine replaces
+    that turbine. Only accepted moves pay the O(|disk|) stamp cost.
+    """
+    h, w = scores.shape
+    selected = np.zeros((h, w), dtype=np.bool_)
+    for t in range(n):
+        selected[sel_r[t], sel_c[t]] = True
+    n_moves = 0
+    for _ in range(max_passes):
+        improved = False
+        worst = 0
+        for t in range(1, n):
+            if scores[sel_r[t], sel_c[t]] < scores[sel_r[worst], sel_c[worst]]:
+                worst = t
+        for k in range(pool.shape[0]):
+            idx = pool[k]
+            r = idx // w; c = idx % w
+            if selected[r, c]:
+                continue
+            blockers = cover[r, c]
+            if blockers == 0:
+                s = worst
+            elif blockers == 1:
+                s = owner[r, c] - 1
+            else:
+                continue
+            if scores[r, c] <= scores[sel_r[s], sel_c[s]]:
+                continue
+            _stamp(cover, owner, disk, sel_r[s], sel_c[s], s, -1)
+            selected[sel_r[s], sel_c[s]] = False
+            sel_r[s] = r; sel_c[s] = c
+            selected[r, c] = True
+            _stamp(cover, owner, disk, r, c, s, 1)
+            n_moves += 1
+            improved = True
+            worst = 0
+            for t in range(1, n):
+                if scores[sel_r[t], sel_c[t]] < scores[sel_r[worst], sel_c[worst]]:
+                    worst = t
+        if not improved:
+            break
+    return n_moves
+
+
+def solve_discrete_layout(scores: np.ndarray, disk: np.ndarray, num_turbines: int,
+                          max_passes: int = 20, pool_size: Optional[int] = None,
+                          seed: int = 0) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Greedy placement on the best free cells, followed by swap-based local search.
+    Returns (rows, cols, n_swaps); fewer than num_turbines cells are returned if the zone is full.
+    """
+    scores = np.ascontiguousarray(scores, dtype=np.float64)
+    flat = scores.ravel()
+    feasible = np.flatnonzero(np.isfinite(flat))
+    # descending score, ties broken by a seeded random key so results are reproducible
+    tie = np.random.default_rng(seed).random(feasible.size)
+    order = feasible[np.lexsort((tie, -flat[feasible]))].astype(np.int64)
+
+    cover = np.zeros(scores.shape, dtype=np.int32)
+    owner = np.zeros(scores.shape, dtype=np.int64)
+    sel_r = np.empty(num_turbines, dtype=np.int64)
+    sel_c = np.empty(num_turbines, dtype=np.int64)
+    disk = np.ascontiguousarray(disk, dtype=np.bool_)
+
+    n = _greedy(order, scores, disk, num_turbines, cover, owner, sel_r, sel_c)
+    if pool_size is None:
+        pool_size = max(10 * num_turbines * int(disk.sum()), 1000)
+    pool = order[:pool_size]
+    n_swaps = _swap_search(pool, scores, disk, n, cover, owner, sel_r, sel_c, max_passes) if n else 0
+    return sel_r[:n].copy(), sel_c[:n].copy(), int(n_swaps)
+
+
+def optimize_turbine_placement_discrete(wind_data, num_turbines: int = 10,
+                                        risk: Optional[np.ndarray] = None, risk_weight: float = 1.0,
+                                        min_spacing_m: float = 500.0,
+                                        zone_mask: Optional[np.ndarray] = None,
+                                        max_passes: int = 20, seed: int = 0) -> OptimizeResult:
+    """
+    Discrete counterpart of optimize_turbine_placement over candidate grid cells.
+
+    wind_data: xarray.DataArray [time, lat, lon]
+    risk: optional (lat, lon) risk grid, subtracted from energy with risk_weight
+    zone_mask: optional (lat, lon) bool grid of allowed development cells
+    Returns an OptimizeResult whose x uses the flat [lat1, lon1, ...] layout of simulate_layout_energy.
+    """
+    lat_grid = wind_data.lat.values
+    lon_grid = wind_data.lon.values
+    energy = cell_energy_grid(wind_data)
+    scores = cell_scores(energy, risk, risk_weight, zone_mask)
+    disk = exclusion_disk(lat_grid, lon_grid, min_spacing_m)
+    rows, cols, n_swaps = solve_discrete_layout(scores, disk, num_turbines, max_passes=max_passes, seed=seed)
+
+    x = np.column_stack([lat_grid[rows], lon_grid[cols]]).ravel()
+    placed = len(rows)
+    return OptimizeResult(
+        x=x, fun=-float(scores[rows, cols].sum()), energy=float(energy[rows, cols].sum()),
+        rows=rows, cols=cols, nit=n_swaps, success=placed == num_turbines,
+        message=("Placed all turbines" if placed == num_turbines
+                 else f"Zone full: placed {placed} of {num_turbines} turbines"),
+    )
+
+
+def optimize_turbine_layout_file(weather_file: str, seed: int,
+                                 num_turbines: int = config.NUM_TURBINES,
+                                 min_spacing_m: float = 500.0,
+                                 blade_radius_m: float = 50.0) -> str:
+    """
+    Public API: solve a discrete layout on the weather file's wind field and
+    return a GeoJSON of turbines (lon, lat, blade_radius in degrees) for process_turbine_data.
+    """
+    import geopandas as gpd
+    from data.weather_core import open_weather
+
+    with open_weather(weather_file, access="timeseries") as ds:
+        res = optimize_turbine_placement_discrete(ds["wind_speed"], num_turbines=num_turbines,
+                                                  min_spacing_m=min_spacing_m, seed=seed)
+    lat, lon = res.x[0::2], res.x[1::2]
+    gdf = gpd.GeoDataFrame({"lon": lon, "lat": lat,
+                            "blade_radius": np.full(len(lat), blade_radius_m / _M_PER_DEG)},
+                           geometry=gpd.points_from_xy(lon, lat), crs="EPSG:4326")
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".geojson", delete=False) as f:
+        gdf.to_file(f.name, driver="GeoJSON")
+        return f.name
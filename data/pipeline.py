@@ -0,0 +1,185 @@
+"""
+Input-preparation pipeline: the generators as a dependency graph over a local,
+content-addressed artefact store.
+
+Each Stage names a generator (a top-level function returning the path of the file or
+directory it wrote, or its "module:function" path so nothing is imported until the stage
+actually runs), its parameters and the stages whose outputs it takes as positional
+arguments. A stage's key is a hash of its name, function, parameters, seed and its
+upstream keys, so keys are known before anything runs and only stages missing from the
+store are executed. Ready stages run concurrently on a process pool; their outputs are
+moved into the store, which is never cleaned up by a run.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Union
+
+DEFAULT_CACHE_DIR = ".harrier_cache"
+
+
+def _resolve(func: Union[str, Callable[..., str]]) -> Callable[..., str]:
+    if callable(func):
+        return func
+    module, _, attr = func.partition(":")
+    return getattr(import_module(module), attr)
+
+
+class Stage:
+    def __init__(self, name: str, func: Union[str, Callable[..., str]], params: Optional[Dict[str, Any]] = None,
+                 deps: Sequence[str] = (), version: str = "1"):
+        self.name = name
+        self.func = func
+        self.params = dict(params or {})
+        self.deps = tuple(deps)
+        self.version = version  # bump to invalidate cached outputs after a generator change
+
+    def key(self, seed: int, upstream_keys: Iterable[str]) -> str:
+        spec = {
+            "name": self.name,
+            "func": self.func if isinstance(self.func, str) else f"{self.func.__module__}:{self.func.__qualname__}",
+            "version": self.version,
+            "params": self.params,
+            "seed": seed,
+            "upstream": list(upstream_keys),
+        }
+        blob = json.dumps(spec, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(blob).hexdigest()[:32]
+
+
+class ArtifactStore:
+    """One directory per key holding the artefact and a manifest naming it."""
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        """Artefact path for key, or None if absent or incomplete."""
+        manifest = os.path.join(self.root, key, self.MANIFEST)
+        if not os.path.exists(manifest):
+            return None
+        with open(manifest) as f:
+            path = os.path.join(self.root, key, json.load(f)["artifact"])
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, produced: str, stage: str = "") -> str:
+        """Move a produced file or directory into the store; returns its stored path."""
+        staging = tempfile.mkdtemp(prefix=f".{key}.", dir=self.root)
+        name = os.path.basename(os.path.normpath(produced))
+        shutil.move(produced, os.path.join(staging, name))
+        with open(os.path.join(staging, self.MANIFEST), "w") as f:
+            json.dump({"stage": stage, "artifact": name}, f)
+        final = os.path.join(self.root, key)
+        try:
+            os.replace(staging, final)
+        except OSError:
+            # Another run stored the same key first; keep theirs
+            shutil.rmtree(staging, ignore_errors=True)
+        return self.get(key)
+
+
+def _run_stage(func: Union[str, Callable[..., str]], upstream: Sequence[str], seed: int,
+               params: Dict[str, Any]) -> str:
+    return _resolve(func)(*upstream, seed=seed, **params)
+
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], store: Optional[ArtifactStore] = None):
+        self.stages = {s.name: s for s in stages}
+        self.store = store or ArtifactStore()
+        for s in stages:
+            missing = [d for d in s.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"stage {s.name!r} depends on unknown stage(s) {missing}")
+
+    def _order(self):
+        order, state = [], {}
+
+        def visit(name):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"dependency cycle through stage {name!r}")
+            state[name] = "visiting"
+            for d in self.stages[name].deps:
+                visit(d)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def keys(self, seed: int) -> Dict[str, str]:
+        keys = {}
+        for name in self._order():
+            stage = self.stages[name]
+            keys[name] = stage.key(seed, [keys[d] for d in stage.deps])
+        return keys
+
+    def run(self, seed: int, workers: Optional[int] = None) -> Dict[str, str]:
+        """Paths of every stage's artefact, running only the stale ones."""
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        import multiprocessing
+
+        keys = self.keys(seed)
+        paths = {name: self.store.get(key) for name, key in keys.items()}
+        pending = [name for name in self._order() if paths[name] is None]
+        if not pending:
+            return paths
+        if workers is None:
+            workers = min(len(pending), os.cpu_count() or 1)
+
+        def ready():
+            return [n for n in pending if all(paths[d] is not None for d in self.stages[n].deps)]
+
+        def submit_args(name):
+            stage = self.stages[name]
+            return stage.func, [paths[d] for d in stage.deps], seed, stage.params
+
+        if workers <= 1:
+            while pending:
+                name = ready()[0]
+                paths[name] = self.store.put(keys[name], _run_stage(*submit_args(name)), name)
+                pending.remove(name)
+            return paths
+
+        # spawn: forked workers can deadlock on numba's threading layer. Kernels are
+        # compiled to the on-disk cache first so concurrent stages load, not compile, them
+        from data.utils import warmup_kernels
+        warmup_kernels()
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            running = {}
+            while pending:
+                for name in ready():
+                    if name not in running.values():
+                        running[pool.submit(_run_stage, *submit_args(name))] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    paths[name] = self.store.put(keys[name], fut.result(), name)
+                    pending.remove(name)
+        return paths
+
+
+def input_pipeline(store: Optional[ArtifactStore] = None) -> Pipeline:
+    """GPS and DEM are independent; weather needs the DEM and the layout needs the weather."""
+    return Pipeline([
+        Stage("gps", "data.generate_harrier_gps:generate_harrier_gps"),
+        Stage("dem", "data.generate_lidar_dem:generate_lidar_dem_geotiff"),
+        Stage("weather", "data.generate_weather_nc:generate_weather_nc", deps=("dem",), version="3"),
+        Stage("turbines", "data.layout_solver:optimize_turbine_layout_file", deps=("weather",)),
+    ], store)
+
+
+def prepare_inputs(seed: int = 42, cache_dir: str = DEFAULT_CACHE_DIR,
+                   workers: Optional[int] = None) -> Dict[str, str]:
+    """Paths keyed gps/dem/weather/turbines, generated or taken from the cache."""
+    return input_pipeline(ArtifactStore(cache_dir)).run(seed, workers=workers)
@@ -4,7 +4,8 @@ import rasterio
 from rasterio.transform import from_bounds
 from rasterio.crs import CRS
 
-from .utils import perlin_noise_2d, slope_degrees_from_dem_m, utm_epsg_from_lonlat
+from .utils import (perlin_noise_2d, perlin_noise_tile, slope_degrees_from_dem_m, utm_epsg_from_lonlat,
+                    warmup_kernels)
 from .conversions import aoi_bounds_to_utm
 
 def build_dem_geotiff(
@@ -50,3 +51,98 @@ def build_dem_geotiff(
         dst.write(elev, 1); dst.set_band_description(1, "elevation_m")
         dst.write(slope, 2); dst.set_band_description(2, "slope_deg")
     return path, utm
+
+
+def _terrain_tile(task):
+    """
+    Elevation/slope for one output window. The tile is computed with a one-pixel halo
+    (noise is a pure function of global pixel coordinates), so slope is seamless.
+    """
+    (row0, col0, rows, cols, n_x, n_y, dx, dy, y_span, scale_px, octaves, persistence,
+     lacunarity, seed, base_min, base_span, noise_amplitude, elev_clip) = task
+    r_lo = max(row0 - 1, 0); c_lo = max(col0 - 1, 0)
+    r_hi = min(row0 + rows + 1, n_y); c_hi = min(col0 + cols + 1, n_x)
+    noise = perlin_noise_tile(r_lo, c_lo, r_hi - r_lo, c_hi - c_lo, scale_px,
+                              octaves, persistence, lacunarity, seed)
+    y_norm = (np.arange(r_lo, r_hi, dtype=np.float64) * dy) / max(y_span, 1e-9)
+    base = base_min + y_norm[:, None] * base_span
+    elev = np.clip(base + noise * noise_amplitude, elev_clip[0], elev_clip[1]).astype(np.float32)
+    slope = slope_degrees_from_dem_m(elev.astype(np.float64), float(dx), float(dy))
+    r_off = row0 - r_lo; c_off = col0 - c_lo
+    return (row0, col0, elev[r_off:r_off + rows, c_off:c_off + cols],
+            slope[r_off:r_off + rows, c_off:c_off + cols])
+
+
+def build_dem_geotiff_tiled(
+    seed: int,
+    n_x: int, n_y: int,
+    lat_min: float, lat_max: float,
+    lon_min: float, lon_max: float,
+    feature_scale_m: float,
+    octaves: int, persistence: float, lacunarity: float,
+    base_min: float, base_span: float,
+    noise_amplitude: float,
+    elev_clip: Tuple[float, float],
+    tile_size: int = 2048,
+    workers: int = 1,
+    out_path: Optional[str] = None,
+) -> tuple[str, CRS]:
+    """
+    Tiled counterpart of build_dem_geotiff for very large synthetic landscapes.
+    Tiles (hashed-gradient noise, see perlin_noise_tile) are produced on a process pool and
+    written straight into a windowed, tiled GeoTIFF, so memory is bounded by tile_size x workers.
+    Output depends only on the seed, not on tile_size or workers.
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    from rasterio.windows import Window
+
+    lon_c = 0.5*(lon_min + lon_max); lat_c = 0.5*(lat_min + lat_max)
+    epsg = utm_epsg_from_lonlat(lon_c, lat_c)
+    x_min, y_min, x_max, y_max, utm = aoi_bounds_to_utm(lat_min, lat_max, lon_min, lon_max, epsg)
+
+    dx = (x_max - x_min) / (n_x - 1); dy = (y_max - y_min) / (n_y - 1)
+    scale_px = max(feature_scale_m / max(min(dx, dy), 1e-9), 1.0)
+
+    if out_path is None:
+        with tempfile.NamedTemporaryFile(suffix=".tif", delete=False) as f:
+            out_path = f.name
+
+    tasks = [(r0, c0, min(tile_size, n_y - r0), min(tile_size, n_x - c0), n_x, n_y, dx, dy,
+              y_max - y_min, scale_px, octaves, persistence, lacunarity, seed,
+              base_min, base_span, noise_amplitude, elev_clip)
+             for r0 in range(0, n_y, tile_size) for c0 in range(0, n_x, tile_size)]
+
+    transform = from_bounds(x_min, y_min, x_max, y_max, n_x, n_y)
+    profile = dict(driver="GTiff", height=n_y, width=n_x, count=2,
+                   dtype="float32", crs=utm, transform=transform,
+                   tiled=True, blockxsize=256, blockysize=256,
+                   compress="deflate", interleave="pixel", BIGTIFF="IF_SAFER")
+
+    with rasterio.open(out_path, "w", **profile) as dst:
+        dst.set_band_description(1, "elevation_m"); dst.set_band_description(2, "slope_deg")
+
+        def _write(result):
+            row0, col0, elev, slope = result
+            window = Window(col0, row0, elev.shape[1], elev.shape[0])
+            dst.write(elev, 1, window=window); dst.write(slope, 2, window=window)
+
+        if workers <= 1:
+            for task in tasks:
+                _write(_terrain_tile(task))
+        else:
+            # spawn: forked workers can deadlock on numba's threading layer
+            warmup_kernels()
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                # imap-style window of in-flight tiles keeps memory bounded
+                in_flight = 2 * workers
+                pending = [pool.submit(_terrain_tile, t) for t in tasks[:in_flight]]
+                next_task = in_flight
+                while pending:
+                    _write(pending.pop(0).result())
+                    if next_task < len(tasks):
+                        pending.append(pool.submit(_terrain_tile, tasks[next_task]))
+                        next_task += 1
+    return out_path, utm
@@ -2,7 +2,7 @@ from typing import Tuple
 import numpy as np
 from numba import njit, prange
 
-@njit(parallel=True, fastmath=True)
+@njit(parallel=True, cache=True, fastmath=True)
 def perlin_noise_2d(x_points: int, y_points: int, scale: float = 10.0,
                     octaves: int = 6, persistence: float = 0.5,
                     lacunarity: float = 2.0, seed: int = 0) -> np.ndarray:
@@ -33,6 +33,55 @@ def perlin_noise_2d(x_points: int, y_points: int, scale: float = 10.0,
         frequency *= lacunarity
     return total / max_value
 
+@njit(cache=True, inline="always")
+def _lattice_hash(ix: int, iy: int, salt: int) -> int:
+    # 32-bit integer hash of a lattice corner; every term is masked so int64 never overflows
+    h = ((ix * 374761393) & 0xFFFFFFFF) + ((iy * 668265263) & 0xFFFFFFFF) + ((salt & 0xFFFFFFFF) * 1442695041)
+    h &= 0xFFFFFFFF
+    h = ((h ^ (h >> 13)) * 1274126177) & 0xFFFFFFFF
+    return h ^ (h >> 16)
+
+@njit(cache=True, inline="always")
+def _gradient_dot(ix: int, iy: int, salt: int, dx: float, dy: float) -> float:
+    angle = _lattice_hash(ix, iy, salt) * (2.0 * np.pi / 4294967296.0)
+    return np.cos(angle) * dx + np.sin(angle) * dy
+
+@njit(parallel=True, cache=True, fastmath=True)
+def perlin_noise_tile(row0: int, col0: int, n_rows: int, n_cols: int,
+                      scale: float = 10.0, octaves: int = 6, persistence: float = 0.5,
+                      lacunarity: float = 2.0, seed: int = 0) -> np.ndarray:
+    """
+    Gradient noise for global pixel rows [row0, row0+n_rows) and cols [col0, col0+n_cols).
+    Gradients come from a hash of (lattice x, lattice y, seed, octave) rather than a random
+    stream, so tiles are seamless and can be generated in any order on any worker.
+    """
+    out = np.zeros((n_rows, n_cols), dtype=np.float64)
+    max_value = 0.0
+    amplitude = 1.0
+    frequency = 1.0
+    for octave in range(octaves):
+        freq = frequency * scale
+        salt = seed * 1000003 + octave
+        for i in prange(n_rows):
+            yf = (row0 + i) / freq
+            y0 = int(np.floor(yf)); sy = yf - y0
+            v = sy * sy * (3.0 - 2.0 * sy)
+            for j in range(n_cols):
+                xf = (col0 + j) / freq
+                x0 = int(np.floor(xf)); sx = xf - x0
+                u = sx * sx * (3.0 - 2.0 * sx)
+                n00 = _gradient_dot(x0, y0, salt, sx, sy)
+                n10 = _gradient_dot(x0 + 1, y0, salt, sx - 1.0, sy)
+                n01 = _gradient_dot(x0, y0 + 1, salt, sx, sy - 1.0)
+                n11 = _gradient_dot(x0 + 1, y0 + 1, salt, sx - 1.0, sy - 1.0)
+                ix0 = n00 + u * (n10 - n00)
+                ix1 = n01 + u * (n11 - n01)
+                out[i, j] += (ix0 + v * (ix1 - ix0)) * amplitude
+        max_value += amplitude
+        amplitude *= persistence
+        frequency *= lacunarity
+    return out / max_value
+
 @njit(parallel=True, cache=True, fastmath=True)
 def slope_degrees_from_dem_m(elev: np.ndarray, dx_m: float, dy_m: float) -> np.ndarray:
     h, w = elev.shape
@@ -51,3 +100,13 @@ def slope_degrees_from_dem_m(elev: np.ndarray, dx_m: float, dy_m: float) -> np.n
 def utm_epsg_from_lonlat(lon: float, lat: float) -> int:
     zone = int((lon + 180) // 6) + 1
     return (32600 + zone) if lat >= 0 else (32700 + zone)
+
+def warmup_kernels() -> None:
+    """
+    Compile (or load from the on-disk cache) every kernel above with the argument types
+    the DEM builders use. Call once in a parent before starting a process pool so the
+    workers load the cached machine code instead of racing to compile it.
+    """
+    perlin_noise_2d(4, 4, 2.0, 1, 0.5, 2.0, 0)
+    perlin_noise_tile(0, 0, 4, 4, 2.0, 1, 0.5, 2.0, 0)
+    slope_degrees_from_dem_m(np.zeros((4, 4)), 1.0, 1.0)
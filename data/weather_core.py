@@ -1,6 +1,8 @@
 from __future__ import annotations
 import datetime as dt
+import os
 import tempfile
+from typing import Optional
 import numpy as np
 import pandas as pd
 import xarray as xr
@@ -73,15 +75,113 @@ def build_weather_dataset(lat_axis: np.ndarray,
     return ds
 
 
-def write_weather_netcdf(ds: xr.Dataset) -> str:
+# Storage layouts: "spatial" chunks hold a short run of hours over a wide area (model
+# builds: spatial slices, monthly aggregates); "timeseries" chunks hold the whole record
+# for a small block of cells (layout and curtailment optimisers: per-cell series)
+TIMESERIES_GROUP = "timeseries"
+PACKED_VARS = ("wind_speed", "pressure", "thermal")
+
+
+def layout_chunks(shape, layout: str = "spatial"):
+    """Default (time, lat, lon) chunk shape of a layout for a cube of this shape."""
+    n_time, n_lat, n_lon = shape
+    if layout == "spatial":
+        return (min(n_time, 168), min(n_lat, 128), min(n_lon, 128))
+    if layout == "timeseries":
+        return (min(n_time, 8784), min(n_lat, 8), min(n_lon, 8))
+    raise ValueError(f"unknown weather layout {layout!r}")
+
+
+def weather_encoding(ds: xr.Dataset, layout: str = "spatial", chunks=None, zlib: bool = True,
+                     complevel: int = 1, shuffle: bool = True, pack: bool = False,
+                     zarr: bool = False) -> dict:
+    """
+    Per-variable encoding: (time, lat, lon) chunking, zlib/shuffle compression and, with
+    pack, int16 packing of the float fields via scale_factor/add_offset (resolution is
+    range / 65534, e.g. ~0.5 mm/s for wind speed).
+    """
+    encoding = {"time": {"dtype": "int32", "units": "hours since 2023-01-01 00:00:00",
+                         "calendar": "gregorian"}}
+    for name, var in ds.data_vars.items():
+        enc = {}
+        if var.dims == ("time", "lat", "lon"):
+            size = layout_chunks(var.shape, layout) if chunks is None else tuple(min(c, n) for c, n in zip(chunks, var.shape))
+            enc["chunks" if zarr else "chunksizes"] = size
+        if zarr:
+            if zlib:
+                from numcodecs import Blosc
+                enc["compressor"] = Blosc(cname="zlib", clevel=complevel,
+                                          shuffle=Blosc.SHUFFLE if shuffle else Blosc.NOSHUFFLE)
+        elif zlib:
+            enc.update(zlib=True, complevel=complevel, shuffle=shuffle)
+        if pack and name in PACKED_VARS:
+            lo, hi = float(np.nanmin(var.values)), float(np.nanmax(var.values))
+            enc.update(dtype="int16", _FillValue=np.int16(-32768), add_offset=(hi + lo) / 2.0,
+                       scale_factor=(hi - lo) / 65534.0 if hi > lo else 1.0)
+        encoding[name] = enc
+    return encoding
+
+
+def write_weather_netcdf(ds: xr.Dataset, path: Optional[str] = None, chunks=None, zlib: bool = False,
+                         complevel: int = 1, shuffle: bool = True, pack: bool = False,
+                         timeseries_copy: bool = False, timeseries_chunks=None,
+                         timeseries_zlib: Optional[bool] = None, timeseries_pack: Optional[bool] = None) -> str:
     """
-    Write CF-friendly NetCDF with safe time encoding.
+    Write CF-friendly NetCDF with safe time encoding, chunked for spatial access.
+    timeseries_copy adds the same data chunked for per-cell series in the "timeseries"
+    group of the same file; open_weather picks the group to read. timeseries_zlib /
+    timeseries_pack encode that copy differently from the root (default: the same).
     """
-    with tempfile.NamedTemporaryFile(suffix=".nc", delete=False) as f:
-        ds.to_netcdf(
-            f.name,
-            encoding={"time": {"dtype": "int32",
-                               "units": "hours since 2023-01-01 00:00:00",
-                               "calendar": "gregorian"}}
-        )
-        return f.name
+    if path is None:
+        with tempfile.NamedTemporaryFile(suffix=".nc", delete=False) as f:
+            path = f.name
+    options = dict(zlib=zlib, complevel=complevel, shuffle=shuffle, pack=pack)
+    ds.to_netcdf(path, engine="netcdf4", encoding=weather_encoding(ds, "spatial", chunks, **options))
+    if timeseries_copy:
+        options.update(zlib=zlib if timeseries_zlib is None else timeseries_zlib,
+                       pack=pack if timeseries_pack is None else timeseries_pack)
+        ds.to_netcdf(path, mode="a", group=TIMESERIES_GROUP, engine="netcdf4",
+                     encoding=weather_encoding(ds, "timeseries", timeseries_chunks, **options))
+    return path
+
+
+def write_weather_zarr(ds: xr.Dataset, path: Optional[str] = None, chunks=None, timeseries_chunks=None,
+                       zlib: bool = True, complevel: int = 1, shuffle: bool = True, pack: bool = False,
+                       timeseries_zlib: Optional[bool] = None, timeseries_pack: Optional[bool] = None) -> str:
+    """Zarr store holding both layouts: spatial at the root, per-cell series in "timeseries"."""
+    if path is None:
+        path = tempfile.mkdtemp(suffix=".zarr")
+    options = dict(zlib=zlib, complevel=complevel, shuffle=shuffle, pack=pack, zarr=True)
+    ds.to_zarr(path, mode="w", encoding=weather_encoding(ds, "spatial", chunks, **options))
+    options.update(zlib=zlib if timeseries_zlib is None else timeseries_zlib,
+                   pack=pack if timeseries_pack is None else timeseries_pack)
+    ds.to_zarr(path, mode="a", group=TIMESERIES_GROUP,
+               encoding=weather_encoding(ds, "timeseries", timeseries_chunks, **options))
+    return path
+
+
+def open_weather(path: str, access: str = "spatial", **kwargs) -> xr.Dataset:
+    """
+    Open a weather store in the layout suited to the access pattern: "spatial" (slices,
+    aggregates over the area) or "timeseries" (full records at a few cells). Stores with
+    one layout (e.g. plain NetCDF from older runs) open as they are.
+    """
+    if access not in ("spatial", "timeseries"):
+        raise ValueError(f"unknown weather access pattern {access!r}")
+    if os.path.isdir(path):
+        group = TIMESERIES_GROUP if access == "timeseries" and os.path.isdir(os.path.join(path, TIMESERIES_GROUP)) else None
+        return xr.open_zarr(path, group=group, **kwargs)
+    group = None
+    if access == "timeseries":
+        import netCDF4
+        with netCDF4.Dataset(path) as nc:
+            group = TIMESERIES_GROUP if TIMESERIES_GROUP in nc.groups else None
+    return xr.open_dataset(path, group=group, engine="netcdf4", **kwargs)
+
+
+def storage_chunks(da: xr.DataArray):
+    """(time, lat, lon) chunk shape the array is stored with, or None when unchunked."""
+    chunks = da.encoding.get("chunksizes") or da.encoding.get("chunks")
+    if chunks is None and da.chunks is not None:
+        chunks = tuple(c[0] for c in da.chunks)
+    return tuple(int(c) for c in chunks) if chunks else None
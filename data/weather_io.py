@@ -1,29 +1,30 @@
 from __future__ import annotations
 import os
+from typing import Optional
 import numpy as np
 import geopandas as gpd
-import rasterio
 from rasterio.transform import xy as transform_xy
 from rasterio.crs import CRS
 from pyproj import Transformer
 
-def _coords_from_raster(src: rasterio.io.DatasetReader):
+from src.dem_sampler import read_dem_bands
+
+def _coords_from_raster(transform, height: int, width: int, crs):
     """
     Build 1D lat/lon axes from pixel centers.
-    Reprojects to WGS84 if src CRS is projected. Ensures ascending axes.
+    Reprojects to WGS84 if the CRS is projected. Ensures ascending axes.
     Returns: lat_axis, lon_axis, flip_lat, flip_lon
     """
-    h, w = src.height, src.width
-    rows = np.arange(h)
-    cols = np.arange(w)
+    rows = np.arange(height)
+    cols = np.arange(width)
 
-    xs0, ys0 = transform_xy(src.transform, 0, cols)   # row=0, all cols
-    xs1, ys1 = transform_xy(src.transform, rows, 0)   # col=0, all rows
+    xs0, ys0 = transform_xy(transform, 0, cols)   # row=0, all cols
+    xs1, ys1 = transform_xy(transform, rows, 0)   # col=0, all rows
     xs0 = np.array(xs0); ys0 = np.array(ys0)
     xs1 = np.array(xs1); ys1 = np.array(ys1)
 
-    if src.crs and CRS.from_user_input(src.crs).is_projected:
-        to_ll = Transformer.from_crs(src.crs, "EPSG:4326", always_xy=True)
+    if crs and CRS.from_user_input(crs).is_projected:
+        to_ll = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
         lons, _ = to_ll.transform(xs0, ys0)  # along columns
         _, lats = to_ll.transform(xs1, ys1)  # along rows
     else:
@@ -42,38 +43,21 @@ def _coords_from_raster(src: rasterio.io.DatasetReader):
     return lats, lons, flip_lat, flip_lon
 
 
-def _compute_slope_from_elev_m(elev: np.ndarray, src: rasterio.io.DatasetReader) -> np.ndarray:
-    """
-    Slope (degrees) from elevation (meters) using meter spacings from affine transform.
-    Uses NumPy central differences (fast, dependency-free).
-    """
-    dx = abs(src.transform.a)
-    dy = abs(src.transform.e)
-    elev = elev.astype(np.float64, copy=False)
-    gy, gx = np.gradient(elev, dy, dx)  # gy: dZ/dy, gx: dZ/dx
-    slope = np.degrees(np.arctan(np.sqrt(gx * gx + gy * gy))).astype(np.float32)
-    return slope
-
-
-def _grid_from_geotiff(path: str):
+def _grid_from_geotiff(path: str, resolution_m: Optional[float] = None):
     """
     Returns lat_axis, lon_axis, elevation_grid, slope_grid (lat/lon ascending).
     Uses band 1 = elevation (m); band 2 = slope (deg) if present; otherwise computes slope.
+    resolution_m reads a decimated grid (served from overviews when present).
     """
-    with rasterio.open(path) as src:
-        elev = src.read(1).astype(np.float32)
-        slope = src.read(2).astype(np.float32) if src.count >= 2 else None
-
-        lat_axis, lon_axis, flip_lat, flip_lon = _coords_from_raster(src)
-        if slope is None:
-            slope = _compute_slope_from_elev_m(elev, src)
+    elev, slope, transform, crs = read_dem_bands(path, resolution_m)
+    lat_axis, lon_axis, flip_lat, flip_lon = _coords_from_raster(transform, elev.shape[0], elev.shape[1], crs)
 
-        if flip_lat:
-            elev = elev[::-1, :]
-            slope = slope[::-1, :]
-        if flip_lon:
-            elev = elev[:, ::-1]
-            slope = slope[:, ::-1]
+    if flip_lat:
+        elev = elev[::-1, :]
+        slope = slope[::-1, :]
+    if flip_lon:
+        elev = elev[:, ::-1]
+        slope = slope[:, ::-1]
 
     return lat_axis, lon_axis, elev, slope
 
@@ -115,14 +99,14 @@ def _grid_from_geojson(path: str):
     return lat_axis, lon_axis, elev_grid, slope_grid
 
 
-def read_dem_grid(lidar_file: str):
+def read_dem_grid(lidar_file: str, resolution_m: Optional[float] = None):
     """
     Unified loader:
-      - GeoTIFF (.tif/.tiff): read bands, compute slope if missing
+      - GeoTIFF (.tif/.tiff): read bands (optionally at a coarser model resolution), compute slope if missing
       - GeoJSON: reshape to grid
     Returns: lat_axis, lon_axis, elevation_grid, slope_grid
     """
     ext = os.path.splitext(lidar_file)[1].lower()
     if ext in (".tif", ".tiff"):
-        return _grid_from_geotiff(lidar_file)
+        return _grid_from_geotiff(lidar_file, resolution_m)
     return _grid_from_geojson(lidar_file)
@@ -1,48 +1,109 @@
+import time
+_T0 = time.perf_counter()
+
+import argparse
 import pandas as pd
 import numpy as np
 import random
-import os
 from src.models import HarrierModel
-from src.visualization import HarrierVisualization
-from data.generate_harrier_gps import generate_harrier_gps
-from data.generate_lidar_dem import generate_lidar_dem
-from data.generate_weather_nc import generate_weather_nc
-from data.optimize_turbine_placement import optimize_turbine_placement
+from data.pipeline import DEFAULT_CACHE_DIR, prepare_inputs
+from src.results_store import ResultsStore
+
+# Seconds spent before the first model step, filled in by run_simulation
+startup_times = {}
 
-def run_simulation(years=100, seed=42):
+def run_simulation(years=100, seed=42, cache_dir=DEFAULT_CACHE_DIR, headless=False,
+                   store=None, scenario="baseline", replicate=0, n_agents=None, assimilator_state=None):
+    startup_times["imports"] = time.perf_counter() - _T0
+    t = time.perf_counter()
     # Set pseudo-random seed for repeatability
     np.random.seed(seed)
     random.seed(seed)
     
-    # Generate temporary data files
-    gps_file = generate_harrier_gps(seed)
-    lidar_file = generate_lidar_dem(seed)
-    weather_file = generate_weather_nc(lidar_file, seed)
-    turbine_file = optimize_turbine_placement(weather_file, seed)
+    # Generate inputs, or reuse them from the artefact cache for this seed
+    inputs = prepare_inputs(seed, cache_dir)
+    gps_file, lidar_file = inputs["gps"], inputs["dem"]
+    weather_file, turbine_file = inputs["weather"], inputs["turbines"]
+    startup_times["inputs"] = time.perf_counter() - t
+    t = time.perf_counter()
     
-    # Run model
-    model = HarrierModel(gps_file, lidar_file, weather_file, turbine_file)
+    # Waypoints, transitions and collision prior from saved assimilation state, if given
+    assimilated = None
+    if assimilator_state is not None:
+        from src.assimilation import TelemetryAssimilator
+        assimilated = TelemetryAssimilator.load(assimilator_state).bundle()
+
+    # Run model; solara/matplotlib are only imported when plotting
+    model = HarrierModel(gps_file, lidar_file, weather_file, turbine_file, n_agents=n_agents,
+                         assimilated=assimilated)
+    startup_times["model"] = time.perf_counter() - t
+    startup_times["total"] = time.perf_counter() - _T0
+    if not headless:
+        from src.visualization import HarrierVisualization
     for _ in range(years * 12):
         model.step()
-        if _ % 12 == 0:
+        if _ % 12 == 0 and not headless:
             HarrierVisualization(model)
     
     # Collect results
     data = model.datacollector.get_model_vars_dataframe()
     curtailment = {f"Turbine_{i}": times for i, (t, times) in enumerate(model.curtailment_schedule.items())}
     curtailment_df = pd.DataFrame(dict([(k, pd.Series(v)) for k, v in curtailment.items()]))
-    
-    # Clean up temporary files
-    for f in [gps_file, lidar_file, weather_file, turbine_file]:
-        try:
-            os.unlink(f)
-        except OSError:
-            pass
+    if store is not None:
+        store.write_run(scenario, {"years": years, "seed": seed}, replicate, data,
+                        model.collision_events, n_turbines=len(model.turbines))
     
     return data, curtailment_df
 
+def run_hybrid_simulation(years=1000, calibration_years=10, replicates=10_000, seed=42,
+                          cache_dir=DEFAULT_CACHE_DIR, threshold=0, n_agents=None):
+    """
+    Full ABM for calibration_years to estimate stage-specific collision mortality and
+    fledgling rates, then a vectorized stochastic projection of `replicates` trajectories
+    for the remaining years. Returns (ABM model variables, extinction curve).
+    """
+    from src.population import VitalRates, extinction_curve, project
+    np.random.seed(seed)
+    random.seed(seed)
+    inputs = prepare_inputs(seed, cache_dir)
+    model = HarrierModel(inputs["gps"], inputs["dem"], inputs["weather"], inputs["turbines"], n_agents=n_agents)
+    rates = VitalRates.from_model(model, calibration_years * 12)
+    alive = [a for a in model.schedule.agents if a.alive]
+    n0 = (sum(not a.breeding for a in alive), sum(a.breeding for a in alive))
+    trajectories = project(rates, n0, max(years - calibration_years, 0), replicates,
+                           start_month=model.month % 12 + 1, seed=seed)
+    curve = extinction_curve(trajectories, threshold)
+    curve["year"] += calibration_years
+    return model.datacollector.get_model_vars_dataframe(), curve
+
 if __name__ == "__main__":
-    data, curtailment = run_simulation()
+    parser = argparse.ArgumentParser(description="Black harrier wind-farm collision ABM")
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--headless", action="store_true", help="skip visualization")
+    parser.add_argument("--results-dir", default="results", help="partitioned Parquet results store")
+    parser.add_argument("--scenario", default="baseline")
+    parser.add_argument("--replicate", type=int, default=0)
+    parser.add_argument("--hybrid", action="store_true",
+                        help="ABM calibration window, then matrix projection for extinction risk")
+    parser.add_argument("--calibration-years", type=int, default=10)
+    parser.add_argument("--replicates", type=int, default=10_000)
+    parser.add_argument("--agents", type=int, default=None,
+                        help="population size sampled from the telemetry (default: one agent per tagged bird)")
+    parser.add_argument("--assimilator-state", default=None,
+                        help="TelemetryAssimilator.save() file whose waypoints and transitions the model uses")
+    args = parser.parse_args()
+    if args.hybrid:
+        _, curve = run_hybrid_simulation(args.years, args.calibration_years, args.replicates,
+                                         args.seed, args.cache_dir, n_agents=args.agents)
+        print(curve.iloc[::max(len(curve) // 10, 1)].to_string(index=False))
+        raise SystemExit(0)
+    store = ResultsStore(args.results_dir)
+    data, curtailment = run_simulation(args.years, args.seed, args.cache_dir, headless=args.headless,
+                                       store=store, scenario=args.scenario, replicate=args.replicate,
+                                       n_agents=args.agents, assimilator_state=args.assimilator_state)
+    print("Cold start (s): " + ", ".join(f"{k} {v:.2f}" for k, v in startup_times.items()))
     print(f"Final Population: {data['Population'].iloc[-1]}")
     print(f"Average Annual Fatalities: {data['Fatalities'].mean() * 12}")
     print(f"Updated Collision Probability: {data['Collision_Prob'].iloc[-1]:.3f}")
@@ -52,5 +113,5 @@ if __name__ == "__main__":
         print("Warning: Population may collapse in ~75 years with 5 fatalities/year")
     print("Curtailment Recommendations (Month, Hour):")
     print(curtailment)
-    data.to_csv("simulation_results.csv")
-    curtailment.to_csv("curtailment_schedule.csv")
\ No newline at end of file
+    print(f"Results stored under {store.root} (scenario={args.scenario}, replicate={args.replicate})")
+    print(store.fatality_quantiles(scenarios=[args.scenario]))
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+Incremental assimilation of new telemetry batches.
+
+TelemetryAssimilator keeps the sufficient statistics behind the model inputs -- monthly
+waypoint transition counts, per-turbine BSA exposure counts, the Beta posterior on
+collision probability and each bird's last assimilated fix -- so a new download is folded
+in with work proportional to the batch, never the archive.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.bayesian_utils import PRIOR_A, PRIOR_B, turbine_exposure_counts, turbine_zone_radius
+from src.config import BSA_HEIGHT
+from src.data_processing import Point
+from src.spatial import SpatialLayer
+from src.waypoints import (cluster_waypoints, consecutive_transitions, nearest_waypoint,
+                           transition_counts, transition_probs_dict)
+
+
+class TelemetryAssimilator:
+    """
+    Waypoints and turbines are fixed at construction. Batches (DataFrames with harrier_id,
+    timestamp, lon, lat, alt, e.g. from read_telemetry) must arrive in time order per bird:
+    fixes not newer than a bird's last assimilated fix are dropped, so re-sending an
+    overlapping download does not double count.
+    """
+
+    def __init__(self, waypoints_lonlat, turbine_lonlat, zone_radius_m,
+                 a: float = PRIOR_A, b: float = PRIOR_B, seed: int = 0, epsg: Optional[int] = None):
+        self.waypoints = np.asarray(waypoints_lonlat, dtype=np.float64).reshape(-1, 2)
+        self.turbine_lonlat = np.asarray(turbine_lonlat, dtype=np.float64).reshape(-1, 2)
+        self.zone_radius = np.asarray(zone_radius_m, dtype=np.float64)
+        # Nearest-waypoint and exposure queries run in metres
+        self.spatial = SpatialLayer(epsg) if epsg else SpatialLayer.for_lonlat(self.waypoints[:, 0], self.waypoints[:, 1])
+        self._waypoints_xy = self.spatial.project(self.waypoints)
+        self._turbine_xy = self.spatial.project(self.turbine_lonlat)
+        n_w = len(self.waypoints)
+        self.counts = np.zeros((12, n_w, n_w), dtype=np.int64)
+        self.exposure = np.zeros(len(self.turbine_lonlat), dtype=np.int64)
+        self.a = float(a)
+        self.b = float(b)
+        self.seed = int(seed)
+        self.n_batches = 0
+        self.n_fixes = 0
+        # Last fix per bird: id -> (timestamp ns, waypoint index)
+        self.last_fix: Dict[int, tuple] = {}
+
+    @classmethod
+    def from_telemetry(cls, telemetry: pd.DataFrame, turbines: pd.DataFrame,
+                       waypoints_lonlat=None, seed: int = 0) -> "TelemetryAssimilator":
+        """Seed the statistics from a full history; waypoints are clustered from it if not given."""
+        if waypoints_lonlat is None:
+            centroids, _ = cluster_waypoints(telemetry["lat"].to_numpy(), telemetry["lon"].to_numpy())
+            waypoints_lonlat = centroids[:, ::-1] if len(centroids) else \
+                np.array([[telemetry["lon"].mean(), telemetry["lat"].mean()]])
+        turbine_lonlat = np.column_stack([turbines.geometry.x, turbines.geometry.y]) if len(turbines) else []
+        obj = cls(waypoints_lonlat, turbine_lonlat, turbine_zone_radius(turbines), seed=seed)
+        obj.assimilate(telemetry)
+        return obj
+
+    def assimilate(self, batch: pd.DataFrame) -> int:
+        """Fold a batch into the statistics; returns the number of fixes used."""
+        bird = np.asarray(batch["harrier_id"], dtype=np.int64)
+        time = batch["timestamp"].to_numpy().astype("datetime64[ns]")
+        if self.last_fix:
+            ids = np.array(sorted(self.last_fix), dtype=np.int64)
+            last_time = np.array([self.last_fix[h][0] for h in ids], dtype=np.int64)
+            pos = np.minimum(np.searchsorted(ids, bird), len(ids) - 1)
+            known = ids[pos] == bird
+            keep = ~known | (time.astype(np.int64) > last_time[pos])
+        else:
+            keep = np.ones(len(bird), dtype=bool)
+        if not keep.any():
+            return 0
+        bird, time = bird[keep], time[keep]
+        x, y = self.spatial.to_xy(batch["lon"].to_numpy(dtype=np.float64)[keep],
+                                  batch["lat"].to_numpy(dtype=np.float64)[keep])
+        alt = batch["alt"].to_numpy(dtype=np.float64)[keep]
+        nearest = nearest_waypoint(self._waypoints_xy, x, y)
+
+        # Prepend each bird's carried-over last fix so the first new fix pairs with it
+        carried = [h for h in np.unique(bird) if int(h) in self.last_fix]
+        c_time = np.array([self.last_fix[int(h)][0] for h in carried], dtype="datetime64[ns]")
+        c_wp = np.array([self.last_fix[int(h)][1] for h in carried], dtype=np.int64)
+        month, start, end = consecutive_transitions(
+            np.concatenate([np.asarray(carried, dtype=np.int64), bird]),
+            np.concatenate([c_time, time]), np.concatenate([c_wp, nearest]))
+        self.counts += transition_counts(month, start, end, len(self.waypoints))
+
+        # Exposure and Beta posterior: collisions ~ Binomial(new exposures, current mean)
+        new_exposure = turbine_exposure_counts(x, y, alt, self._turbine_xy, self.zone_radius, BSA_HEIGHT)
+        self.exposure += new_exposure
+        near = int(new_exposure.sum())
+        if near:
+            rng = np.random.default_rng([self.seed, self.n_batches])
+            collisions = int(rng.binomial(near, self.collision_prob))
+            self.a += collisions
+            self.b += near - collisions
+
+        order = np.lexsort((time, bird))
+        last = np.r_[bird[order][1:] != bird[order][:-1], True]
+        for i in order[last]:
+            self.last_fix[int(bird[i])] = (int(time[i].astype(np.int64)), int(nearest[i]))
+        self.n_batches += 1
+        self.n_fixes += int(keep.sum())
+        return int(keep.sum())
+
+    # ---------------------
+    # Outputs
+    # ---------------------
+    @property
+    def collision_prob(self) -> float:
+        return self.a / (self.a + self.b)
+
+    def transition_probs(self) -> Dict[tuple, float]:
+        return transition_probs_dict(self.counts)
+
+    def bundle(self) -> Dict[str, Any]:
+        """Model inputs in the shapes HarrierModel uses."""
+        return {
+            "waypoints": [Point(x, y) for x, y in self.waypoints],
+            "transition_probs": self.transition_probs(),
+            "collision_prob": self.collision_prob,
+            "turbine_exposure": self.exposure.copy(),
+            "n_fixes": self.n_fixes,
+        }
+
+    # ---------------------
+    # Persistence
+    # ---------------------
+    def save(self, path: str) -> None:
+        ids = np.array(sorted(self.last_fix), dtype=np.int64)
+        np.savez_compressed(
+            path, waypoints=self.waypoints, turbine_lonlat=self.turbine_lonlat,
+            zone_radius=self.zone_radius, counts=self.counts, exposure=self.exposure,
+            ab=np.array([self.a, self.b]),
+            meta=np.array([self.seed, self.n_batches, self.n_fixes, self.spatial.epsg], dtype=np.int64),
+            last_ids=ids,
+            last_time=np.array([self.last_fix[i][0] for i in ids], dtype=np.int64),
+            last_wp=np.array([self.last_fix[i][1] for i in ids], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path: str) -> "TelemetryAssimilator":
+        with np.load(path) as z:
+            obj = cls(z["waypoints"], z["turbine_lonlat"], z["zone_radius"], *z["ab"],
+                      seed=int(z["meta"][0]), epsg=int(z["meta"][3]))
+            obj.counts = z["counts"].copy()
+            obj.exposure = z["exposure"].copy()
+            obj.n_batches, obj.n_fixes = int(z["meta"][1]), int(z["meta"][2])
+            obj.last_fix = {int(i): (int(t), int(w)) for i, t, w in zip(z["last_ids"], z["last_time"], z["last_wp"])}
+        return obj
@@ -1,21 +1,82 @@
-from scipy.stats import beta
 import numpy as np
-import random
-from src.data_processing import Point
-from src.config import BSA_HEIGHT
+from scipy.spatial import cKDTree
+from src.config import (
+    BLADE_PAINT_EFFECT, BREEDING_MONTHS, BSA_HEIGHT, MITIGATION_BLADE_PAINT, MITIGATION_SHUTDOWN,
+    PREY_REDUCTION_EFFECT, PREY_REDUCTION_FACTOR, SHUTDOWN_EFFECT,
+)
+from src.spatial import SpatialLayer
 
-# Bayesian Update for Collision Probability
-def bayesian_update_collision_prob(prior_prob, gps_data, turbines):
-    near_turbine = 0
-    collisions = 0
-    for _, row in gps_data.iterrows():
-        if row['alt'] >= BSA_HEIGHT[0] and row['alt'] <= BSA_HEIGHT[1]:
-            for _, t in turbines.iterrows():
-                if Point(row['lon'], row['lat']).within(t['collision_zone']):
-                    near_turbine += 1
-                    collisions += 1 if random.random() < prior_prob else 0
-    a, b = 14, 86
+# Beta(14, 86) prior on per-exposure collision probability
+PRIOR_A, PRIOR_B = 14, 86
+
+
+def mitigated_collision_prob(p, u, shutdown):
+    """
+    Collision probability after the blade paint, shutdown and prey-reduction draws
+    (columns 1-3 of u); shutdown marks the rows where curtailment is in force.
+    """
+    p = np.where(u[:, 1] < MITIGATION_BLADE_PAINT, p * (1.0 - BLADE_PAINT_EFFECT), p)
+    p = np.where((u[:, 2] < MITIGATION_SHUTDOWN) & shutdown, p * (1.0 - SHUTDOWN_EFFECT), p)
+    return np.where(u[:, 3] < PREY_REDUCTION_FACTOR, p * (1.0 - PREY_REDUCTION_EFFECT), p)
+
+
+def mitigation_multiplier(month: int) -> float:
+    """Expected factor mitigated_collision_prob applies in a month."""
+    m = (1.0 - MITIGATION_BLADE_PAINT * BLADE_PAINT_EFFECT) * (1.0 - PREY_REDUCTION_FACTOR * PREY_REDUCTION_EFFECT)
+    if month in BREEDING_MONTHS:
+        m *= 1.0 - MITIGATION_SHUTDOWN * SHUTDOWN_EFFECT
+    return m
+
+
+def turbine_zone_radius(turbines):
+    """Collision-zone radius (m) per turbine: blade radius plus a 50 m buffer."""
+    if 'zone_radius_m' in turbines.columns:
+        return turbines['zone_radius_m'].to_numpy(dtype=float)
+    return (turbines['blade_radius'].to_numpy(dtype=float) + 50/111000) * 111000
+
+
+def turbine_exposure_counts(x, y, alt, turbine_xy, zone_radius, alt_range=BSA_HEIGHT):
+    """
+    Per-turbine count of fixes inside the blade-swept altitude band and within that
+    turbine's collision zone (projected coordinates and radii, metres). A fix near
+    several turbines counts once for each.
+    """
+    turbine_xy = np.asarray(turbine_xy, dtype=float).reshape(-1, 2)
+    zone_radius = np.asarray(zone_radius, dtype=float)
+    counts = np.zeros(len(turbine_xy), dtype=np.int64)
+    alt = np.asarray(alt, dtype=float)
+    in_band = (alt >= alt_range[0]) & (alt <= alt_range[1])
+    if not in_band.any() or not len(turbine_xy):
+        return counts
+    fixes = np.column_stack([np.asarray(x, dtype=float)[in_band], np.asarray(y, dtype=float)[in_band]])
+    pairs = cKDTree(turbine_xy).sparse_distance_matrix(
+        cKDTree(fixes), zone_radius.max(), output_type='coo_matrix')
+    hit = pairs.data < zone_radius[pairs.row]
+    np.add.at(counts, pairs.row[hit], 1)
+    return counts
+
+
+def beta_binomial_update(prior_prob, near_turbine, a=PRIOR_A, b=PRIOR_B, rng=None):
+    """Posterior mean after near_turbine exposures, collisions drawn Binomial(near, prior_prob)."""
+    rng = np.random if rng is None else rng
+    collisions = int(rng.binomial(int(near_turbine), prior_prob)) if near_turbine else 0
     a += collisions
     b += near_turbine - collisions
-    posterior_prob = a / (a + b)
-    return posterior_prob
\ No newline at end of file
+    return a / (a + b)
+
+
+# Bayesian Update for Collision Probability
+def bayesian_update_collision_prob(prior_prob, gps_data, turbines, near_turbine=None):
+    """
+    near_turbine (total exposures) can be passed in when gps_data and turbines are
+    unchanged between calls, so only the binomial draw is repeated.
+    """
+    if near_turbine is None:
+        near_turbine = 0
+        if len(turbines):
+            spatial = SpatialLayer.for_lonlat(turbines.geometry.x, turbines.geometry.y)
+            x, y = spatial.to_xy(gps_data['lon'], gps_data['lat'])
+            turbine_xy = spatial.project(np.column_stack([turbines.geometry.x, turbines.geometry.y]))
+            near_turbine = int(turbine_exposure_counts(x, y, gps_data['alt'], turbine_xy,
+                                                       turbine_zone_radius(turbines)).sum())
+    return beta_binomial_update(prior_prob, near_turbine)
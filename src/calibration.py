@@ -0,0 +1,275 @@
+"""
+ABC-SMC calibration of HarrierModel parameters against GPS telemetry.
+
+Thousands of parameter particles are simulated at once: every particle carries its own
+population of walkers on one shared CompactGraph, and each step advances the whole
+(particles x agents) array with the same rules as HarrierAgent.move/check_collision
+(flight profile, monthly transition weights, wake multiplier, displacement, collision).
+Summary statistics (utilisation distribution over a coarse grid, height histogram, step
+length mean/sd per model step and optionally the fatality rate) are compared with the
+telemetry, resampled to one fix per bird per model step for the step lengths, and a
+population Monte Carlo ABC (Beaumont et al., 2009) shrinks the tolerance over generations.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    AVOIDANCE_RATE_PRIOR, BREEDING_MONTHS, BSA_HEIGHT, COLLISION_PROB_PRIOR, COLLISION_RADIUS,
+    DISPLACEMENT_RADIUS, MIGRATION_HEIGHT, MIGRATION_MONTHS, NEST_BUFFER_VERY_HIGH, ROOST_BUFFER_COMMUNAL,
+    ROOST_BUFFER_SINGLE,
+)
+from src.bayesian_utils import mitigation_multiplier
+from src.graph_arrays import CompactGraph
+
+# Uniform prior boxes (low, high)
+DEFAULT_PRIORS: Dict[str, Tuple[float, float]] = {
+    "avoidance_rate": (0.8, 0.995),
+    "collision_prob": (0.02, 0.4),
+    "displacement_radius": (0.0, 2 * DISPLACEMENT_RADIUS),
+    "bsa_fraction": (0.05, 0.8),
+    "wake_coeff": (0.0, 0.5),
+}
+# Fixed values for parameters not being calibrated
+DEFAULT_PARAMS: Dict[str, float] = {
+    "avoidance_rate": AVOIDANCE_RATE_PRIOR,
+    "collision_prob": COLLISION_PROB_PRIOR,
+    "displacement_radius": DISPLACEMENT_RADIUS,
+    "bsa_fraction": 0.35,
+    "wake_coeff": 0.0,
+}
+HEIGHT_BINS = np.array([0.0, 30.0, 60.0, 100.0, 130.0, np.inf])
+
+
+def model_setup(model, ud_cells: int = 8):
+    """
+    Everything the batched simulator needs from a constructed HarrierModel:
+    (graph, start_nodes, breeding, exempt, ud_bin).
+    """
+    graph = CompactGraph.from_model(model)
+    agents = [a for a in model.schedule.agents if getattr(a, "alive", False)]
+    start_nodes = graph.nearest_node(np.array([a.pos for a in agents], dtype=float))
+    breeding = np.array([a.breeding for a in agents], dtype=bool)
+    km = graph.unit_per_km
+    exempt = (graph.within(model._nest_positions, NEST_BUFFER_VERY_HIGH * km)
+              | graph.within(model._communal_roost_positions, ROOST_BUFFER_COMMUNAL * km)
+              | graph.within(model._single_roost_positions, ROOST_BUFFER_SINGLE * km))
+    return graph, start_nodes, breeding, exempt, utilisation_bins(graph, ud_cells)
+
+
+def utilisation_bins(graph: CompactGraph, cells: int = 8) -> np.ndarray:
+    """Coarse grid cell (0..cells^2-1) of every node, over the node extent."""
+    lo = graph.pos.min(axis=0); span = np.maximum(graph.pos.max(axis=0) - lo, 1e-12)
+    ij = np.minimum((cells * (graph.pos - lo) / span).astype(np.int64), cells - 1)
+    return ij[:, 0] * cells + ij[:, 1]
+
+
+def observed_summaries(telemetry: pd.DataFrame, graph: CompactGraph, ud_bin: np.ndarray,
+                       fatality_rate: Optional[float] = None, spatial=None) -> Dict[str, np.ndarray]:
+    """
+    Summaries of GPS tracks on the same supports as simulate_batch. Pass the model's
+    SpatialLayer when the graph is projected.
+    """
+    n_bins = int(ud_bin.max()) + 1
+    lonlat = telemetry[["lon", "lat"]].to_numpy(dtype=float)
+    xy = spatial.project(lonlat) if spatial is not None else lonlat
+    nodes = graph.nearest_node(xy)
+    ud = np.bincount(ud_bin[nodes], minlength=n_bins).astype(float)
+    height_col = "alt_agl" if "alt_agl" in telemetry.columns else "alt"
+    h = np.histogram(telemetry[height_col].to_numpy(dtype=float), bins=HEIGHT_BINS)[0].astype(float)
+
+    # Step lengths on the model's time scale: one fix per bird per model step (calendar
+    # month), snapped to its graph node, and moves between consecutive bird-months only
+    timestamp = pd.to_datetime(telemetry["timestamp"]).to_numpy()
+    bird = np.asarray(telemetry["harrier_id"], dtype=np.int64)
+    order = np.lexsort((timestamp, bird))
+    bird, nodes = bird[order], nodes[order]
+    period = timestamp[order].astype("datetime64[M]").astype(np.int64)
+    first = np.r_[True, (bird[1:] != bird[:-1]) | (period[1:] != period[:-1])]
+    bird, period, pos = bird[first], period[first], graph.km_scale * graph.pos[nodes[first]]
+    same = (bird[1:] == bird[:-1]) & (period[1:] == period[:-1] + 1)
+    step = np.sqrt(((pos[1:] - pos[:-1]) ** 2).sum(axis=1))[same]
+    out = {
+        "utilisation": ud / max(ud.sum(), 1.0),
+        "height": h / max(h.sum(), 1.0),
+        "step": np.array([step.mean(), step.std()]) if len(step) else np.zeros(2),
+    }
+    if fatality_rate is not None:
+        out["fatalities"] = np.array([fatality_rate])
+    return out
+
+
+def simulate_batch(graph: CompactGraph, params: Dict[str, np.ndarray], start_nodes: np.ndarray,
+                   breeding: np.ndarray, ud_bin: np.ndarray, n_steps: int = 24,
+                   exempt: Optional[np.ndarray] = None, start_month: int = 2,
+                   rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """
+    Run P particles (params: name -> (P,) array) x A agents for n_steps model steps.
+    Returns summary blocks, each shaped (P, k).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    P = len(next(iter(params.values()))); A = len(start_nodes)
+    p = {k: np.asarray(params.get(k, np.full(P, v)), dtype=float)[:, None] for k, v in DEFAULT_PARAMS.items()}
+    exempt = np.zeros(graph.n_nodes, dtype=bool) if exempt is None else exempt
+    n_bins = int(ud_bin.max()) + 1
+    row = np.repeat(np.arange(P), A).reshape(P, A)
+
+    node = np.tile(np.asarray(start_nodes, dtype=np.int64), (P, 1))
+    alive = np.ones((P, A), dtype=bool)
+    ud = np.zeros(P * n_bins); hist = np.zeros(P * (len(HEIGHT_BINS) - 1))
+    step_sum = np.zeros(P); step_sq = np.zeros(P); step_n = np.zeros(P)
+
+    for t in range(n_steps):
+        month = (start_month - 1 + t) % 12 + 1
+        # Flight profile
+        if month in BREEDING_MONTHS:
+            in_bsa = breeding[None, :] & (rng.random((P, A)) < p["bsa_fraction"])
+            height = np.where(in_bsa, rng.uniform(BSA_HEIGHT[0], BSA_HEIGHT[1], (P, A)), rng.uniform(0, 30, (P, A)))
+        elif month in MIGRATION_MONTHS:
+            height = rng.uniform(MIGRATION_HEIGHT[0], MIGRATION_HEIGHT[1], (P, A))
+        else:
+            height = rng.uniform(0, 30, (P, A))
+
+        # Move: sample proportional to base weights, then accept with the wake multiplier
+        # relative to the row's largest one (exact sampling from the product)
+        flat = node.ravel()
+        edge = graph.sample_edges(month, flat, rng.random(flat.size))
+        if np.any(p["wake_coeff"] > 0) and len(graph.turbine_positions):
+            coeff = np.broadcast_to(p["wake_coeff"], (P, A)).ravel()
+            row_max = np.clip(1.0 - coeff * graph.row_min_wake[flat], 0.1, 1.0)
+            pending = edge >= 0
+            for _ in range(32):
+                accept = np.clip(1.0 - coeff * graph.edge_wake[np.maximum(edge, 0)], 0.1, 1.0) / row_max
+                pending &= rng.random(flat.size) >= accept
+                if not pending.any():
+                    break
+                edge[pending] = graph.sample_edges(month, flat[pending], rng.random(int(pending.sum())))
+        edge = edge.reshape(P, A)
+        nxt = np.where(edge >= 0, graph.indices[np.maximum(edge, 0)], node)
+        blocked = (edge < 0) | (graph.turbine_distance[nxt] < p["displacement_radius"] * graph.unit_per_km) | ~alive
+        new = np.where(blocked, node, nxt)
+        step = np.sqrt(((graph.km_scale * (graph.pos[new] - graph.pos[node])) ** 2).sum(axis=2))
+        node = new
+
+        # Collision at the new position
+        in_band = ((month in BREEDING_MONTHS) & breeding[None, :] & (height >= BSA_HEIGHT[0]) & (height <= BSA_HEIGHT[1])) \
+            | ((month in MIGRATION_MONTHS) & (height >= MIGRATION_HEIGHT[0]) & (height <= MIGRATION_HEIGHT[1]))
+        exposed = alive & in_band & (graph.turbine_distance[node] < COLLISION_RADIUS * graph.unit_per_km) & ~exempt[node]
+        kill = (1.0 - p["avoidance_rate"]) * p["collision_prob"] * mitigation_multiplier(month)
+        alive_before = alive
+        alive = alive & ~(exposed & (rng.random((P, A)) < kill))
+
+        # Summaries over birds alive at the start of the step
+        r = row[alive_before]
+        ud += np.bincount(r * n_bins + ud_bin[node[alive_before]], minlength=P * n_bins)
+        hb = np.minimum(np.digitize(height[alive_before], HEIGHT_BINS) - 1, len(HEIGHT_BINS) - 2)
+        hist += np.bincount(r * (len(HEIGHT_BINS) - 1) + hb, minlength=hist.size)
+        step_sum += np.bincount(r, weights=step[alive_before], minlength=P)
+        step_sq += np.bincount(r, weights=step[alive_before] ** 2, minlength=P)
+        step_n += np.bincount(r, minlength=P)
+
+    ud = ud.reshape(P, n_bins); hist = hist.reshape(P, -1)
+    mean = step_sum / np.maximum(step_n, 1)
+    sd = np.sqrt(np.maximum(step_sq / np.maximum(step_n, 1) - mean ** 2, 0.0))
+    return {
+        "utilisation": ud / np.maximum(ud.sum(axis=1, keepdims=True), 1.0),
+        "height": hist / np.maximum(hist.sum(axis=1, keepdims=True), 1.0),
+        "step": np.column_stack([mean, sd]),
+        "fatalities": (1.0 - alive.mean(axis=1))[:, None],
+    }
+
+
+def _block_distances(sim: Dict[str, np.ndarray], obs: Dict[str, np.ndarray]) -> np.ndarray:
+    # (P, blocks): Euclidean distance per summary block
+    return np.column_stack([np.linalg.norm(sim[k] - obs[k][None, :], axis=1) for k in obs])
+
+
+def abc_smc(graph: CompactGraph, observed: Dict[str, np.ndarray], start_nodes: np.ndarray,
+            breeding: np.ndarray, ud_bin: np.ndarray, priors: Optional[Dict[str, Tuple[float, float]]] = None,
+            n_particles: int = 1000, n_generations: int = 5, quantile: float = 0.5,
+            batch_size: int = 1000, n_steps: int = 24, exempt: Optional[np.ndarray] = None,
+            max_simulations: int = 1_000_000, seed: int = 0) -> Dict[str, object]:
+    """
+    ABC-SMC (population Monte Carlo) with uniform priors and a Gaussian perturbation
+    kernel of twice the weighted particle covariance. Block distances are scaled by their
+    median absolute deviation under the prior; each generation's tolerance is the given
+    quantile of the previous generation's accepted distances.
+
+    max_simulations bounds the proposals of the whole run, including perturbed candidates
+    that fall outside the prior box and are never simulated.
+
+    Returns a dict with names, samples (n_particles, k), weights, distances, epsilons,
+    n_simulations and n_proposals.
+    """
+    rng = np.random.default_rng(seed)
+    priors = dict(DEFAULT_PRIORS if priors is None else priors)
+    names = list(priors)
+    lo = np.array([priors[k][0] for k in names]); hi = np.array([priors[k][1] for k in names])
+
+    def run(theta):
+        sim = simulate_batch(graph, {k: theta[:, i] for i, k in enumerate(names)},
+                             start_nodes, breeding, ud_bin, n_steps=n_steps, exempt=exempt, rng=rng)
+        return _block_distances(sim, observed)
+
+    # Generation 0: prior draws, which also fix the per-block scales
+    theta = lo + (hi - lo) * rng.random((n_particles, len(names)))
+    blocks = np.concatenate([run(theta[i:i + batch_size]) for i in range(0, n_particles, batch_size)])
+    scale = np.median(np.abs(blocks - np.median(blocks, axis=0)), axis=0)
+    scale = np.where(scale > 0, scale, 1.0)
+    dist = np.sqrt(((blocks / scale) ** 2).sum(axis=1))
+    weights = np.full(n_particles, 1.0 / n_particles)
+    epsilons = [np.inf]
+    n_sim = n_prop = n_particles
+
+    for _ in range(n_generations):
+        eps = float(np.quantile(dist, quantile))
+        cov = 2.0 * np.atleast_2d(np.cov(theta.T, aweights=weights))
+        chol = np.linalg.cholesky(cov + 1e-12 * np.eye(len(names)))
+        prec = np.linalg.inv(cov + 1e-12 * np.eye(len(names)))
+        acc_theta, acc_dist = [], []
+        n_acc = 0
+        while n_acc < n_particles and n_prop < max_simulations:
+            parent = rng.choice(n_particles, size=batch_size, p=weights)
+            cand = theta[parent] + rng.standard_normal((batch_size, len(names))) @ chol.T
+            n_prop += batch_size
+            cand = cand[np.all((cand >= lo) & (cand <= hi), axis=1)]
+            if not len(cand):
+                continue
+            d = np.sqrt(((run(cand) / scale) ** 2).sum(axis=1))
+            n_sim += len(cand)
+            keep = d <= eps
+            acc_theta.append(cand[keep]); acc_dist.append(d[keep]); n_acc += int(keep.sum())
+        if n_acc < n_particles:
+            break
+        new_theta = np.concatenate(acc_theta)[:n_particles]
+        new_dist = np.concatenate(acc_dist)[:n_particles]
+        # Uniform prior: weight = 1 / sum_j w_j K(theta | theta_j)
+        diff = new_theta[:, None, :] - theta[None, :, :]
+        kern = np.exp(-0.5 * np.einsum("ijk,kl,ijl->ij", diff, prec, diff))
+        w = 1.0 / np.maximum(kern @ weights, 1e-300)
+        theta, dist, weights = new_theta, new_dist, w / w.sum()
+        epsilons.append(eps)
+
+    return {
+        "names": names,
+        "samples": theta,
+        "weights": weights,
+        "distances": dist,
+        "epsilons": epsilons,
+        "n_simulations": n_sim,
+        "n_proposals": n_prop,
+    }
+
+
+def posterior_summary(result: Dict[str, object], quantiles: Sequence[float] = (0.05, 0.5, 0.95)) -> pd.DataFrame:
+    """Weighted mean and quantiles per calibrated parameter."""
+    samples, w = result["samples"], result["weights"]
+    rows = {}
+    for i, name in enumerate(result["names"]):
+        order = np.argsort(samples[:, i])
+        cdf = np.cumsum(w[order])
+        rows[name] = {"mean": float(np.sum(w * samples[:, i])),
+                      **{f"q{q:g}": float(samples[order[min(np.searchsorted(cdf, q), len(order) - 1)], i])
+                         for q in quantiles}}
+    return pd.DataFrame(rows).T
@@ -0,0 +1,168 @@
+"""
+Energy-aware curtailment schedules.
+
+A schedule stops turbine t in (month, hour) cells. Both sides of the trade are
+(n_turbines, 12, 24) cubes: energy_cube gives the MWh per year each turbine produces in
+each cell (weather wind speed at the turbine through TURBINE_POWER_CURVE, built once),
+risk_cube the expected fatalities per year from simulated collisions.
+
+CurtailmentOptimizer minimises lost MWh subject to residual fatalities <= cap. Cells are
+ranked once by fatalities avoided per MWh lost (the fractional-knapsack order, optimal
+for the relaxation) and their cumulative sums form the trade-off frontier, so a cap is
+answered by one searchsorted plus a single-cell repair of the last pick; operators can
+sweep caps interactively.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import TURBINE_POWER_CURVE
+
+_POWER_SPEEDS = np.array([s for s, _ in TURBINE_POWER_CURVE], dtype=np.float64)
+_POWER_OUTPUT = np.array([p for _, p in TURBINE_POWER_CURVE], dtype=np.float64)  # kW
+
+
+def energy_cube(wind_speed, turbine_lonlat, time_chunk: int = 744) -> np.ndarray:
+    """
+    (T, 12, 24) MWh per year from an xarray (time, lat, lon) wind_speed at each turbine's
+    nearest cell. Hourly records are assumed; multi-year records are averaged per year.
+    Reads are aligned to the store's time chunks, so each is decompressed once.
+    """
+    import xarray as xr
+    from data.weather_core import storage_chunks
+    turbine_lonlat = np.asarray(turbine_lonlat, dtype=np.float64).reshape(-1, 2)
+    n_t = len(turbine_lonlat)
+    at = wind_speed.sel(lon=xr.DataArray(turbine_lonlat[:, 0], dims="turbine"),
+                        lat=xr.DataArray(turbine_lonlat[:, 1], dims="turbine"), method="nearest")
+    times = pd.DatetimeIndex(at["time"].values)
+    cell = ((times.month - 1) * 24 + times.hour).to_numpy()
+    chunks = storage_chunks(wind_speed)
+    if chunks is not None:
+        time_chunk = -(-time_chunk // chunks[0]) * chunks[0]  # whole stored chunks per read
+    kwh = np.zeros(12 * 24 * n_t)
+    for t0 in range(0, len(times), time_chunk):
+        ws = np.asarray(at[t0:t0 + time_chunk].values, dtype=np.float64)  # (time, turbine)
+        power = np.interp(ws, _POWER_SPEEDS, _POWER_OUTPUT, left=0.0, right=0.0)
+        key = cell[t0:t0 + time_chunk, None] * n_t + np.arange(n_t)
+        kwh += np.bincount(key.ravel(), weights=power.ravel(), minlength=kwh.size)
+    years = max(len(np.unique(times.year)), 1)
+    return (kwh.reshape(12, 24, n_t).transpose(2, 0, 1) / 1000.0 / years)
+
+
+def risk_cube(turbine, month, hour, n_turbines: int, weight=None, years: float = 1.0) -> np.ndarray:
+    """
+    (T, 12, 24) expected fatalities per year from collision records (turbine index,
+    month 1-12, hour 0-23), e.g. model.collision_events or the results store's
+    curtailment table (weight = collisions), pooled over `years` simulated years.
+    """
+    turbine = np.asarray(turbine, dtype=np.int64)
+    key = (turbine * 12 + np.asarray(month, dtype=np.int64) - 1) * 24 + np.asarray(hour, dtype=np.int64)
+    counts = np.bincount(key, weights=None if weight is None else np.asarray(weight, dtype=np.float64),
+                         minlength=n_turbines * 12 * 24)
+    return counts.reshape(n_turbines, 12, 24) / float(years)
+
+
+def risk_cube_from_schedule(schedule: Dict[int, List[Tuple[int, int]]], n_turbines: int,
+                            years: float = 1.0) -> np.ndarray:
+    """Same as risk_cube from HarrierModel.curtailment_schedule ({turbine: [(month, hour), ...]})."""
+    rows = [(t, m, h) for t, cells in schedule.items() for m, h in cells]
+    t, m, h = (np.array(c, dtype=np.int64) for c in zip(*rows)) if rows else (np.empty(0, np.int64),) * 3
+    return risk_cube(t, m, h, n_turbines, years=years)
+
+
+class CurtailmentPlan:
+    def __init__(self, mask: np.ndarray, lost_mwh: float, residual: float, total_mwh: float, cap: float):
+        self.mask = mask  # (T, 12, 24) True where the turbine is stopped
+        self.lost_mwh = lost_mwh
+        self.residual = residual  # expected fatalities per year left after curtailment
+        self.total_mwh = total_mwh
+        self.cap = cap
+
+    @property
+    def feasible(self) -> bool:
+        return self.residual <= self.cap + 1e-9
+
+    @property
+    def lost_fraction(self) -> float:
+        return self.lost_mwh / self.total_mwh if self.total_mwh > 0 else 0.0
+
+    def schedule(self) -> Dict[int, List[Tuple[int, int]]]:
+        """{turbine: [(month, hour), ...]}, the layout of HarrierModel.curtailment_schedule."""
+        out: Dict[int, List[Tuple[int, int]]] = {t: [] for t in range(self.mask.shape[0])}
+        for t, m, h in zip(*np.nonzero(self.mask)):
+            out[int(t)].append((int(m) + 1, int(h)))
+        return out
+
+
+class CurtailmentOptimizer:
+    def __init__(self, energy: np.ndarray, risk: np.ndarray, effectiveness: float = 1.0):
+        """effectiveness is the share of a cell's fatalities a stop removes."""
+        self.energy = np.asarray(energy, dtype=np.float64)
+        self.risk = np.asarray(risk, dtype=np.float64)
+        if self.energy.shape != self.risk.shape:
+            raise ValueError(f"energy {self.energy.shape} and risk {self.risk.shape} cubes differ")
+        self.shape = self.energy.shape
+        self.total_mwh = float(self.energy.sum())
+        self.total_risk = float(self.risk.sum())
+
+        e = self.energy.ravel(); r = self.risk.ravel() * float(effectiveness)
+        cand = np.nonzero(r > 0)[0]
+        # Fatalities avoided per MWh lost, descending; free cells (no energy) first
+        ratio = np.divide(r[cand], e[cand], out=np.full(len(cand), np.inf), where=e[cand] > 0)
+        order = cand[np.lexsort((e[cand], -ratio))]
+        self._order = order
+        self._gain = r[order]
+        self._cost = e[order]
+        self._cum_gain = np.concatenate([[0.0], np.cumsum(self._gain)])
+        self._cum_cost = np.concatenate([[0.0], np.cumsum(self._cost)])
+
+    def for_cap(self, cap: float) -> CurtailmentPlan:
+        """Cheapest schedule found with residual fatalities <= cap (or all risk removed if unreachable)."""
+        need = self.total_risk - float(cap)
+        k = int(np.searchsorted(self._cum_gain, need - 1e-12, side="left"))
+        k = min(k, len(self._order))
+        picked = self._order[:k]
+        if 0 < k:
+            # Repair: the last greedy pick may be dearer than one later cell that closes the gap
+            gap = need - self._cum_gain[k - 1]
+            rest = np.arange(k, len(self._order))
+            fits = rest[self._gain[rest] >= gap - 1e-12]
+            if len(fits):
+                j = fits[np.argmin(self._cost[fits])]
+                if self._cost[j] < self._cost[k - 1]:
+                    picked = np.concatenate([self._order[:k - 1], [self._order[j]]])
+        rank = np.empty(self.energy.size, dtype=np.int64)
+        rank[self._order] = np.arange(len(self._order))
+        pos = rank[picked]
+        # Prune: drop the dearest picks the overshoot alone can cover
+        slack = self._gain[pos].sum() - need
+        keep = np.ones(len(pos), dtype=bool)
+        for i in np.argsort(-self._cost[pos]):
+            if self._gain[pos[i]] <= slack + 1e-12 and self._cost[pos[i]] > 0:
+                keep[i] = False
+                slack -= self._gain[pos[i]]
+        pos = pos[keep]
+        mask = np.zeros(self.energy.size, dtype=bool)
+        mask[self._order[pos]] = True
+        return CurtailmentPlan(mask.reshape(self.shape), float(self._cost[pos].sum()),
+                               self.total_risk - float(self._gain[pos].sum()), self.total_mwh, float(cap))
+
+    def lower_bound(self, cap: float) -> float:
+        """MWh lost by the fractional relaxation; no schedule meeting cap loses less."""
+        need = self.total_risk - float(cap)
+        k = int(np.searchsorted(self._cum_gain, need, side="left"))
+        if k == 0 or k > len(self._order):
+            return float(self._cum_cost[min(k, len(self._order))])
+        frac = (need - self._cum_gain[k - 1]) / self._gain[k - 1]
+        return float(self._cum_cost[k - 1] + frac * self._cost[k - 1])
+
+    def tradeoff(self, n_points: Optional[int] = 50) -> pd.DataFrame:
+        """Frontier of greedy prefixes: residual fatalities per year against MWh lost."""
+        idx = np.arange(len(self._cum_gain))
+        if n_points is not None and len(idx) > n_points:
+            idx = np.unique(np.linspace(0, len(idx) - 1, n_points).round().astype(np.int64))
+        lost = self._cum_cost[idx]
+        return pd.DataFrame({"cells": idx, "residual_fatalities": self.total_risk - self._cum_gain[idx],
+                             "lost_mwh": lost,
+                             "lost_fraction": lost / self.total_mwh if self.total_mwh > 0 else 0.0})
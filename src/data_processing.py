@@ -1,11 +1,15 @@
-import geopandas as gpd
+import os
 import pandas as pd
 import numpy as np
 import networkx as nx
-from shapely.geometry import Point as ShapelyPoint
-from sklearn.cluster import DBSCAN
-import xarray as xr
-from src.config import FORAGING_RANGE, NON_BREEDING_RANGE, BREEDING_MONTHS, MIGRATION_MONTHS, WIND_THRESHOLD
+from scipy.spatial import cKDTree
+from src.config import (DEM_RESOLUTION_M, FORAGING_RANGE, NON_BREEDING_RANGE, BREEDING_MONTHS, MIGRATION_MONTHS,
+                        WIND_THRESHOLD)
+from src.dem_sampler import DemSampler
+from src.spatial import SpatialLayer
+from src.telemetry import MAX_SPEED, TRACK_COLUMNS, read_telemetry
+from src.waypoints import (cluster_waypoints, consecutive_transitions, nearest_waypoint,
+                           transition_counts, transition_probs_dict)
 
 class Point:
     def __init__(self, x, y):
@@ -20,70 +24,110 @@ class Point:
         return ShapelyPoint(self.x, self.y).within(geometry)
 
 def process_gps_data(gps_file):
-    gps = pd.read_csv(gps_file)
-    gps = gps[gps['speed'] < 20]
-    coords = gps[['lat', 'lon']].values
-    db = DBSCAN(eps=0.05, min_samples=5).fit(coords)  # Increased eps to 0.05
-    gps['cluster'] = db.labels_
-    waypoints = []
-    for cluster in set(db.labels_):
-        if cluster != -1:
-            cluster_points = coords[db.labels_ == cluster]
-            centroid = cluster_points.mean(axis=0)
-            waypoints.append(Point(centroid[1], centroid[0]))
+    """gps_file is a CSV/Parquet path or telemetry already loaded with read_telemetry."""
+    if isinstance(gps_file, pd.DataFrame):
+        gps = gps_file
+        if 'speed' in gps.columns:
+            gps = gps[gps['speed'] < MAX_SPEED]
+    else:
+        gps = read_telemetry(gps_file, columns=TRACK_COLUMNS)
+    gps = gps.copy()
+    lat = gps['lat'].to_numpy(dtype=np.float64); lon = gps['lon'].to_numpy(dtype=np.float64)
+    centroids, gps['cluster'] = cluster_waypoints(lat, lon)
+    waypoints = [Point(c_lon, c_lat) for c_lat, c_lon in centroids]
     if not waypoints:  # Fallback: add a single waypoint if clustering fails
         waypoints.append(Point(gps['lon'].mean(), gps['lat'].mean()))
-    agents = gps.groupby('harrier_id').first().reset_index()
-    agents['initial_pos'] = [Point(row['lon'], row['lat']) for _, row in agents.iterrows()]
-    transition_probs = {}
-    for month in range(1, 13):
-        month_data = gps[gps['timestamp'].str.contains(f'-{month:02d}-')]
-        for _, row in month_data.iterrows():
-            start = min(waypoints, key=lambda p: Point(row['lon'], row['lat']).distance(p))
-            end = min(waypoints, key=lambda p: Point(row['lon'], row['lat']).distance(p))
-            transition_probs[(month, waypoints.index(start), waypoints.index(end))] = \
-                transition_probs.get((month, waypoints.index(start), waypoints.index(end)), 0) + 1
-        for i in range(len(waypoints)):
-            total = sum(transition_probs.get((month, i, j), 0) for j in range(len(waypoints)))
-            if total > 0:
-                for j in range(len(waypoints)):
-                    transition_probs[(month, i, j)] = transition_probs.get((month, i, j), 0) / total
+    agents = gps.groupby('harrier_id', observed=True).first().reset_index()
+    agents['initial_pos'] = [Point(x, y) for x, y in zip(agents['lon'], agents['lat'])]
+    # Transitions between the waypoints of consecutive fixes of each bird
+    spatial = SpatialLayer.for_lonlat(lon, lat)
+    nearest = nearest_waypoint(spatial.project([(p.x, p.y) for p in waypoints]), *spatial.to_xy(lon, lat))
+    month, start, end = consecutive_transitions(np.asarray(gps['harrier_id'], dtype=np.int64),
+                                                gps['timestamp'].to_numpy(), nearest)
+    counts = transition_counts(month, start, end, len(waypoints))
+    transition_probs = transition_probs_dict(counts)
     return waypoints, agents, transition_probs
 
-def process_lidar_data(lidar_file):
+def process_lidar_data(lidar_file, min_slope=5.0, resolution_m=DEM_RESOLUTION_M):
+    """
+    Graph node candidates: DEM pixels steeper than min_slope, as a DataFrame of
+    lon, lat, elevation, slope indexed by flat pixel index (row * width + col).
+    GeoTIFF is the canonical DEM format and is masked directly on the raster, read
+    decimated to resolution_m when it is finer (None reads full resolution);
+    GeoJSON point files are still accepted as an import format.
+    """
+    if os.path.splitext(lidar_file)[1].lower() in (".tif", ".tiff"):
+        dem = DemSampler.from_path(lidar_file, resolution_m)
+        rows, cols = np.nonzero(dem.slope > min_slope)
+        lon, lat = dem.pixel_lonlat(rows, cols)
+        return pd.DataFrame({'lon': lon, 'lat': lat,
+                             'elevation': dem.elevation[rows, cols].astype(float),
+                             'slope': dem.slope[rows, cols].astype(float)},
+                            index=rows * dem.elevation.shape[1] + cols)
+    import geopandas as gpd
     dem = gpd.read_file(lidar_file).to_crs("EPSG:4326")
-    nodes = dem[dem['slope'] > 5][['geometry', 'elevation', 'slope']]
-    return nodes
+    nodes = dem[dem['slope'] > min_slope]
+    return pd.DataFrame({'lon': nodes.geometry.x, 'lat': nodes.geometry.y,
+                         'elevation': nodes['elevation'], 'slope': nodes['slope']}, index=nodes.index)
 
 def process_weather_data(weather_file):
-    weather = xr.open_dataset(weather_file)
+    from data.weather_core import open_weather  # deferred: pulls in xarray
+    weather = open_weather(weather_file, access="spatial")
     weather['thermal'] = weather['wind_speed'] * 1000 / weather['pressure']
     weather['turbine_active'] = weather['wind_speed'] > WIND_THRESHOLD
     return weather
 
 def process_turbine_data(turbine_file):
+    import geopandas as gpd
     turbines = gpd.read_file(turbine_file).to_crs("EPSG:4326")
     turbines['collision_zone'] = turbines.apply(
         lambda row: row['geometry'].buffer(row['blade_radius'] + 50/111000), axis=1)
+    # Same zone as a metric radius: blade radius (stored in degrees) plus 50 m
+    turbines['zone_radius_m'] = (turbines['blade_radius'] + 50/111000) * 111000
     return turbines
 
-def build_graph(waypoints, nodes, turbines, weather):
+def build_graph(waypoints, nodes, turbines, weather, spatial=None):
+    """
+    Movement graph with node 'pos' in metres (spatial: SpatialLayer, chosen from the
+    nodes when not given) and 'lonlat' kept for reference. Waypoints link within
+    FORAGING_RANGE, other pairs within NON_BREEDING_RANGE (km); edge weight is metres.
+    A node's turbine_risk is 0.15 per turbine whose collision zone contains it.
+    """
+    lonlat = np.array([(p.x, p.y) for p in waypoints] + list(zip(nodes['lon'].values, nodes['lat'].values)),
+                      dtype=float).reshape(-1, 2)
+    if spatial is None:
+        spatial = SpatialLayer.for_lonlat(lonlat[:, 0], lonlat[:, 1])
+    xy = spatial.project(lonlat)
+    ids = np.concatenate([np.arange(len(waypoints)), len(waypoints) + np.asarray(nodes.index, dtype=np.int64)])
+    elevation = np.concatenate([np.full(len(waypoints), np.nan), nodes['elevation'].to_numpy(dtype=float)])
+
     G = nx.Graph()
-    for i, point in enumerate(waypoints):
-        G.add_node(i, pos=(point.x, point.y))
-    for i, row in nodes.iterrows():
-        G.add_node(len(waypoints) + i, pos=(row['geometry'].x, row['geometry'].y), elevation=row['elevation'])
-    for i in G.nodes:
-        for j in G.nodes:
-            if i < j:
-                dist = Point(G.nodes[i]['pos'][0], G.nodes[i]['pos'][1]).distance(
-                    Point(G.nodes[j]['pos'][0], G.nodes[j]['pos'][1]))
-                if dist < (FORAGING_RANGE if i < len(waypoints) else NON_BREEDING_RANGE):
-                    turbine_risk = 0
-                    for _, turbine in turbines.iterrows():
-                        if turbine['geometry'].distance(ShapelyPoint(G.nodes[i]['pos'])) < turbine['collision_zone'].area:
-                            turbine_risk += 0.15
-                    thermal = weather['thermal'].mean().item()
-                    G.add_edge(i, j, weight=dist, turbine_risk=turbine_risk, thermal=thermal,
-                               turbine_active=weather['turbine_active'].mean().item() > 0.5)
-    return G
\ No newline at end of file
+    G.graph['crs'] = spatial.crs
+    for k in range(len(ids)):
+        attrs = dict(pos=(xy[k, 0], xy[k, 1]), lonlat=(lonlat[k, 0], lonlat[k, 1]))
+        if k >= len(waypoints):
+            attrs['elevation'] = elevation[k]
+        G.add_node(int(ids[k]), **attrs)
+    if len(ids) < 2:
+        return G
+
+    risk = np.zeros(len(ids))
+    if len(turbines):
+        t_xy = spatial.project(np.column_stack([turbines.geometry.x, turbines.geometry.y]))
+        radius = turbines['zone_radius_m'].to_numpy(dtype=float)
+        pairs = cKDTree(t_xy).sparse_distance_matrix(cKDTree(xy), radius.max(), output_type='coo_matrix')
+        hit = pairs.data < radius[pairs.row]
+        np.add.at(risk, pairs.col[hit], 0.15)
+
+    thermal = weather['thermal'].mean().item()
+    turbine_active = weather['turbine_active'].mean().item() > 0.5
+    pairs = cKDTree(xy).query_pairs(max(FORAGING_RANGE, NON_BREEDING_RANGE) * 1000.0, output_type='ndarray')
+    i, j = pairs.min(axis=1), pairs.max(axis=1)
+    dist = np.sqrt(((xy[i] - xy[j]) ** 2).sum(axis=1))
+    limit = np.where(i < len(waypoints), FORAGING_RANGE, NON_BREEDING_RANGE) * 1000.0
+    keep = dist < limit
+    G.add_edges_from(
+        (int(ids[a]), int(ids[b]), dict(weight=float(d), turbine_risk=float(risk[a]), thermal=thermal,
+                                        turbine_active=turbine_active))
+        for a, b, d in zip(i[keep], j[keep], dist[keep]))
+    return G
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from affine import Affine
+
+from src.spatial import transformer as _transformer
+
+
+def read_dem_bands(path: str, resolution_m: Optional[float] = None):
+    """
+    Read a DEM GeoTIFF as (elevation, slope, transform, crs_wkt).
+    With resolution_m coarser than the native pixel size (in metres, also for geographic
+    DEMs), bands are read decimated (average resampling), which GDAL serves from overviews
+    when the file has them, so large rasters are never loaded at full resolution.
+    Slope is computed from elevation when band 2 is missing.
+    """
+    import rasterio
+    from rasterio.enums import Resampling
+    with rasterio.open(path) as src:
+        h, w = src.height, src.width
+        out_h, out_w = h, w
+        px_x, px_y = _pixel_size_m(src.transform, src.crs.to_wkt() if src.crs else None, h)
+        if resolution_m and resolution_m > px_x:
+            out_w = max(1, int(round(w * px_x / resolution_m)))
+        if resolution_m and resolution_m > px_y:
+            out_h = max(1, int(round(h * px_y / resolution_m)))
+        transform = src.transform * Affine.scale(w / out_w, h / out_h)
+        read = dict(out_shape=(out_h, out_w), resampling=Resampling.average)
+        elev = src.read(1, **read).astype(np.float32)
+        if src.count >= 2:
+            slope = src.read(2, **read).astype(np.float32)
+        else:
+            dx, dy = px_x * w / out_w, px_y * h / out_h
+            gy, gx = np.gradient(elev.astype(np.float64), dy, dx)
+            slope = np.degrees(np.arctan(np.sqrt(gx * gx + gy * gy))).astype(np.float32)
+        crs = src.crs.to_wkt() if src.crs else None
+    return elev, slope, transform, crs
+
+
+class DemSampler:
+    """
+    Batched elevation (m) / slope (deg) lookups on a gridded DEM.
+
+    The grid is held in its native CRS with an affine transform; lon/lat queries are
+    projected with a cached pyproj transformer. mode="nearest" takes the containing
+    pixel, mode="bilinear" interpolates between pixel centres. Points outside the
+    grid return NaN.
+    """
+
+    def __init__(self, elevation: np.ndarray, slope: np.ndarray, transform: Affine, crs: Optional[str] = None):
+        self.elevation = np.asarray(elevation, dtype=np.float32)
+        self.slope = np.asarray(slope, dtype=np.float32)
+        self.transform = transform
+        self.crs = crs
+        self._inverse = ~transform
+        self._geographic = crs is None or _is_geographic(crs)
+
+    @classmethod
+    def from_path(cls, dem_path: str, resolution_m: Optional[float] = None) -> "DemSampler":
+        ext = os.path.splitext(dem_path)[1].lower()
+        if ext in (".tif", ".tiff"):
+            return cls(*read_dem_bands(dem_path, resolution_m))
+        return cls._from_geojson(dem_path)
+
+    @classmethod
+    def _from_geojson(cls, path: str) -> "DemSampler":
+        # Square grid of points with 'elevation' and 'slope'; snapped to regular lat/lon axes
+        import geopandas as gpd
+        dem = gpd.read_file(path)
+        lon = dem.geometry.x.to_numpy(dtype=np.float64)
+        lat = dem.geometry.y.to_numpy(dtype=np.float64)
+        n = int(np.sqrt(len(lat)))
+        if n * n != len(lat):
+            raise ValueError("GeoJSON DEM must be a square grid of points.")
+        lat_grid = lat.reshape((n, n)); lon_grid = lon.reshape((n, n))
+        elev = dem["elevation"].to_numpy(dtype=np.float32).reshape((n, n))
+        slope = dem["slope"].to_numpy(dtype=np.float32).reshape((n, n))
+        # Row 0 must be the northern edge for a north-up transform
+        if lat_grid[0, 0] < lat_grid[-1, 0]:
+            lat_grid = lat_grid[::-1]; lon_grid = lon_grid[::-1]; elev = elev[::-1]; slope = slope[::-1]
+        if lon_grid[0, 0] > lon_grid[0, -1]:
+            lat_grid = lat_grid[:, ::-1]; lon_grid = lon_grid[:, ::-1]; elev = elev[:, ::-1]; slope = slope[:, ::-1]
+        dlat = (lat_grid[0, 0] - lat_grid[-1, 0]) / max(n - 1, 1)
+        dlon = (lon_grid[0, -1] - lon_grid[0, 0]) / max(n - 1, 1)
+        transform = Affine(dlon, 0.0, lon_grid[0, 0] - dlon / 2, 0.0, -dlat, lat_grid[0, 0] + dlat / 2)
+        return cls(np.ascontiguousarray(elev), np.ascontiguousarray(slope), transform, "EPSG:4326")
+
+    # ---------------------
+    # Queries
+    # ---------------------
+    def pixel_lonlat(self, rows, cols) -> Tuple[np.ndarray, np.ndarray]:
+        """WGS84 lon/lat of pixel centres, for arrays of row/col indices."""
+        x, y = self.transform * (np.asarray(cols, dtype=np.float64) + 0.5, np.asarray(rows, dtype=np.float64) + 0.5)
+        if self._geographic:
+            return np.asarray(x), np.asarray(y)
+        lon, lat = _transformer(self.crs, "EPSG:4326").transform(x, y)
+        return np.asarray(lon), np.asarray(lat)
+
+    def to_dem_xy(self, lon, lat) -> Tuple[np.ndarray, np.ndarray]:
+        lon = np.asarray(lon, dtype=np.float64); lat = np.asarray(lat, dtype=np.float64)
+        if self._geographic:
+            return lon, lat
+        x, y = _transformer("EPSG:4326", self.crs).transform(lon, lat)
+        return np.asarray(x), np.asarray(y)
+
+    def sample(self, lon, lat, mode: str = "nearest") -> Tuple[np.ndarray, np.ndarray]:
+        """Elevation and slope at arrays of lon/lat (WGS84)."""
+        x, y = self.to_dem_xy(lon, lat)
+        return self.sample_xy(x, y, mode)
+
+    def sample_xy(self, x, y, mode: str = "nearest") -> Tuple[np.ndarray, np.ndarray]:
+        """Elevation and slope at arrays of coordinates already in the DEM's CRS."""
+        x = np.asarray(x, dtype=np.float64); y = np.asarray(y, dtype=np.float64)
+        col, row = self._inverse * (x, y)
+        col = np.asarray(col, dtype=np.float64); row = np.asarray(row, dtype=np.float64)
+        h, w = self.elevation.shape
+        inside = (col >= 0) & (col < w) & (row >= 0) & (row < h)
+        if mode == "nearest":
+            r = np.clip(np.floor(row).astype(np.int64), 0, h - 1)
+            c = np.clip(np.floor(col).astype(np.int64), 0, w - 1)
+            elev = self.elevation[r, c].astype(np.float64)
+            slope = self.slope[r, c].astype(np.float64)
+        elif mode == "bilinear":
+            elev = self._bilinear(self.elevation, row - 0.5, col - 0.5)
+            slope = self._bilinear(self.slope, row - 0.5, col - 0.5)
+        else:
+            raise ValueError(f"Unknown sampling mode: {mode!r}")
+        elev = np.where(inside, elev, np.nan)
+        slope = np.where(inside, slope, np.nan)
+        return elev, slope
+
+    @staticmethod
+    def _bilinear(grid: np.ndarray, rf: np.ndarray, cf: np.ndarray) -> np.ndarray:
+        h, w = grid.shape
+        rf = np.clip(rf, 0.0, h - 1.0); cf = np.clip(cf, 0.0, w - 1.0)
+        r0 = np.minimum(np.floor(rf).astype(np.int64), max(h - 2, 0))
+        c0 = np.minimum(np.floor(cf).astype(np.int64), max(w - 2, 0))
+        r1 = np.minimum(r0 + 1, h - 1); c1 = np.minimum(c0 + 1, w - 1)
+        tr = rf - r0; tc = cf - c0
+        top = grid[r0, c0] * (1.0 - tc) + grid[r0, c1] * tc
+        bottom = grid[r1, c0] * (1.0 - tc) + grid[r1, c1] * tc
+        return top * (1.0 - tr) + bottom * tr
+
+
+def _pixel_size_m(transform: Affine, crs: Optional[str], height: int) -> Tuple[float, float]:
+    """Pixel width and height in metres; degrees are scaled at the raster's central latitude."""
+    px_x, px_y = abs(transform.a), abs(transform.e)
+    if crs is None or not _is_geographic(crs):
+        return px_x, px_y
+    lat = transform.f + transform.e * height / 2.0
+    return px_x * 111320.0 * np.cos(np.radians(lat)), px_y * 110540.0
+
+
+def _is_geographic(crs: str) -> bool:
+    from pyproj import CRS
+    return CRS.from_user_input(crs).is_geographic
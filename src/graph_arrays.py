@@ -0,0 +1,138 @@
+"""
+Array (CSR) form of the movement graph for batched simulation.
+
+CompactGraph is built once from HarrierModel's networkx graph. Nodes are renumbered
+0..N-1 (node_ids maps back) and every undirected edge is stored in both directions.
+Move weights follow HarrierAgent.move: transition prob (per month, default 1/degree)
+x thermal / (1 + risk), with the wake multiplier applied separately because it depends on
+per-particle parameters. Per-month cumulative weights let any number of walkers pick a
+neighbour with one searchsorted.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class CompactGraph:
+    def __init__(self, pos: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 weights: np.ndarray, node_ids: Optional[np.ndarray] = None,
+                 elevation: Optional[np.ndarray] = None,
+                 turbine_positions: Optional[np.ndarray] = None, wake_decay: float = 2.0,
+                 geographic: bool = True):
+        self.pos = np.asarray(pos, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)  # (12, E) month x directed edge
+        self.n_nodes = len(self.pos)
+        self.node_ids = np.arange(self.n_nodes) if node_ids is None else np.asarray(node_ids)
+        self.elevation = np.zeros(self.n_nodes) if elevation is None else np.asarray(elevation, dtype=np.float64)
+        # Multiplier taking position differences to km (lon/lat degrees or metres)
+        lat0 = np.deg2rad(self.pos[:, 1].mean()) if geographic and self.n_nodes else 0.0
+        self.km_scale = np.array([111.32 * np.cos(lat0), 110.57]) if geographic else np.array([1e-3, 1e-3])
+        self.unit_per_km = 1.0 / float(self.km_scale.mean())
+        self.degree = np.diff(self.indptr)
+        self.edge_source = np.repeat(np.arange(self.n_nodes), self.degree)
+
+        # Row-local cumulative weights offset by a running total, so a global searchsorted
+        # over one month's array lands inside the walker's row
+        self._cum = np.cumsum(self.weights, axis=1)
+        if len(self.indices):
+            start = self.indptr[:-1]
+            end = np.maximum(self.indptr[1:] - 1, 0)
+            self._row_lo = np.where(start > 0, self._cum[:, np.maximum(start - 1, 0)], 0.0)
+            self._row_total = np.where(self.degree > 0, self._cum[:, end] - self._row_lo, 0.0)
+        else:
+            self._row_lo = np.zeros((12, self.n_nodes))
+            self._row_total = np.zeros((12, self.n_nodes))
+
+        # Turbine geometry for displacement, collision proximity and wake
+        self.turbine_positions = np.empty((0, 2)) if turbine_positions is None else np.asarray(turbine_positions, dtype=np.float64)
+        self.wake_decay = float(wake_decay)
+        if len(self.turbine_positions):
+            self.turbine_distance, _ = cKDTree(self.turbine_positions).query(self.pos)
+            # Sum over turbines of exp(-d / decay) at each edge midpoint (Model._wake_multiplier)
+            self.edge_wake = np.empty(len(self.indices))
+            for lo in range(0, len(self.indices), 65536):
+                hi = min(lo + 65536, len(self.indices))
+                mid = 0.5 * (self.pos[self.edge_source[lo:hi]] + self.pos[self.indices[lo:hi]])
+                d = np.sqrt(((mid[:, None, :] - self.turbine_positions[None, :, :]) ** 2).sum(axis=2))
+                self.edge_wake[lo:hi] = np.exp(-d / max(self.wake_decay, 1e-6)).sum(axis=1)
+        else:
+            self.turbine_distance = np.full(self.n_nodes, np.inf)
+            self.edge_wake = np.zeros(len(self.indices))
+        # Smallest wake sum in each row bounds the row's largest multiplier (rejection sampling)
+        self.row_min_wake = np.zeros(self.n_nodes)
+        if len(self.indices):
+            has = self.degree > 0
+            self.row_min_wake[has] = np.minimum.reduceat(self.edge_wake, self.indptr[:-1][has])
+
+    @classmethod
+    def from_graph(cls, G, transition_probs: Optional[Dict[Tuple[int, int, int], float]] = None,
+                   turbine_positions: Optional[np.ndarray] = None, wake_decay: float = 2.0,
+                   geographic: Optional[bool] = None) -> "CompactGraph":
+        """
+        geographic defaults to False for graphs from build_graph (projected, metres; they
+        carry a 'crs' graph attribute) and True otherwise (lon/lat degrees).
+        """
+        if geographic is None:
+            geographic = "crs" not in G.graph
+        node_ids = np.array(list(G.nodes))
+        index = {n: i for i, n in enumerate(node_ids)}
+        pos = np.array([G.nodes[n]["pos"] for n in node_ids], dtype=np.float64).reshape(-1, 2)
+        elevation = np.array([G.nodes[n].get("elevation", 0.0) for n in node_ids], dtype=np.float64)
+
+        rows, cols, base = [], [], []
+        for u, v, data in G.edges(data=True):
+            risk = data.get("turbine_risk", 0.0) if data.get("turbine_active", False) else 0.0
+            w = data.get("thermal", 1.0) / (1.0 + risk)
+            rows += [index[u], index[v]]; cols += [index[v], index[u]]; base += [w, w]
+        rows = np.array(rows, dtype=np.int64); cols = np.array(cols, dtype=np.int64)
+        base = np.array(base, dtype=np.float64)
+        order = np.lexsort((cols, rows))
+        rows, cols, base = rows[order], cols[order], base[order]
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.add.at(indptr, rows + 1, 1)
+        indptr = np.cumsum(indptr)
+
+        degree = np.diff(indptr)
+        prob = np.tile(1.0 / np.maximum(degree[rows], 1), (12, 1))
+        for (month, i, j), p in (transition_probs or {}).items():
+            if i not in index or j not in index:
+                continue
+            r, c = index[i], index[j]
+            k = indptr[r] + np.searchsorted(cols[indptr[r]:indptr[r + 1]], c)
+            if k < indptr[r + 1] and cols[k] == c:
+                prob[month - 1, k] = p
+        return cls(pos, indptr, cols, prob * base[None, :], node_ids=node_ids, elevation=elevation,
+                   turbine_positions=turbine_positions, wake_decay=wake_decay, geographic=geographic)
+
+    @classmethod
+    def from_model(cls, model) -> "CompactGraph":
+        # Model wake decay is in km; the graph is in metres
+        return cls.from_graph(model.graph, model.transition_probs, model._turbine_positions,
+                              model.wake_decay * 1000.0, geographic=False)
+
+    def nearest_node(self, points: np.ndarray) -> np.ndarray:
+        _, idx = cKDTree(self.pos).query(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        return idx.astype(np.int64)
+
+    def sample_edges(self, month: int, nodes: np.ndarray, u: np.ndarray) -> np.ndarray:
+        """
+        Directed edge index chosen for walkers at `nodes` with uniforms u in [0, 1),
+        proportional to the month's weights; -1 where the node has no neighbours.
+        """
+        m = month - 1
+        total = self._row_total[m, nodes]
+        target = self._row_lo[m, nodes] + u * total
+        e = np.searchsorted(self._cum[m], target, side="right")
+        e = np.clip(e, self.indptr[nodes], np.maximum(self.indptr[nodes + 1] - 1, self.indptr[nodes]))
+        return np.where(total > 0, e, -1)
+
+    def within(self, points: np.ndarray, radius: float) -> np.ndarray:
+        """Bool per node: within radius of any of points (same units as pos)."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if not len(points):
+            return np.zeros(self.n_nodes, dtype=bool)
+        d, _ = cKDTree(points).query(self.pos)
+        return d < radius
@@ -0,0 +1,112 @@
+"""
+Two-level movement graph for long-range moves.
+
+The fine graph from build_graph links DEM nodes within the foraging / non-breeding
+range, so its degree grows with DEM resolution. CoarseGraph bins the fine nodes into
+square super-node cells (metres) and aggregates, per month, the weights of every fine
+edge crossing between two cells (transition prob x thermal / (1 + turbine risk), as in
+CompactGraph), giving a graph whose size depends on the cell size, not the DEM. The
+fine edges are read in one pass and never expanded per month: the default 1/degree
+weight is aggregated once and the explicit transition probabilities are applied as
+sparse per-month corrections, so graphs with 10^7 edges coarsen in bounded memory.
+
+Each cell is represented by its member node nearest the cell centroid, so a coarse move
+lands on a real fine node. A cell is flagged near_turbine when any member node lies
+within the influence distance of a turbine; agents move at the coarse level only from
+cells that are not flagged and descend to the fine graph inside turbine influence zones.
+"""
+import numpy as np
+
+from src.config import COLLISION_RADIUS, DISPLACEMENT_RADIUS, NON_BREEDING_RANGE
+from src.graph_arrays import CompactGraph
+from src.spatial import KM, SpatialLayer
+
+# Default influence zone: collision and displacement checks plus one step of slack
+DEFAULT_INFLUENCE_M = 2.0 * max(COLLISION_RADIUS, DISPLACEMENT_RADIUS) * KM
+
+
+class CoarseGraph:
+    def __init__(self, G, transition_probs=None, turbine_positions=None,
+                 cell_m: float = NON_BREEDING_RANGE * KM / 4.0, influence_m: float = DEFAULT_INFLUENCE_M):
+        """G is a build_graph graph (node 'pos' in metres); rows follow list(G.nodes)."""
+        if cell_m <= 0:
+            raise ValueError("cell_m must be positive")
+        self.cell_m = float(cell_m)
+        self.influence_m = float(influence_m)
+        node_ids = np.array(list(G.nodes))
+        index = {n: i for i, n in enumerate(node_ids)}
+        pos = np.array([G.nodes[n]["pos"] for n in node_ids], dtype=np.float64).reshape(-1, 2)
+        degree = np.array([G.degree[n] for n in node_ids], dtype=np.float64)
+
+        ij = np.floor((pos - pos.min(axis=0)) / self.cell_m).astype(np.int64) if len(pos) else np.zeros((0, 2), np.int64)
+        key = ij[:, 0] * (int(ij[:, 1].max()) + 1 if len(ij) else 1) + ij[:, 1]
+        _, cell_of = np.unique(key, return_inverse=True)
+        self.cell_of = cell_of.ravel().astype(np.int64)  # fine row -> cell
+        n_cells = int(self.cell_of.max()) + 1 if len(self.cell_of) else 0
+        self.n_cells = n_cells
+
+        # Representative node: member nearest the cell centroid
+        size = np.bincount(self.cell_of, minlength=n_cells)
+        centroid = np.column_stack([np.bincount(self.cell_of, weights=pos[:, k], minlength=n_cells)
+                                    for k in range(2)]) / np.maximum(size, 1)[:, None]
+        d2 = ((pos - centroid[self.cell_of]) ** 2).sum(axis=1)
+        order = np.lexsort((d2, self.cell_of))
+        first = np.r_[True, self.cell_of[order][1:] != self.cell_of[order][:-1]] if len(order) else np.zeros(0, bool)
+        self.rep = order[first]  # cell -> fine row
+
+        # One pass over the fine edges: (u, v, thermal / (1 + risk)) as in CompactGraph.from_graph
+        def base(d):
+            risk = d.get("turbine_risk", 0.0) if d.get("turbine_active", False) else 0.0
+            return d.get("thermal", 1.0) / (1.0 + risk)
+        flat = np.fromiter((x for u, v, d in G.edges(data=True) for x in (index[u], index[v], base(d))),
+                           dtype=np.float64, count=3 * G.number_of_edges()).reshape(-1, 3)
+        u = flat[:, 0].astype(np.int64); v = flat[:, 1].astype(np.int64); w = flat[:, 2]
+        del flat
+        cross = self.cell_of[u] != self.cell_of[v]
+        u, v, w = u[cross], v[cross], w[cross]
+        # Both directions; month-independent default prob 1/degree of the source
+        src = np.concatenate([u, v]); dst = np.concatenate([v, u]); w = np.concatenate([w, w])
+        pair = self.cell_of[src] * n_cells + self.cell_of[dst]
+        upair, inverse = np.unique(pair, return_inverse=True)
+        default = np.bincount(inverse.ravel(), weights=w / degree[src], minlength=len(upair))
+        weights = np.tile(default.astype(np.float64), (12, 1))  # bincount of nothing is int64
+        del src, dst, w, pair, inverse
+
+        # Explicit transition probabilities replace 1/degree on their edges
+        for (month, i, j), p in (transition_probs or {}).items():
+            if i not in index or j not in index or not G.has_edge(i, j):
+                continue
+            r, c = index[i], index[j]
+            if self.cell_of[r] == self.cell_of[c]:
+                continue
+            k = np.searchsorted(upair, self.cell_of[r] * n_cells + self.cell_of[c])
+            weights[month - 1, k] += (p - 1.0 / degree[r]) * base(G[i][j])
+        np.maximum(weights, 0.0, out=weights)
+
+        rows = upair // max(n_cells, 1)
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_cells))]).astype(np.int64)
+        self.graph = CompactGraph(pos[self.rep], indptr, upair % max(n_cells, 1), weights,
+                                  node_ids=node_ids[self.rep], geographic=False)
+
+        # Turbine exposure per cell: nearest turbine to any member
+        node_distance = np.full(len(pos), np.inf)
+        tree = SpatialLayer.kdtree(turbine_positions if turbine_positions is not None else np.empty((0, 2)))
+        if tree is not None and len(pos):
+            node_distance, _ = tree.query(pos)
+        self.turbine_distance = np.full(n_cells, np.inf)
+        np.minimum.at(self.turbine_distance, self.cell_of, node_distance)
+        self.near_turbine = self.turbine_distance < self.influence_m
+
+    @classmethod
+    def from_model(cls, model, cell_m: float, influence_m: float = DEFAULT_INFLUENCE_M) -> "CoarseGraph":
+        return cls(model.graph, model.transition_probs, model._turbine_positions, cell_m, influence_m)
+
+    def coarse_ok(self, fine_row: int) -> bool:
+        """True when a walker at this fine node may take a coarse move."""
+        return self.n_cells > 0 and not self.near_turbine[self.cell_of[fine_row]]
+
+    def neighbours(self, fine_row: int, month: int):
+        """(destination fine rows, weights) of the coarse moves out of this node's cell."""
+        c = self.cell_of[fine_row]
+        lo, hi = self.graph.indptr[c], self.graph.indptr[c + 1]
+        return self.rep[self.graph.indices[lo:hi]], self.graph.weights[month - 1, lo:hi]
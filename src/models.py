@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import random
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional, Sequence
 
 import numpy as np
 import pandas as pd
+import mesa
 from mesa import Agent, Model
 from mesa.time import RandomActivation
 from mesa.space import ContinuousSpace
@@ -23,13 +24,19 @@ from src.config import (
     ROOST_BUFFER_COMMUNAL,
     ROOST_BUFFER_SINGLE,
     NEST_BUFFER_VERY_HIGH,
-    MITIGATION_BLADE_PAINT,
-    MITIGATION_SHUTDOWN,
-    PREY_REDUCTION_FACTOR,
     AVOIDANCE_RATE_PRIOR,
     COLLISION_PROB_PRIOR,
+    HUB_HEIGHT,
+    ROTOR_RADIUS,
+    COLLISION_RADIUS,
+    DENSITY_RADIUS,
+    DEM_RESOLUTION_M,
+    DENSITY_HALF_SATURATION,
+    COMMUNAL_ROOST_MIN_GROUP,
+)
+from src.bayesian_utils import (
+    bayesian_update_collision_prob, mitigated_collision_prob, turbine_exposure_counts, turbine_zone_radius,
 )
-from src.bayesian_utils import bayesian_update_collision_prob
 from src.data_processing import (
     process_gps_data,
     process_lidar_data,
@@ -38,6 +45,13 @@ from src.data_processing import (
     build_graph,
     Point,
 )
+from src.dem_sampler import DemSampler
+from src.spatial import KM, SpatialLayer
+from src.spatial_hash import SpatialHash
+from src.synthesis import PopulationSynthesizer
+from src.graph_hierarchy import CoarseGraph
+from src.telemetry import TRACK_COLUMNS, bsa_view, read_telemetry
+from src.utilisation import UtilisationRaster
 
 # -----------------------------
 # Utility helpers (vectorized)
@@ -48,6 +62,11 @@ def _any_within_radius(points: np.ndarray, center: np.ndarray, radius: float) ->
     diffs = points - center
     return np.any(np.einsum("ij,ij->i", diffs, diffs) < radius * radius)
 
+def _require_mesa_internals() -> None:
+    # HarrierAgent.bulk and HarrierModel._add_agents write mesa 2.3's private registries
+    if not mesa.__version__.startswith("2.3."):
+        raise RuntimeError(f"bulk agent registration needs mesa 2.3.x, found {mesa.__version__}")
+
 def _nearest_index_kdtree(tree: Optional[KDTree], node_positions: np.ndarray, pos: Tuple[float, float]) -> int:
     if tree is None or len(node_positions) == 0:
         return 0
@@ -60,14 +79,52 @@ def _nearest_index_kdtree(tree: Optional[KDTree], node_positions: np.ndarray, po
 class HarrierAgent(Agent):
     def __init__(self, unique_id: int, model: "HarrierModel", pos: Tuple[float, float], breeding: bool = False):
         super().__init__(unique_id, model)
+        height = random.uniform(0, 100)
+        nest = random.choice(self.model.nests) if breeding and self.model.nests else None
+        self._init_state(pos, height, breeding, nest, random.choice(BREEDING_MONTHS) if breeding else None)
+
+    def _init_state(self, pos: Tuple[float, float], height: float, breeding: bool,
+                    nest: Optional[Tuple[float, float]], breeding_month: Optional[int]) -> None:
+        """Per-agent attributes, shared by __init__ and bulk."""
         self.pos: Tuple[float, float] = pos
-        self.height: float = random.uniform(0, 100)
+        self.height: float = height
         self.breeding: bool = breeding
         self.alive: bool = True
-        self.nest: Optional[Tuple[float, float]] = random.choice(self.model.nests) if breeding and self.model.nests else None
-        self.breeding_month: Optional[int] = random.choice(BREEDING_MONTHS) if breeding else None
+        self.nest: Optional[Tuple[float, float]] = nest
+        self.breeding_month: Optional[int] = breeding_month
         self.energy: float = 100.0
-        self.current_node: Optional[int] = None
+        self.current_node: Optional[int] = None  # graph node id
+        self._node_index: int = -1  # row of current_node in model._node_positions
+        self.in_rotor_band: bool = False  # set in batch by HarrierModel when terrain_aware
+        self.rotor_turbine: int = -1  # nearest turbine whose rotor band holds the agent (terrain_aware)
+        self.local_density: int = 0  # conspecifics within DENSITY_RADIUS (density_dependence)
+        self.communal: bool = False  # part of a communal roost group (dynamic_roosts)
+
+    @classmethod
+    def bulk(cls, model: "HarrierModel", ids: np.ndarray, xy: np.ndarray, breeding: np.ndarray,
+             nest: np.ndarray, breeding_month: np.ndarray, height: np.ndarray) -> List["HarrierAgent"]:
+        """
+        Many agents from sampled arrays (PopulationSynthesizer.sample), with the same
+        attributes as __init__ but no per-agent draws; register them with
+        HarrierModel._add_agents. Positions get place_agent's bounds check, once for all.
+        """
+        _require_mesa_internals()
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        space = model.space
+        out = ((xy[:, 0] < space.x_min) | (xy[:, 0] >= space.x_max)
+               | (xy[:, 1] < space.y_min) | (xy[:, 1] >= space.y_max))
+        if out.any():
+            raise ValueError(f"{int(out.sum())} agent positions lie outside the model space")
+        nests = model.nests
+        agents = []
+        for i, p, b, k, m, h in zip(ids.tolist(), xy.tolist(), breeding.tolist(), nest.tolist(),
+                                    breeding_month.tolist(), height.tolist()):
+            a = cls.__new__(cls)
+            a.unique_id, a.model = i, model
+            a._init_state((p[0], p[1]), h, b, nests[k] if k >= 0 else None, m if b else None)
+            agents.append(a)
+        model.agents_[cls].update(dict.fromkeys(agents))  # what Agent.__init__ does per agent
+        return agents
 
     def _set_flight_profile(self, month: int) -> float:
         if month in BREEDING_MONTHS and self.breeding:
@@ -88,9 +145,14 @@ class HarrierAgent(Agent):
         G = self.model.graph
 
         if self.current_node is None:
-            self.current_node = _nearest_index_kdtree(self.model._graph_kdtree, self.model._node_positions, self.pos)
+            self._node_index = _nearest_index_kdtree(self.model._graph_kdtree, self.model._node_positions, self.pos)
+            self.current_node = int(self.model._node_ids[self._node_index])
 
-        _ = self._set_flight_profile(month)
+        flight_range = self._set_flight_profile(month)
+        coarse = self.model.coarse
+        if coarse is not None and flight_range == NON_BREEDING_RANGE and coarse.coarse_ok(self._node_index):
+            self._move_coarse(coarse, month)
+            return
 
         neighbors = list(G.neighbors(self.current_node))
         if not neighbors:
@@ -115,57 +177,49 @@ class HarrierAgent(Agent):
         next_node = random.choices(neighbors, weights=weights, k=1)[0]
         new_pos = G.nodes[next_node]["pos"]
 
-        if _any_within_radius(self.model._turbine_positions, np.array(new_pos), DISPLACEMENT_RADIUS):
+        if _any_within_radius(self.model._turbine_positions, np.array(new_pos), DISPLACEMENT_RADIUS * KM):
             return
 
         self.pos = tuple(new_pos)
         self.current_node = next_node
+        self._node_index = self.model._node_index_of[next_node]
         self.energy -= 1.0
 
-    def check_collision(self) -> bool:
-        if not self.alive:
-            return False
+    def _move_coarse(self, coarse: CoarseGraph, month: int) -> None:
+        """One move between super-node cells, landing on the destination cell's representative node."""
+        rows, weights = coarse.neighbours(self._node_index, month)
+        if not len(rows):
+            return
+        positions = self.model._node_positions
+        if self.model.wake_loss:
+            here = positions[self._node_index]
+            weights = weights * np.array([self.model._wake_multiplier(0.5 * (here + positions[r])) for r in rows])
+        if not weights.sum() > 0:
+            return
+        k = int(rows[random.choices(range(len(rows)), weights=weights, k=1)[0]])
+        new_pos = positions[k]
 
-        month = self.model.month
-        within_bsa = month in BREEDING_MONTHS and (BSA_HEIGHT[0] <= self.height <= BSA_HEIGHT[1])
-        within_migration = month in MIGRATION_MONTHS and (MIGRATION_HEIGHT[0] <= self.height <= MIGRATION_HEIGHT[1])
-        if not (within_bsa or within_migration):
-            return False
-
-        pos_arr = np.array(self.pos)
-
-        if not _any_within_radius(self.model._turbine_positions, pos_arr, 1.0):
-            return False
-
-        if _any_within_radius(self.model._nest_positions, pos_arr, NEST_BUFFER_VERY_HIGH):
-            return False
-        if _any_within_radius(self.model._communal_roost_positions, pos_arr, ROOST_BUFFER_COMMUNAL):
-            return False
-        if _any_within_radius(self.model._single_roost_positions, pos_arr, ROOST_BUFFER_SINGLE):
-            return False
-
-        if random.random() <= self.model.avoidance_rate:
-            return False
-
-        collision_prob = self.model.collision_prob
-        if random.random() < MITIGATION_BLADE_PAINT:
-            collision_prob *= (1.0 - 0.71)
-        if random.random() < MITIGATION_SHUTDOWN and month in BREEDING_MONTHS:
-            collision_prob *= (1.0 - 0.50)
-        if random.random() < PREY_REDUCTION_FACTOR:
-            collision_prob *= (1.0 - 0.50)
-
-        if random.random() < collision_prob:
-            self.alive = False
-            return True
-        return False
+        if _any_within_radius(self.model._turbine_positions, new_pos, DISPLACEMENT_RADIUS * KM):
+            return
+
+        self.pos = (float(new_pos[0]), float(new_pos[1]))
+        self.current_node = int(self.model._node_ids[k])
+        self._node_index = k
+        self.energy -= 1.0
+
+    def check_collision(self) -> bool:
+        """Collision check for this agent alone; HarrierModel.step checks all agents in one batch."""
+        return bool(self.model._check_collisions([self]))
 
     def breed(self) -> int:
         if not (self.alive and self.breeding and (self.model.month in BREEDING_MONTHS)):
             return 0
         if random.random() < NEST_FAIL_PROB and (self.unique_id % 2 == 0):
             return 0
-        return 2 if random.random() < 0.7 else 0
+        success = 0.7
+        if self.model.density_dependence:
+            success /= 1.0 + self.local_density / DENSITY_HALF_SATURATION
+        return 2 if random.random() < success else 0
 
 # -----------------------------
 # ABM Model (refactored with optional wake-loss & configurable replacement policy)
@@ -173,41 +227,87 @@ class HarrierAgent(Agent):
 class HarrierModel(Model):
     def __init__(self, gps_file: str, lidar_file: str, weather_file: str, turbine_file: str,
                  *, wake_loss: bool = False, wake_coeff: float = 0.15, wake_decay: float = 2.0,
-                 replacement_policy: str = "immediate"):
+                 replacement_policy: str = "immediate", terrain_aware: bool = False,
+                 dem_sampling: str = "bilinear", density_dependence: bool = False,
+                 territorial: bool = False, dynamic_roosts: bool = False,
+                 coarse_cell_m: Optional[float] = None, utilisation: bool = False,
+                 utilisation_by_month: bool = False,
+                 utilisation_height_bands: Optional[Sequence[float]] = None,
+                 n_agents: Optional[int] = None, dem_resolution_m: Optional[float] = DEM_RESOLUTION_M,
+                 assimilated: Optional[Dict[str, Any]] = None):
         super().__init__()
 
         self.schedule = RandomActivation(self)
-        self.space = ContinuousSpace(100, 100, torus=False)
 
         self.month: int = 1
         self._last_month: int = self.month
 
         # Data loading
-        waypoints, agents_df, self.transition_probs = process_gps_data(gps_file)
-        nodes = process_lidar_data(lidar_file)
+        # Telemetry is read once; movement and the Bayesian update share it
+        telemetry = read_telemetry(gps_file, columns=TRACK_COLUMNS + ("alt",))
+        waypoints, agents_df, self.transition_probs = process_gps_data(telemetry)
+        if assimilated is not None:
+            # TelemetryAssimilator.bundle(): waypoints and transitions from all assimilated batches
+            waypoints, self.transition_probs = assimilated["waypoints"], assimilated["transition_probs"]
+        nodes = process_lidar_data(lidar_file, resolution_m=dem_resolution_m)
         thermal_data = process_weather_data(weather_file)
         turbines_df = process_turbine_data(turbine_file)
 
-        self.graph = build_graph(waypoints, nodes, turbines_df, thermal_data)
+        # All geometry below is in metres in the study area's UTM zone
+        self.spatial = SpatialLayer.for_lonlat(telemetry["lon"].to_numpy(), telemetry["lat"].to_numpy())
+        self.graph = build_graph(waypoints, nodes, turbines_df, thermal_data, spatial=self.spatial)
 
-        self._node_positions = np.array([self.graph.nodes[n]["pos"] for n in self.graph.nodes])
+        self._node_ids = np.array(list(self.graph.nodes))
+        self._node_index_of: Dict[int, int] = {int(n): k for k, n in enumerate(self._node_ids)}
+        self._node_positions = np.array([self.graph.nodes[n]["pos"] for n in self.graph.nodes], dtype=float).reshape(-1, 2)
         self._graph_kdtree: Optional[KDTree] = KDTree(self._node_positions) if len(self._node_positions) else None
 
-        self.turbines: List[Tuple[float, float]] = [(row["lon"], row["lat"]) for _, row in turbines_df.iterrows()] if len(turbines_df) else []
-        self._turbine_positions = np.array(self.turbines, dtype=float) if self.turbines else np.empty((0, 2), dtype=float)
+        self._turbine_lonlat = np.column_stack([turbines_df.geometry.x, turbines_df.geometry.y]) if len(turbines_df) else np.empty((0, 2))
+        self._turbine_positions = self.spatial.project(self._turbine_lonlat)
+        self.turbines: List[Tuple[float, float]] = [tuple(p) for p in self._turbine_positions]
         self._turbine_kdtree: Optional[KDTree] = KDTree(self._turbine_positions) if self._turbine_positions.size else None
-
-        # Example nests/roosts (ideally from data)
-        self.nests: List[Tuple[float, float]] = [(random.uniform(20, 80), random.uniform(20, 80)) for _ in range(5)]
-        self.communal_roosts: List[Tuple[float, float]] = [(50.0, 50.0)]
-        self.single_roosts: List[Tuple[float, float]] = [(random.uniform(0, 99), random.uniform(0, 99)) for _ in range(10)]
+        # Node -> nearest turbine (distance in metres, index); agents on a node look up here
+        self._node_turbine_distance = np.full(len(self._node_positions), np.inf)
+        self._node_turbine = np.zeros(len(self._node_positions), dtype=np.int64)
+        if self._turbine_kdtree is not None and len(self._node_positions):
+            self._node_turbine_distance, self._node_turbine = self._turbine_kdtree.query(self._node_positions)
+
+        # Continuous space spans the projected extent of nodes, turbines and start positions
+        # Start positions, stages and nests of the agents come from the tagged birds
+        self.synthesizer = PopulationSynthesizer.from_gps(agents_df, telemetry, self.spatial)
+        extent = np.vstack([self._node_positions, self._turbine_positions, self.synthesizer.extent_xy])
+        self._xy_min = extent.min(axis=0) - 1.0
+        self._xy_max = extent.max(axis=0) + 1.0
+        self.space = ContinuousSpace(self._xy_max[0], self._xy_max[1], torus=False,
+                                     x_min=self._xy_min[0], y_min=self._xy_min[1])
+
+        # Terrain-aware rotor bands: per-turbine ASL rotor bottom/top from the DEM
+        self.terrain_aware: bool = bool(terrain_aware)
+        self.dem_sampling: str = dem_sampling
+        self.dem: Optional[DemSampler] = DemSampler.from_path(lidar_file, dem_resolution_m) if self.terrain_aware else None
+        self._rotor_bottom_asl, self._rotor_top_asl = self._turbine_rotor_bands(turbines_df)
+        self._node_ground = self._ground_at(self._node_positions) if self.terrain_aware else None
+
+        # Opt-in utilisation raster on the DEM grid; nodes map to pixels once
+        self.utilisation: Optional[UtilisationRaster] = None
+        if utilisation:
+            dem = self.dem if self.dem is not None else DemSampler.from_path(lidar_file, dem_resolution_m)
+            self.utilisation = UtilisationRaster.for_dem(dem, self.spatial.crs, by_month=utilisation_by_month,
+                                                         height_bands=utilisation_height_bands)
+            self._node_pixel = self.utilisation.locate(self._node_positions)
+
+        # Example nests/roosts (ideally from data), placed at the same relative positions
+        # across the study extent as on the former 0-100 grid
+        self.nests: List[Tuple[float, float]] = [self._extent_point(random.uniform(20, 80), random.uniform(20, 80)) for _ in range(5)]
+        self.communal_roosts: List[Tuple[float, float]] = [self._extent_point(50.0, 50.0)]
+        self.single_roosts: List[Tuple[float, float]] = [self._extent_point(random.uniform(0, 99), random.uniform(0, 99)) for _ in range(10)]
 
         self._nest_positions = np.array(self.nests, dtype=float) if self.nests else np.empty((0, 2), dtype=float)
         self._communal_roost_positions = np.array(self.communal_roosts, dtype=float) if self.communal_roosts else np.empty((0, 2), dtype=float)
         self._single_roost_positions = np.array(self.single_roosts, dtype=float) if self.single_roosts else np.empty((0, 2), dtype=float)
 
         self.avoidance_rate: float = AVOIDANCE_RATE_PRIOR
-        self.collision_prob: float = COLLISION_PROB_PRIOR
+        self.collision_prob: float = COLLISION_PROB_PRIOR if assimilated is None else float(assimilated["collision_prob"])
 
         # Wake & replacement policy
         self.wake_loss: bool = bool(wake_loss)
@@ -216,7 +316,17 @@ class HarrierModel(Model):
         self.replacement_policy: str = replacement_policy  # 'immediate' or 'seasonal'
         self.pending_recruits: int = 0
 
-        self._init_agents(agents_df)
+        # Opt-in agent-agent interactions, all served by one spatial hash per step
+        self.density_dependence: bool = bool(density_dependence)
+        self.territorial: bool = bool(territorial)
+        self.dynamic_roosts: bool = bool(dynamic_roosts)
+        self._agent_hash = SpatialHash(max(DENSITY_RADIUS, ROOST_BUFFER_COMMUNAL, NEST_BUFFER_VERY_HIGH) * KM)
+
+        # Opt-in coarse level for non-breeding / migration moves away from turbines
+        self.coarse: Optional[CoarseGraph] = CoarseGraph.from_model(self, coarse_cell_m) if coarse_cell_m else None
+
+        self._next_id: int = 0  # ids are never handed out twice (see _allocate_ids)
+        self._init_agents(n_agents)
 
         self.datacollector = DataCollector(
             model_reporters={
@@ -234,47 +344,82 @@ class HarrierModel(Model):
 
         self.fatalities: int = 0
         self.fledglings: int = 0
+        self.fledged: int = 0  # this step's fledglings before any are used as replacements
+        self.steps: int = 0  # steps taken; step() never advances schedule.steps
         self.curtailment_schedule: Dict[int, List[Tuple[int, int]]] = {i: [] for i in range(len(self.turbines))}
+        # One (step, month, hour, turbine) row per collision
+        self.collision_events: List[Tuple[int, int, int, int]] = []
 
-        self.gps_data = pd.read_csv(gps_file)
+        self.gps_data = bsa_view(telemetry)
+        self.gps_data["x"], self.gps_data["y"] = self.spatial.to_xy(self.gps_data["lon"], self.gps_data["lat"])
         self._turbines_df_cached = turbines_df
-
-    def _init_agents(self, agents_df: pd.DataFrame) -> None:
-        n_agents = len(agents_df)
-        breeding_cut = int(0.12 * n_agents)
-        for i, row in agents_df.iterrows():
-            init_pt = row["initial_pos"]
-            pos = (init_pt.x, init_pt.y)
-            breeding = bool(row.get("breeding", i < breeding_cut))
-            agent = HarrierAgent(int(i), self, pos, breeding)
-            self.schedule.add(agent)
-            self.space.place_agent(agent, pos)
+        # Exposure counts depend only on telemetry and layout; each step redraws collisions
+        self._near_turbine = int(turbine_exposure_counts(
+            self.gps_data["x"], self.gps_data["y"], self.gps_data["alt"],
+            self._turbine_positions, turbine_zone_radius(turbines_df)).sum()) if len(turbines_df) else 0
+
+    def _init_agents(self, n_agents: Optional[int] = None) -> None:
+        """The tagged birds, or n_agents sampled from their telemetry, built and registered in bulk."""
+        rng = np.random.default_rng(random.getrandbits(64))  # follows random.seed
+        sample = self.synthesizer.sample(n_agents, rng, n_nests=len(self.nests))
+        self._add_agents(HarrierAgent.bulk(self, self._allocate_ids(len(sample["xy"])), **sample))
+
+    def _new_agents(self, xy: np.ndarray, breeding: np.ndarray) -> List[HarrierAgent]:
+        """Agents at xy with fresh ids and the nest, breeding-month and height draws of __init__."""
+        n = len(xy)
+        rng = np.random.default_rng(random.getrandbits(64))
+        nest = np.where(breeding, rng.integers(len(self.nests), size=n), -1) if self.nests else np.full(n, -1)
+        breeding_month = np.where(breeding, rng.choice(BREEDING_MONTHS, size=n), 0)
+        return HarrierAgent.bulk(self, self._allocate_ids(n), xy, breeding, nest, breeding_month,
+                                 rng.uniform(0.0, 100.0, size=n))
+
+    def _allocate_ids(self, n: int) -> np.ndarray:
+        """n fresh unique ids, increasing across the run."""
+        ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        self._next_id += n
+        return ids
+
+    def _add_agents(self, agents: List[HarrierAgent]) -> None:
+        """
+        Register agents (positions already set) with the scheduler and the space in one
+        update each, instead of schedule.add / space.place_agent per agent (mesa 2.3).
+        """
+        _require_mesa_internals()
+        self.schedule._agents._agents.update(dict.fromkeys(agents))
+        self.space._agent_to_index.update(dict.fromkeys(agents))
+        self.space._invalidate_agent_cache()
 
     def step(self) -> None:
+        self.steps += 1
         self.month = (self.month % 12) + 1
         self.fatalities = 0
         self.fledglings = 0
 
         self.collision_prob = bayesian_update_collision_prob(
-            self.collision_prob, self.gps_data, self._turbines_df_cached
+            self.collision_prob, self.gps_data, self._turbines_df_cached, near_turbine=self._near_turbine
         )
 
-        for agent in list(self.schedule.agents):
+        agents = list(self.schedule.agents)
+        before = [(a.pos, a.current_node, a._node_index) for a in agents] if self.territorial else None
+        for agent in agents:
             agent.move()
-            if agent.check_collision():
-                self.fatalities += 1
-                if self._turbine_positions.size:
-                    if self._turbine_kdtree is not None:
-                        _, tid = self._turbine_kdtree.query(np.array(agent.pos))
-                        tid = int(tid)
-                    else:
-                        diffs = self._turbine_positions - np.array(agent.pos)
-                        tid = int(np.argmin(np.einsum("ij,ij->i", diffs, diffs)))
-                    hour = self.schedule.steps % 24
-                    self.curtailment_schedule[tid].append((self.month, hour))
+        if self.density_dependence or self.territorial or self.dynamic_roosts:
+            self._apply_interactions(agents, before)
+        if self.terrain_aware:
+            self._update_rotor_exposure(agents)
+
+        hour = self.steps % 24
+        for agent, tid in self._check_collisions(agents):
+            self.fatalities += 1
+            self.curtailment_schedule[tid].append((self.month, hour))
+            self.collision_events.append((self.steps, self.month, hour, tid))
+        for agent in agents:
             self.fledglings += agent.breed()
+        self.fledged = self.fledglings
+        if self.utilisation is not None:
+            self._record_utilisation(agents)
 
-        # Remove dead agents (safe ID reuse)
+        # Remove dead agents; their ids are never handed out again
         dead_agents = [a for a in self.schedule.agents if not getattr(a, "alive", True)]
         for agent in dead_agents:
             try:
@@ -286,15 +431,16 @@ class HarrierModel(Model):
             except Exception:
                 pass
 
+        # Recruits get fresh ids; positions are drawn per recruit, then built in one batch
+        recruit_xy: List[Tuple[float, float]] = []
+        recruit_breeding: List[bool] = []
         if self.replacement_policy == "immediate":
             # Replace now, bounded by fledglings
             for agent in dead_agents:
                 if self.fledglings <= 0:
                     break
-                new_pos = (random.uniform(0, 99), random.uniform(0, 99))
-                new_agent = HarrierAgent(agent.unique_id, self, new_pos, agent.breeding)
-                self.schedule.add(new_agent)
-                self.space.place_agent(new_agent, new_pos)
+                recruit_xy.append(self._extent_point(random.uniform(0, 99), random.uniform(0, 99)))
+                recruit_breeding.append(agent.breeding)
                 self.fledglings -= 1
         else:
             # Defer replacements until entering a breeding month
@@ -307,16 +453,155 @@ class HarrierModel(Model):
             entering_breeding = (self._last_month not in BREEDING_MONTHS) and (self.month in BREEDING_MONTHS)
             if entering_breeding and self.pending_recruits > 0:
                 for _ in range(self.pending_recruits):
-                    new_pos = (random.uniform(0, 99), random.uniform(0, 99))
-                    new_id = max([a.unique_id for a in self.schedule.agents], default=0) + 1
-                    new_agent = HarrierAgent(new_id, self, new_pos, breeding=True)
-                    self.schedule.add(new_agent)
-                    self.space.place_agent(new_agent, new_pos)
+                    recruit_xy.append(self._extent_point(random.uniform(0, 99), random.uniform(0, 99)))
+                    recruit_breeding.append(True)
                 self.pending_recruits = 0
+        if recruit_xy:
+            self._add_agents(self._new_agents(np.array(recruit_xy), np.array(recruit_breeding, dtype=bool)))
 
         self._last_month = self.month
         self.datacollector.collect(self)
 
+    # ---------------------
+    # Collisions (candidates near turbines, batched)
+    # ---------------------
+    def _collision_candidates(self, agents: List[HarrierAgent]) -> Tuple[List[HarrierAgent], np.ndarray]:
+        """
+        Alive, non-communal agents in the month's collision height band (the rotor band
+        when terrain_aware) within COLLISION_RADIUS of a turbine and outside the nest and
+        roost buffers, with their nearest turbine (when terrain_aware, the nearest one whose
+        rotor band they are in). Agents sitting on a graph node take distance and turbine
+        from the node table; only the others query the KD-tree.
+        """
+        month = self.month
+        none = ([], np.empty(0, dtype=np.int64))
+        if self._turbine_kdtree is None or not (month in BREEDING_MONTHS or month in MIGRATION_MONTHS):
+            return none
+        if self.terrain_aware:
+            band = [a for a in agents if a.alive and not a.communal and a.in_rotor_band]
+        else:
+            bands = [b for b, months in ((BSA_HEIGHT, BREEDING_MONTHS), (MIGRATION_HEIGHT, MIGRATION_MONTHS))
+                     if month in months]
+            band = [a for a in agents if a.alive and not a.communal
+                    and any(lo <= a.height <= hi for lo, hi in bands)]
+        if not band:
+            return none
+
+        pos = np.array([a.pos for a in band], dtype=float)
+        node = np.array([a._node_index for a in band], dtype=np.int64)
+        on_node = node >= 0
+        if on_node.any():  # an agent keeps its start position until its first accepted move
+            on_node[on_node] = (pos[on_node] == self._node_positions[node[on_node]]).all(axis=1)
+        dist = np.full(len(band), np.inf)
+        tid = np.zeros(len(band), dtype=np.int64)
+        dist[on_node] = self._node_turbine_distance[node[on_node]]
+        tid[on_node] = self._node_turbine[node[on_node]]
+        if not on_node.all():
+            dist[~on_node], tid[~on_node] = self._turbine_kdtree.query(pos[~on_node])
+        if self.terrain_aware:  # charge the turbine whose rotor band the bird is in
+            tid = np.array([a.rotor_turbine for a in band], dtype=np.int64)
+        near = dist < COLLISION_RADIUS * KM
+        for centres, radius in ((self._nest_positions, NEST_BUFFER_VERY_HIGH),
+                                (self._communal_roost_positions, ROOST_BUFFER_COMMUNAL),
+                                (self._single_roost_positions, ROOST_BUFFER_SINGLE)):
+            if near.any() and len(centres):
+                d2 = ((pos[near, None, :] - centres[None, :, :]) ** 2).sum(axis=2)
+                near[near] = ~(d2 < (radius * KM) ** 2).any(axis=1)
+        keep = np.nonzero(near)[0]
+        return [band[k] for k in keep], tid[keep]
+
+    def _check_collisions(self, agents: List[HarrierAgent]) -> List[Tuple[HarrierAgent, int]]:
+        """
+        Avoidance, mitigation and collision draws for the candidates only, vectorized;
+        killed agents are marked dead and returned with the turbine they hit.
+        """
+        candidates, tid = self._collision_candidates(agents)
+        n = len(candidates)
+        if not n:
+            return []
+        # Avoidance, blade paint, shutdown, prey reduction, collision
+        u = np.array([random.random() for _ in range(5 * n)]).reshape(n, 5)
+        p = mitigated_collision_prob(np.full(n, self.collision_prob), u, self.month in BREEDING_MONTHS)
+        killed = []
+        for k in np.nonzero((u[:, 0] > self.avoidance_rate) & (u[:, 4] < p))[0]:
+            candidates[k].alive = False
+            killed.append((candidates[k], int(tid[k])))
+        return killed
+
+    # ---------------------
+    # Agent-agent interactions (spatial hash, batched over agents)
+    # ---------------------
+    def _apply_interactions(self, agents: List[HarrierAgent], before: Optional[list]) -> None:
+        """
+        Territorial exclusion: in breeding months, a move that ends within
+        NEST_BUFFER_VERY_HIGH of another breeding bird's nest is undone.
+        Density: local_density counts live conspecifics within DENSITY_RADIUS.
+        Dynamic roosts: birds with at least COMMUNAL_ROOST_MIN_GROUP - 1 others within
+        ROOST_BUFFER_COMMUNAL roost communally and get the communal-roost exemption.
+        """
+        alive = [k for k, a in enumerate(agents) if a.alive]
+        for a in agents:
+            a.local_density = 0
+            a.communal = False
+        if not alive:
+            return
+        pos = np.array([agents[k].pos for k in alive], dtype=float)
+
+        if self.territorial and self.month in BREEDING_MONTHS:
+            # Occupied nests (several breeders may share one); a bird is not an intruder at its own
+            occupied = sorted({agents[k].nest for k in alive if agents[k].breeding and agents[k].nest is not None})
+            if occupied:
+                nest_id = {n: i for i, n in enumerate(occupied)}
+                own = np.array([nest_id.get(agents[k].nest, -1) if agents[k].breeding else -1 for k in alive])
+                nests = SpatialHash(NEST_BUFFER_VERY_HIGH * KM).build(np.array(occupied, dtype=float))
+                qi, nj, _ = nests.query_pairs(pos, NEST_BUFFER_VERY_HIGH * KM)
+                intruder = own[qi] != nj
+                for k in np.unique(np.asarray(alive)[qi[intruder]]):
+                    a = agents[k]
+                    a.pos, a.current_node, a._node_index = before[k]
+                pos = np.array([agents[k].pos for k in alive], dtype=float)
+
+        if not (self.density_dependence or self.dynamic_roosts):
+            return
+        self._agent_hash.build(pos)
+        if self.density_dependence:
+            for k, n in zip(alive, self._agent_hash.count_within(pos, DENSITY_RADIUS * KM, exclude_self=True)):
+                agents[k].local_density = int(n)
+        if self.dynamic_roosts:
+            group = self._agent_hash.count_within(pos, ROOST_BUFFER_COMMUNAL * KM, exclude_self=True)
+            for k, n in zip(alive, group):
+                agents[k].communal = bool(n + 1 >= COMMUNAL_ROOST_MIN_GROUP)
+
+    # ---------------------
+    # Geometry helpers (metres)
+    # ---------------------
+    def _extent_point(self, u: float, v: float) -> Tuple[float, float]:
+        """Point at (u, v) percent across the projected study extent."""
+        span = self._xy_max - self._xy_min
+        return (float(self._xy_min[0] + span[0] * u / 100.0), float(self._xy_min[1] + span[1] * v / 100.0))
+
+    def _ground_at(self, xy: np.ndarray) -> np.ndarray:
+        """DEM ground elevation (m) at projected points; NaN outside the DEM."""
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        if self.dem is None or not len(xy):
+            return np.zeros(len(xy))
+        lon, lat = self.spatial.to_lonlat(xy[:, 0], xy[:, 1])
+        ground, _ = self.dem.sample(lon, lat, mode=self.dem_sampling)
+        return ground
+
+    # ---------------------
+    # Utilisation raster (one add per step)
+    # ---------------------
+    def _record_utilisation(self, agents: List[HarrierAgent]) -> None:
+        alive = [a for a in agents if a.alive]
+        node = np.array([-1 if a.current_node is None else a._node_index for a in alive], dtype=np.int64)
+        on_graph = node >= 0
+        pixel = np.full(len(alive), -1, dtype=np.int64)
+        pixel[on_graph] = self._node_pixel[node[on_graph]]
+        if not on_graph.all():
+            pixel[~on_graph] = self.utilisation.locate(np.array([a.pos for a, ok in zip(alive, on_graph) if not ok]))
+        self.utilisation.add(pixel, np.array([a.height for a in alive], dtype=float), self.month)
+
     # ---------------------
     # Wake multiplier helper (<= 1.0)
     # ---------------------
@@ -325,6 +610,56 @@ class HarrierModel(Model):
             return 1.0
         diffs = self._turbine_positions - pos
         dists = np.sqrt(np.einsum("ij,ij->i", diffs, diffs))
-        decay = np.exp(-dists / max(self.wake_decay, 1e-6))
+        decay = np.exp(-dists / max(self.wake_decay * KM, 1e-6))
         penalty = self.wake_coeff * float(decay.sum())
-        return float(np.clip(1.0 - penalty, 0.1, 1.0))
\ No newline at end of file
+        return float(np.clip(1.0 - penalty, 0.1, 1.0))
+
+    # ---------------------
+    # Terrain-aware rotor exposure (batched over agents)
+    # ---------------------
+    def _turbine_rotor_bands(self, turbines_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(self._turbine_positions)
+        hub = turbines_df["hub_height"].to_numpy(dtype=float) if "hub_height" in turbines_df else np.full(n, float(HUB_HEIGHT))
+        if "rotor_diameter" in turbines_df:
+            radius = 0.5 * turbines_df["rotor_diameter"].to_numpy(dtype=float)
+        else:
+            radius = np.full(n, float(ROTOR_RADIUS))
+        ground = np.zeros(n)
+        if self.dem is not None and n:
+            ground, _ = self.dem.sample(self._turbine_lonlat[:, 0], self._turbine_lonlat[:, 1], mode=self.dem_sampling)
+            ground = np.nan_to_num(ground, nan=0.0)
+        return ground + hub - radius, ground + hub + radius
+
+    def _update_rotor_exposure(self, agents: List[HarrierAgent], k: int = 8) -> np.ndarray:
+        """
+        Set agent.in_rotor_band and agent.rotor_turbine for all agents at once: the agent's
+        ASL altitude (ground under the agent + AGL height) lies inside the rotor band of a
+        turbine within COLLISION_RADIUS, and the nearest such turbine (-1 for none).
+        Returns rotor_turbine for the alive agents, in order.
+        """
+        alive = [a for a in agents if a.alive]
+        for a in agents:
+            a.in_rotor_band, a.rotor_turbine = False, -1
+        if not alive or self._turbine_kdtree is None:
+            return np.full(len(alive), -1, dtype=np.int64)
+        pos = np.array([a.pos for a in alive], dtype=float)
+        agl = np.array([a.height for a in alive], dtype=float)
+        # Agents sit on graph nodes after their first move; ground there is precomputed
+        node_idx = np.array([-1 if a.current_node is None else a._node_index for a in alive], dtype=np.int64)
+        ground = np.where(node_idx >= 0, self._node_ground[np.maximum(node_idx, 0)], np.nan)
+        off_graph = node_idx < 0
+        if off_graph.any():
+            ground[off_graph] = self._ground_at(pos[off_graph])
+        asl = np.nan_to_num(ground, nan=0.0) + agl
+
+        k = min(k, len(self._turbine_positions))
+        dist, idx = self._turbine_kdtree.query(pos, k=k, distance_upper_bound=COLLISION_RADIUS * KM)
+        dist = dist.reshape(len(alive), k); idx = idx.reshape(len(alive), k)
+        near = np.isfinite(dist)
+        tid = np.where(near, idx, 0)
+        in_band = near & (asl[:, None] >= self._rotor_bottom_asl[tid]) & (asl[:, None] <= self._rotor_top_asl[tid])
+        # Neighbours come back nearest first: the first match is the turbine the bird can hit
+        hit = np.where(in_band.any(axis=1), tid[np.arange(len(alive)), in_band.argmax(axis=1)], -1)
+        for a, t in zip(alive, hit.tolist()):
+            a.in_rotor_band, a.rotor_turbine = t >= 0, t
+        return hit
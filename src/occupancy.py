@@ -0,0 +1,197 @@
+"""
+Analytic occupancy of the movement graph.
+
+HarrierAgent.move is a Markov chain on the graph nodes whose transition matrix changes
+with the calendar month: row i of P_m holds the month's weights out of node i
+(transition prob x thermal / (1 + risk), times the wake multiplier when enabled),
+normalised, with every move that would land within the displacement radius of a turbine
+folded back into the diagonal (the agent stays put), as are nodes with no neighbours.
+The long-run distribution of a walker is periodic with period one year; it is the fixed
+point of the annual product A = P_1 ... P_12, which is never formed: A is applied as
+twelve sparse matrix-vector products and the fixed point solved with GMRES, so
+slow-mixing graphs (short edges on a fine DEM) take a few hundred products instead of
+the tens of thousands plain power iteration needs. Each connected component keeps the
+mass it starts with, so a fragmented graph gives the limit from the start distribution.
+
+Occupancy near each turbine, times the chance of being in the collision height band
+and the collision-check factors of check_collision in expectation, gives deterministic
+per-turbine monthly exposure and fatality maps for a fixed population: a screening tool
+that needs no simulation, and a cross-check on simulated fatalities.
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import LinearOperator, gmres
+from scipy.spatial import cKDTree
+
+from src.config import (
+    AVOIDANCE_RATE_PRIOR, BREEDING_MONTHS, BSA_HEIGHT, COLLISION_PROB_PRIOR, COLLISION_RADIUS,
+    DISPLACEMENT_RADIUS, MIGRATION_HEIGHT, MIGRATION_MONTHS,
+)
+from src.bayesian_utils import mitigation_multiplier
+from src.graph_arrays import CompactGraph
+
+
+def transition_matrices(graph: CompactGraph, displacement_radius: float = DISPLACEMENT_RADIUS,
+                        wake_coeff: float = 0.0) -> List[sp.csr_matrix]:
+    """
+    Twelve row-stochastic (N, N) CSR matrices, one per month, following HarrierAgent.move.
+    displacement_radius is in km.
+    """
+    n, src, dst = graph.n_nodes, graph.edge_source, graph.indices
+    weights = graph.weights
+    if wake_coeff > 0:
+        weights = weights * np.clip(1.0 - wake_coeff * graph.edge_wake, 0.1, 1.0)[None, :]
+    blocked = graph.within(graph.turbine_positions, displacement_radius * graph.unit_per_km)[dst]
+    out = []
+    for m in range(12):
+        total = np.bincount(src, weights=weights[m], minlength=n)
+        p = np.divide(weights[m], total[src], out=np.zeros(len(dst)), where=total[src] > 0)
+        stay = np.bincount(src, weights=np.where(blocked, p, 0.0), minlength=n) + (total <= 0)
+        P = sp.csr_matrix((np.where(blocked, 0.0, p), dst, graph.indptr), shape=(n, n))
+        out.append((P + sp.diags(stay)).tocsr())
+    return out
+
+
+def height_band_fraction(bsa_fraction: float = 0.35) -> np.ndarray:
+    """
+    (2, 12) chance a non-breeding (row 0) or breeding (row 1) bird is in the collision
+    height band per month, from HarrierAgent._set_flight_profile and check_collision.
+    """
+    def inside(lo, hi, band):
+        return max(0.0, min(hi, band[1]) - max(lo, band[0])) / (hi - lo)
+
+    out = np.zeros((2, 12))
+    for stage in (0, 1):
+        for month in range(1, 13):
+            if month in BREEDING_MONTHS and stage == 1:
+                profile = [(bsa_fraction, BSA_HEIGHT), (1.0 - bsa_fraction, (0.0, 30.0))]
+            elif month in MIGRATION_MONTHS:
+                profile = [(1.0, MIGRATION_HEIGHT)]
+            else:
+                profile = [(1.0, (0.0, 30.0))]
+            band = BSA_HEIGHT if month in BREEDING_MONTHS else MIGRATION_HEIGHT if month in MIGRATION_MONTHS else None
+            if band is not None:
+                out[stage, month - 1] = sum(w * inside(lo, hi, band) for w, (lo, hi) in profile)
+    return out
+
+
+class OccupancySolver:
+    def __init__(self, graph: CompactGraph, displacement_radius: float = DISPLACEMENT_RADIUS,
+                 wake_coeff: float = 0.0, exempt: Optional[np.ndarray] = None,
+                 start: Optional[np.ndarray] = None, population: Optional[Sequence[float]] = None):
+        """
+        start is the initial node distribution (counts or weights; uniform by default);
+        exempt flags nodes inside nest/roost buffers, where check_collision never fires;
+        population is the default (non_breeding, breeding) head count for the risk maps.
+        """
+        self.graph = graph
+        self.P = transition_matrices(graph, displacement_radius, wake_coeff)
+        self._PT = [P.T.tocsr() for P in self.P]  # pi_next = P^T pi
+        self.exempt = np.zeros(graph.n_nodes, dtype=bool) if exempt is None else np.asarray(exempt, dtype=bool)
+        self.start = start
+        self.population = population
+        self.applications = 0  # annual-operator products used by the last solve
+        self._occupancy: Optional[np.ndarray] = None
+
+        # Node -> nearest turbine, where a collision at the node would be attributed
+        n_t = len(graph.turbine_positions)
+        near = (graph.turbine_distance < COLLISION_RADIUS * graph.unit_per_km) & ~self.exempt
+        tid = np.zeros(graph.n_nodes, dtype=np.int64)
+        if n_t and near.any():
+            _, tid = cKDTree(graph.turbine_positions).query(graph.pos)
+        rows = np.nonzero(near)[0]
+        self.incidence = sp.csr_matrix((np.ones(len(rows)), (tid[rows], rows)), shape=(n_t, graph.n_nodes))
+
+    @classmethod
+    def from_model(cls, model) -> "OccupancySolver":
+        """Graph, wake, nest/roost exemptions and the agents' start nodes from a HarrierModel."""
+        from src.calibration import model_setup
+        graph, start_nodes, breeding, exempt, _ = model_setup(model)
+        return cls(graph, wake_coeff=model.wake_coeff if model.wake_loss else 0.0, exempt=exempt,
+                   start=np.bincount(start_nodes, minlength=graph.n_nodes),
+                   population=(int((~breeding).sum()), int(breeding.sum())))
+
+    def _annual(self, x: np.ndarray) -> np.ndarray:
+        self.applications += 1
+        for PT in self._PT:
+            x = PT @ x
+        return x
+
+    def stationary(self, tol: float = 1e-8, max_years: int = 10_000) -> np.ndarray:
+        """
+        (12, N) periodic stationary occupancy: row m - 1 is the node distribution after
+        the move of a month-m step. Solved once and cached; tol is on the L1 change over
+        one year.
+        """
+        if self._occupancy is not None:
+            return self._occupancy
+        n = self.graph.n_nodes
+        start = np.ones(n) if self.start is None else np.asarray(self.start, dtype=np.float64)
+        start = start / start.sum()
+        self.applications = 0
+
+        # Each component keeps its start mass: solve (I - A^T) pi + u_c (1_c^T pi) = u_c m_c
+        # per component c, non-singular when the component has one stationary distribution
+        adjacency = sp.csr_matrix((np.ones(len(self.graph.indices)), self.graph.indices, self.graph.indptr),
+                                  shape=(n, n))
+        n_comp, comp = connected_components(adjacency, directed=False)
+        mass = np.bincount(comp, weights=start, minlength=n_comp)
+        size = np.bincount(comp, minlength=n_comp)
+        u = np.where(mass[comp] > 0, start / np.where(mass[comp] > 0, mass[comp], 1.0), 1.0 / size[comp])
+        op = LinearOperator((n, n), dtype=np.float64, matvec=lambda x: (
+            x - self._annual(x) + u * np.bincount(comp, weights=x, minlength=n_comp)[comp]))
+        pi, _ = gmres(op, u * mass[comp], x0=start, rtol=0.0, atol=0.1 * tol / np.sqrt(n),
+                      restart=60, maxiter=max(max_years // 60, 1))
+        pi = np.maximum(pi, 0.0)
+        total = np.bincount(comp, weights=pi, minlength=n_comp)
+        pi = np.where(total[comp] > 0, pi * mass[comp] / np.where(total[comp] > 0, total[comp], 1.0), start)
+
+        # Verify with lazy power iteration (averaged with the previous year, so periodic
+        # chains converge), which also finishes the job if the Krylov solve fell short
+        for _ in range(max_years):
+            nxt = 0.5 * (pi + self._annual(pi))
+            nxt /= nxt.sum()
+            done = np.abs(nxt - pi).sum() < tol
+            pi = nxt
+            if done:
+                break
+        occ = np.empty((12, n))
+        for m, PT in enumerate(self._PT):
+            pi = PT @ pi
+            occ[m] = pi
+        self._occupancy = occ
+        return occ
+
+    def presence(self) -> np.ndarray:
+        """(T, 12) chance one bird is within COLLISION_RADIUS of turbine t (nearest) and not exempt."""
+        return np.asarray(self.incidence @ self.stationary().T)
+
+    def turbine_exposure(self, population: Optional[Sequence[float]] = None,
+                         bsa_fraction: float = 0.35) -> np.ndarray:
+        """(T, 12) expected birds per step in turbine t's collision zone and height band."""
+        n0 = np.asarray(self.population if population is None else population, dtype=np.float64)
+        birds = n0 @ height_band_fraction(bsa_fraction)
+        return self.presence() * birds[None, :]
+
+    def expected_fatalities(self, population: Optional[Sequence[float]] = None,
+                            avoidance_rate: float = AVOIDANCE_RATE_PRIOR,
+                            collision_prob: float = COLLISION_PROB_PRIOR,
+                            bsa_fraction: float = 0.35) -> np.ndarray:
+        """(T, 12) expected collisions per step for a population held at its given size."""
+        kill = (1.0 - avoidance_rate) * collision_prob * np.array([mitigation_multiplier(m) for m in range(1, 13)])
+        return self.turbine_exposure(population, bsa_fraction) * kill[None, :]
+
+    def to_frame(self, population: Optional[Sequence[float]] = None, **kwargs) -> pd.DataFrame:
+        """Long table (turbine, month, presence, exposure, expected_fatalities)."""
+        n_t = self.incidence.shape[0]
+        return pd.DataFrame({
+            "turbine": np.repeat(np.arange(n_t), 12),
+            "month": np.tile(np.arange(1, 13), n_t),
+            "presence": self.presence().ravel(),
+            "exposure": self.turbine_exposure(population, kwargs.get("bsa_fraction", 0.35)).ravel(),
+            "expected_fatalities": self.expected_fatalities(population, **kwargs).ravel(),
+        })
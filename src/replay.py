@@ -0,0 +1,229 @@
+"""
+Record-and-replay of agent trajectories for layout comparisons.
+
+record() steps a HarrierModel once and keeps, for every bird-step, the graph node the
+bird was checked at, its flight height and flags (breeding, communal, died in the
+recorded run), plus the per-step month, hour and collision probability, in compact
+(steps, slots) arrays; a slot is one bird for its whole life. LayoutReplayer then
+evaluates candidate turbine layouts against the record with HarrierAgent.check_collision's
+rules, vectorized over all bird-steps: height band by month, within COLLISION_RADIUS of a
+candidate turbine, outside nest/roost buffers, then the avoidance, mitigation and
+collision draws. Those draws are common random numbers, regenerated from the record's
+seed per (step, slot), so every layout sees the same bird-steps with the same luck and
+layout differences are not swamped by Monte Carlo noise, and everything but the distance
+to the candidate's turbines is computed once per record. A bird killed under the
+candidate is removed from its later steps.
+
+Replay keeps the recorded paths, so it cannot show birds avoiding the candidate's own
+turbines or surviving past a recorded death. Each result reports the share of recorded
+bird-steps inside the candidate's displacement zones (moves the model would have
+rejected) and the birds whose record ends in a death the candidate did not cause;
+needs_rerun flags layouts where displacement matters enough to call for a full run.
+Record from a baseline run (no turbines, or a reference layout) for the least bias.
+"""
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from src.config import (
+    BREEDING_MONTHS, BSA_HEIGHT, COLLISION_RADIUS, DISPLACEMENT_RADIUS, MIGRATION_HEIGHT, MIGRATION_MONTHS,
+    NEST_BUFFER_VERY_HIGH, ROOST_BUFFER_COMMUNAL, ROOST_BUFFER_SINGLE,
+)
+from src.bayesian_utils import mitigated_collision_prob
+from src.results_store import EVENT_COLUMNS
+from src.spatial import KM, SpatialLayer
+
+BREEDING, COMMUNAL, DIED = 1, 2, 4  # flag bits
+N_DRAWS = 5  # avoidance, blade paint, shutdown, prey reduction, collision
+
+
+class TrajectoryRecord:
+    def __init__(self, node: np.ndarray, height: np.ndarray, flags: np.ndarray, month: np.ndarray,
+                 step: np.ndarray, collision_prob: np.ndarray, avoidance_rate: float,
+                 node_xy: np.ndarray, exempt: np.ndarray, epsg: int, seed: int = 0):
+        self.node = np.asarray(node, dtype=np.int32)  # (S, A) node row, -1 where the slot is empty
+        self.height = np.asarray(height, dtype=np.float32)  # (S, A) metres AGL
+        self.flags = np.asarray(flags, dtype=np.uint8)  # (S, A) BREEDING | COMMUNAL | DIED
+        self.month = np.asarray(month, dtype=np.int8)  # (S,)
+        self.step = np.asarray(step, dtype=np.int64)  # (S,) model step id used in collision events
+        self.collision_prob = np.asarray(collision_prob, dtype=np.float64)  # (S,)
+        self.avoidance_rate = float(avoidance_rate)
+        self.node_xy = np.asarray(node_xy, dtype=np.float64).reshape(-1, 2)
+        self.exempt = np.asarray(exempt, dtype=bool)  # (N,) inside a nest/roost buffer
+        self.epsg = int(epsg)
+        self.seed = int(seed)
+
+    @property
+    def shape(self):
+        return self.node.shape
+
+    def project(self, turbine_lonlat) -> np.ndarray:
+        """Candidate layout lon/lat -> the record's metres."""
+        return SpatialLayer(self.epsg).project(turbine_lonlat)
+
+    def uniforms(self) -> np.ndarray:
+        """
+        (S, A, N_DRAWS) common random numbers. Row-major fill per step, so a slot's draws
+        do not depend on how many slots the record has.
+        """
+        n_steps, n_slots = self.shape
+        out = np.empty((n_steps, n_slots, N_DRAWS), dtype=np.float32)
+        for s in range(n_steps):
+            out[s] = np.random.default_rng([self.seed, s]).random((n_slots, N_DRAWS), dtype=np.float32)
+        return out
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, node=self.node, height=self.height, flags=self.flags, month=self.month,
+                            step=self.step, collision_prob=self.collision_prob, node_xy=self.node_xy,
+                            exempt=self.exempt,
+                            meta=np.array([self.avoidance_rate, self.epsg, self.seed], dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: str) -> "TrajectoryRecord":
+        with np.load(path) as z:
+            avoidance_rate, epsg, seed = z["meta"]
+            return cls(z["node"], z["height"], z["flags"], z["month"], z["step"], z["collision_prob"],
+                       avoidance_rate, z["node_xy"], z["exempt"], int(epsg), int(seed))
+
+
+def record(model, steps: int, seed: int = 0) -> TrajectoryRecord:
+    """Step model `steps` times, recording every bird checked for collision at each step."""
+    slot_of: Dict[object, int] = {}
+    rows = []
+    months, step_ids, probs = [], [], []
+    for _ in range(int(steps)):
+        agents = [a for a in model.schedule.agents if a.alive]
+        model.step()
+        for a in agents:
+            slot_of.setdefault(a, len(slot_of))
+        slot = np.fromiter((slot_of[a] for a in agents), dtype=np.int64, count=len(agents))
+        node = np.fromiter((-1 if a.current_node is None else a._node_index for a in agents),
+                           dtype=np.int64, count=len(agents))
+        height = np.fromiter((a.height for a in agents), dtype=np.float64, count=len(agents))
+        flags = np.fromiter((BREEDING * a.breeding | COMMUNAL * a.communal | DIED * (not a.alive) for a in agents),
+                            dtype=np.int64, count=len(agents))
+        rows.append((slot, node, height, flags))
+        months.append(model.month); step_ids.append(model.steps); probs.append(model.collision_prob)
+
+    n_slots = len(slot_of)
+    node = np.full((len(rows), n_slots), -1, dtype=np.int32)
+    height = np.zeros((len(rows), n_slots), dtype=np.float32)
+    flags = np.zeros((len(rows), n_slots), dtype=np.uint8)
+    for s, (slot, n, h, f) in enumerate(rows):
+        node[s, slot] = n; height[s, slot] = h; flags[s, slot] = f
+
+    node_xy = model._node_positions
+    exempt = np.zeros(len(node_xy), dtype=bool)
+    for points, radius in ((model._nest_positions, NEST_BUFFER_VERY_HIGH),
+                           (model._communal_roost_positions, ROOST_BUFFER_COMMUNAL),
+                           (model._single_roost_positions, ROOST_BUFFER_SINGLE)):
+        if len(points) and len(node_xy):
+            d, _ = cKDTree(points).query(node_xy)
+            exempt |= d < radius * KM
+    return TrajectoryRecord(node, height, flags, np.array(months), np.array(step_ids), np.array(probs),
+                            model.avoidance_rate, node_xy, exempt, model.spatial.epsg, seed)
+
+
+class ReplayResult:
+    def __init__(self, events: pd.DataFrame, exposure: np.ndarray, displaced_fraction: float,
+                 censored: int, needs_rerun: bool):
+        self.events = events  # one row per collision, EVENT_COLUMNS (as model.collision_events)
+        self.exposure = exposure  # (T, 12) bird-steps in a turbine's collision zone and height band
+        self.displaced_fraction = displaced_fraction
+        self.censored = censored
+        self.needs_rerun = needs_rerun
+
+    @property
+    def fatalities(self) -> int:
+        return len(self.events)
+
+
+class LayoutReplayer:
+    """
+    Everything about a record that does not depend on the layout, computed once: the
+    bird-steps in the collision height band and, among them, the lethal ones (outside
+    nest/roost buffers, not communal, and failing the avoidance and collision draws).
+    evaluate() then only needs each node's distance to the candidate's turbines.
+    """
+
+    def __init__(self, rec: TrajectoryRecord, collision_radius_m: float = COLLISION_RADIUS * KM,
+                 displacement_radius_m: float = DISPLACEMENT_RADIUS * KM, rerun_tol: float = 0.01):
+        self.rec = rec
+        self.collision_radius_m = float(collision_radius_m)
+        self.displacement_radius_m = float(displacement_radius_m)
+        self.rerun_tol = float(rerun_tol)
+        self._present = rec.node >= 0
+        self._n_present = int(self._present.sum())
+        self._node_steps = np.bincount(rec.node[self._present], minlength=len(rec.node_xy))
+        self._died = ((rec.flags & DIED) > 0).any(axis=0)
+
+        month = rec.month.astype(np.int64)[:, None]
+        h = rec.height
+        breeding_month = np.isin(month, BREEDING_MONTHS)
+        in_band = ((breeding_month & (h >= BSA_HEIGHT[0]) & (h <= BSA_HEIGHT[1]))
+                   | (np.isin(month, MIGRATION_MONTHS) & (h >= MIGRATION_HEIGHT[0]) & (h <= MIGRATION_HEIGHT[1])))
+        s, a = np.nonzero(self._present & in_band)  # step-major
+        node = rec.node[s, a].astype(np.int64)
+        self._band = (s, a, node)
+
+        u = rec.uniforms()[s, a]
+        p = mitigated_collision_prob(rec.collision_prob[s], u, breeding_month[s, 0])
+        lethal = (~rec.exempt[node] & ((rec.flags[s, a] & COMMUNAL) == 0)
+                  & (u[:, 0] > rec.avoidance_rate) & (u[:, 4] < p))
+        self._lethal = (s[lethal], a[lethal], node[lethal])
+
+    def evaluate(self, turbine_xy) -> ReplayResult:
+        """Collisions of the recorded birds under a layout (turbine positions in the record's metres)."""
+        rec = self.rec
+        turbine_xy = np.asarray(turbine_xy, dtype=np.float64).reshape(-1, 2)
+        n_steps, n_slots = rec.shape
+        n_t = len(turbine_xy)
+        if n_t == 0 or not self._n_present:
+            return ReplayResult(pd.DataFrame({c: pd.Series(dtype=np.int64) for c in EVENT_COLUMNS}),
+                                np.zeros((n_t, 12)), 0.0, int(self._died.sum()), False)
+        distance, nearest = cKDTree(turbine_xy).query(rec.node_xy)
+        near = distance < self.collision_radius_m
+
+        # First lethal bird-step near a turbine per bird; its later steps never happen
+        ls, la, ln = self._lethal
+        hit = near[ln]
+        slot, first_hit = np.unique(la[hit], return_index=True)
+        ks, kn = ls[hit][first_hit], ln[hit][first_hit]
+        first = np.full(n_slots, n_steps)
+        first[slot] = ks
+        events = pd.DataFrame({"step": rec.step[ks], "month": rec.month[ks].astype(np.int64),
+                               "hour": rec.step[ks] % 24, "turbine": nearest[kn].astype(np.int64)})
+
+        bs, ba, bn = self._band
+        live = near[bn] & (bs <= first[ba])
+        exposure = np.bincount(nearest[bn[live]] * 12 + rec.month[bs[live]].astype(np.int64) - 1,
+                               minlength=n_t * 12).reshape(n_t, 12).astype(np.float64)
+
+        # Share of live bird-steps inside displacement zones: all recorded steps less each
+        # killed bird's later ones
+        zone = distance < self.displacement_radius_m
+        after = self._present[:, slot] & (np.arange(n_steps)[:, None] > ks[None, :])
+        lost = rec.node[:, slot][after]
+        displaced = float((self._node_steps[zone].sum() - zone[lost].sum())
+                          / max(self._n_present - len(lost), 1))
+        censored = int((self._died & (first == n_steps)).sum())
+        return ReplayResult(events, exposure, displaced, censored, displaced > self.rerun_tol)
+
+
+def replay(rec: TrajectoryRecord, turbine_xy, **kwargs) -> ReplayResult:
+    """One layout; use LayoutReplayer (or replay_many) to evaluate many against one record."""
+    return LayoutReplayer(rec, **kwargs).evaluate(turbine_xy)
+
+
+def replay_many(rec: TrajectoryRecord, layouts: Iterable, **kwargs) -> pd.DataFrame:
+    """One summary row per candidate layout (each an array of turbine positions in metres)."""
+    replayer = LayoutReplayer(rec, **kwargs)
+    rows = []
+    for k, layout in enumerate(layouts):
+        r = replayer.evaluate(layout)
+        rows.append({"layout": k, "fatalities": r.fatalities, "exposure": float(r.exposure.sum()),
+                     "displaced_fraction": r.displaced_fraction, "censored": r.censored,
+                     "needs_rerun": r.needs_rerun})
+    return pd.DataFrame(rows)
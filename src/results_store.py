@@ -0,0 +1,139 @@
+"""
+Columnar store for many simulation runs.
+
+Each run is written as small Parquet files under one hive partition per table,
+root/<table>/scenario=<s>/param_hash=<h>/replicate=<r>/part-0.parquet, for the tables
+
+    model_vars   DataCollector model variables, one row per step
+    events       one row per collision (step, month, hour, turbine)
+    curtailment  collision counts per (turbine, month, hour)
+    summary      one row per run: fatalities, final population, final collision prob
+    turbines     one row per (run, turbine): fatalities
+
+summary and turbines are the per-run reductions computed as each run lands, so the
+cross-run queries scan one row per run (or per run and turbine) and never the step-level
+tables. Partition filters are pushed down, so a query for one scenario only opens that
+scenario's files.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+TABLES = ("model_vars", "events", "curtailment", "summary", "turbines")
+EVENT_COLUMNS = ("step", "month", "hour", "turbine")
+
+
+def param_hash(params: Dict[str, Any]) -> str:
+    blob = json.dumps(params, sort_keys=True, default=repr).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([("scenario", pa.string()), ("param_hash", pa.string()),
+                                      ("replicate", pa.int64())]), flavor="hive")
+
+
+class ResultsStore:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---------------------
+    # Writing
+    # ---------------------
+    def write_run(self, scenario: str, params: Dict[str, Any], replicate: int,
+                  model_vars: pd.DataFrame, events: Optional[pd.DataFrame] = None,
+                  n_turbines: Optional[int] = None) -> str:
+        """
+        Store one run; returns its parameter hash. events has EVENT_COLUMNS (e.g. from
+        model.collision_events); n_turbines makes turbines with no collisions explicit zeros.
+        """
+        if not scenario or any(c in str(scenario) for c in "/\\="):
+            raise ValueError(f"invalid scenario name {scenario!r}")
+        h = param_hash(params)
+        with open(os.path.join(self.root, f"params-{h}.json"), "w") as f:
+            json.dump(params, f, sort_keys=True, default=repr)
+
+        events = pd.DataFrame(events if events is not None else [], columns=list(EVENT_COLUMNS)).astype(np.int64)
+        curtailment = (events.groupby(["turbine", "month", "hour"]).size().rename("collisions").reset_index()
+                       if len(events) else pd.DataFrame({c: pd.Series(dtype=np.int64)
+                                                         for c in ("turbine", "month", "hour", "collisions")}))
+        n_t = max(int(n_turbines or 0), int(events["turbine"].max()) + 1 if len(events) else 0)
+        turbines = pd.DataFrame({"turbine": np.arange(n_t, dtype=np.int64),
+                                 "fatalities": np.bincount(events["turbine"], minlength=n_t).astype(np.int64)})
+        fatalities = model_vars["Fatalities"].to_numpy(dtype=np.float64) if "Fatalities" in model_vars else np.zeros(0)
+        summary = pd.DataFrame({
+            "n_steps": [len(model_vars)],
+            "total_fatalities": [float(fatalities.sum())],
+            "annual_fatalities": [float(fatalities.mean() * 12) if len(fatalities) else 0.0],
+            "final_population": [float(model_vars["Population"].iloc[-1]) if "Population" in model_vars and len(model_vars) else np.nan],
+            "final_collision_prob": [float(model_vars["Collision_Prob"].iloc[-1]) if "Collision_Prob" in model_vars and len(model_vars) else np.nan],
+        })
+        model_vars = model_vars.reset_index(drop=True).rename_axis("step").reset_index()
+
+        for table, df in zip(TABLES, (model_vars, events, curtailment, summary, turbines)):
+            part = os.path.join(self.root, table, f"scenario={scenario}", f"param_hash={h}",
+                                f"replicate={int(replicate)}")
+            os.makedirs(part, exist_ok=True)
+            # Write then rename, so readers never see a half-written file
+            tmp = os.path.join(part, ".part-0.parquet.tmp")
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, os.path.join(part, "part-0.parquet"))
+        return h
+
+    def params(self, h: str) -> Dict[str, Any]:
+        with open(os.path.join(self.root, f"params-{h}.json")) as f:
+            return json.load(f)
+
+    # ---------------------
+    # Reading
+    # ---------------------
+    def read(self, table: str, scenarios: Optional[Iterable[str]] = None,
+             param_hashes: Optional[Iterable[str]] = None, replicates: Optional[Iterable[int]] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Rows of one table, filtered on partition keys before any file is read."""
+        import pyarrow.dataset as ds
+        if table not in TABLES:
+            raise ValueError(f"unknown table {table!r}; expected one of {TABLES}")
+        path = os.path.join(self.root, table)
+        if not os.path.isdir(path):
+            return pd.DataFrame(columns=list(columns or []))
+        dataset = ds.dataset(path, format="parquet", partitioning=_partitioning())
+        expr = None
+        for name, values in (("scenario", scenarios), ("param_hash", param_hashes), ("replicate", replicates)):
+            if values is not None:
+                term = ds.field(name).isin(list(values))
+                expr = term if expr is None else expr & term
+        return dataset.to_table(columns=list(columns) if columns else None, filter=expr).to_pandas()
+
+    def fatality_quantiles(self, q: Sequence[float] = (0.05, 0.5, 0.95), scenarios: Optional[Iterable[str]] = None,
+                           column: str = "annual_fatalities") -> pd.DataFrame:
+        """Quantiles of a summary column across runs, one row per scenario."""
+        runs = self.read("summary", scenarios=scenarios, columns=["scenario", column])
+        if not len(runs):
+            return pd.DataFrame(columns=[*q, "runs"])
+        out = runs.groupby("scenario")[column].quantile(list(q)).unstack()
+        out["runs"] = runs.groupby("scenario").size()
+        return out
+
+    def turbine_risk_ranking(self, scenarios: Optional[Iterable[str]] = None,
+                             top: Optional[int] = None) -> pd.DataFrame:
+        """Turbines ranked by mean fatalities per run, per scenario."""
+        rows = self.read("turbines", scenarios=scenarios,
+                         columns=["scenario", "param_hash", "replicate", "turbine", "fatalities"])
+        if not len(rows):
+            return pd.DataFrame(columns=["scenario", "turbine", "fatalities", "per_run", "rank"])
+        runs = rows.drop_duplicates(["scenario", "param_hash", "replicate"]).groupby("scenario").size()
+        out = rows.groupby(["scenario", "turbine"], as_index=False)["fatalities"].sum()
+        out["per_run"] = out["fatalities"] / out["scenario"].map(runs).to_numpy()
+        out = out.sort_values(["scenario", "per_run", "turbine"], ascending=[True, False, True])
+        out["rank"] = out.groupby("scenario").cumcount() + 1
+        if top is not None:
+            out = out[out["rank"] <= top]
+        return out.reset_index(drop=True)
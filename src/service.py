@@ -0,0 +1,198 @@
+"""
+Long-lived curtailment decision service.
+
+DecisionTables holds everything a decision needs, precomputed and immutable: turbine
+positions in metres with their KD-tree, the (turbine, month, hour) risk cube, the
+scheduled curtailment mask from CurtailmentOptimizer and the trigger thresholds. The
+service answers newline-delimited JSON over TCP (asyncio), one request per line:
+
+    {"op": "decide", "queries": [{"month": 7, "hour": 14, "wind_speed": 9.5,
+                                  "fixes": [[lon, lat, alt], ...], "turbines": [3, 4]}]}
+    {"op": "reload", "path": "tables.npz"}
+    {"op": "ping"}
+
+A query's turbines default to all. A turbine is curtailed when it would be generating
+(wind at or above cut-in) and either its cell is in the schedule or a recent fix lies
+within the trigger radius inside the blade-swept height band. Queries in a request are
+evaluated together: one projection and one KD-tree lookup for all their fixes.
+
+reload builds the new tables off the event loop and swaps one reference; requests
+already running keep the tables they started with, so none are dropped.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config import BSA_HEIGHT, COLLISION_RADIUS, WIND_THRESHOLD
+from src.spatial import KM, SpatialLayer
+
+STREAM_LIMIT = 2 ** 24  # longest request/reply line (bytes); a batch of queries is one line
+
+
+class DecisionTables:
+    def __init__(self, turbine_lonlat, risk: np.ndarray, curtail: Optional[np.ndarray] = None,
+                 epsg: Optional[int] = None, radius_m: float = COLLISION_RADIUS * KM,
+                 bsa=BSA_HEIGHT, cut_in: float = WIND_THRESHOLD, version: str = ""):
+        self.turbine_lonlat = np.asarray(turbine_lonlat, dtype=np.float64).reshape(-1, 2)
+        self.spatial = SpatialLayer(epsg) if epsg else SpatialLayer.for_lonlat(self.turbine_lonlat[:, 0],
+                                                                               self.turbine_lonlat[:, 1])
+        self.turbine_xy = self.spatial.project(self.turbine_lonlat)
+        self.tree = SpatialLayer.kdtree(self.turbine_xy)
+        n_t = len(self.turbine_lonlat)
+        self.risk = np.asarray(risk, dtype=np.float64).reshape(n_t, 12, 24)
+        self.curtail = (np.zeros((n_t, 12, 24), dtype=bool) if curtail is None
+                        else np.asarray(curtail, dtype=bool).reshape(n_t, 12, 24))
+        self.radius_m = float(radius_m)
+        self.bsa = (float(bsa[0]), float(bsa[1]))
+        self.cut_in = float(cut_in)
+        self.version = version
+        for a in (self.risk, self.curtail, self.turbine_xy):
+            a.setflags(write=False)
+
+    @classmethod
+    def from_files(cls, turbine_file: str, weather_file: str, risk: np.ndarray,
+                   cap: Optional[float] = None, **kwargs) -> "DecisionTables":
+        """Schedule from CurtailmentOptimizer on the weather's energy cube when a fatality cap is given."""
+        import geopandas as gpd
+        turbines = gpd.read_file(turbine_file).to_crs("EPSG:4326")
+        lonlat = np.column_stack([turbines.geometry.x, turbines.geometry.y])
+        curtail = None
+        if cap is not None:
+            from data.weather_core import open_weather
+            from src.curtailment import CurtailmentOptimizer, energy_cube
+            with open_weather(weather_file, access="timeseries") as ds:
+                energy = energy_cube(ds["wind_speed"], lonlat)
+            curtail = CurtailmentOptimizer(energy, risk).for_cap(cap).mask
+        return cls(lonlat, risk, curtail, **kwargs)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, turbine_lonlat=self.turbine_lonlat, risk=self.risk, curtail=self.curtail,
+                            meta=np.array([self.spatial.epsg, self.radius_m, *self.bsa, self.cut_in]),
+                            version=np.array(self.version))
+
+    @classmethod
+    def load(cls, path: str) -> "DecisionTables":
+        with np.load(path) as z:
+            epsg, radius_m, lo, hi, cut_in = z["meta"]
+            return cls(z["turbine_lonlat"], z["risk"], z["curtail"], epsg=int(epsg), radius_m=radius_m,
+                       bsa=(lo, hi), cut_in=cut_in, version=str(z["version"]))
+
+    def _cells(self, q: Dict[str, Any]):
+        """(turbine indices, month row, hour) of a query; out-of-range values raise ValueError."""
+        n_t = len(self.turbine_lonlat)
+        t = np.arange(n_t) if q.get("turbines") is None else np.asarray(q["turbines"], dtype=np.int64).reshape(-1)
+        if ((t < 0) | (t >= n_t)).any():
+            raise ValueError(f"turbine ids must be in 0..{n_t - 1}, got {t[(t < 0) | (t >= n_t)].tolist()}")
+        month = int(q["month"])
+        if not 1 <= month <= 12:
+            raise ValueError(f"month must be in 1..12, got {month}")
+        return t, month - 1, int(q["hour"]) % 24
+
+    def decide(self, queries: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Batched decisions; one result per query with per-turbine lists."""
+        n_q, n_t = len(queries), len(self.turbine_lonlat)
+        for q in queries:  # reject the batch before any work if a query is malformed
+            self._cells(q)
+        # All fixes of the batch in the blade-swept band, tagged with their query
+        owner, fixes = [], []
+        for i, q in enumerate(queries):
+            f = q.get("fixes") or []
+            fixes.extend(f); owner.extend([i] * len(f))
+        near = np.zeros((n_q, n_t), dtype=np.int64)
+        if fixes and self.tree is not None:
+            fixes = np.asarray(fixes, dtype=np.float64).reshape(-1, 3)
+            owner = np.asarray(owner, dtype=np.int64)
+            band = (fixes[:, 2] >= self.bsa[0]) & (fixes[:, 2] <= self.bsa[1])
+            if band.any():
+                xy = self.spatial.project(fixes[band, :2])
+                hits = self.tree.query_ball_point(xy, self.radius_m, return_sorted=False)
+                counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+                if counts.sum():
+                    turbine = np.concatenate([np.asarray(h, dtype=np.int64) for h in hits if h])
+                    q_of = np.repeat(owner[band], counts)
+                    near = np.bincount(q_of * n_t + turbine, minlength=n_q * n_t).reshape(n_q, n_t)
+
+        results = []
+        for i, q in enumerate(queries):
+            t, m, h = self._cells(q)
+            spinning = float(q.get("wind_speed", self.cut_in)) >= self.cut_in
+            scheduled = self.curtail[t, m, h]
+            birds = near[i, t]
+            curtail = spinning & (scheduled | (birds > 0))
+            results.append({"turbines": t.tolist(), "curtail": curtail.tolist(),
+                            "scheduled": scheduled.tolist(), "birds_near": birds.tolist(),
+                            "risk": self.risk[t, m, h].tolist()})
+        return results
+
+
+class DecisionService:
+    def __init__(self, tables: DecisionTables):
+        self.tables = tables
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def reload(self, path: str) -> str:
+        loop = asyncio.get_running_loop()
+        tables = await loop.run_in_executor(None, DecisionTables.load, path)
+        self.tables = tables  # single reference swap; in-flight requests keep the old tables
+        return tables.version
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op", "decide")
+        if op == "decide":
+            tables = self.tables
+            t0 = time.perf_counter()
+            results = tables.decide(request.get("queries", []))
+            return {"results": results, "version": tables.version,
+                    "elapsed_us": round((time.perf_counter() - t0) * 1e6, 1)}
+        if op == "reload":
+            return {"version": await self.reload(request["path"])}
+        if op == "ping":
+            return {"version": self.tables.version, "requests": self.requests}
+        raise ValueError(f"unknown op {op!r}")
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    reply = await self.handle(json.loads(line))
+                except Exception as exc:  # report and keep the connection open
+                    reply = {"error": f"{type(exc).__name__}: {exc}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # client went away, or the server is shutting down with the client connected
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8766) -> int:
+        """Start listening; returns the bound port (useful with port=0)."""
+        self._server = await asyncio.start_server(self._client, host, port, limit=STREAM_LIMIT)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8766) -> None:
+        await self.start(host, port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Curtailment decision service (JSON lines over TCP)")
+    parser.add_argument("tables", help="DecisionTables .npz")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    asyncio.run(DecisionService(DecisionTables.load(args.tables)).serve_forever(args.host, args.port))
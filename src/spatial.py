@@ -0,0 +1,57 @@
+"""
+Projected (metric) spatial layer.
+
+Every model input is reprojected once from WGS84 into the study area's UTM zone, so all
+positions, KD-trees and radii are in metres and every hot-path distance test is a plain
+Euclidean comparison. Transformers are cached per CRS pair.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+KM = 1000.0  # config ranges and buffers are in km
+
+
+@lru_cache(maxsize=None)
+def transformer(src_crs: str, dst_crs: str):
+    from pyproj import Transformer
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+class SpatialLayer:
+    """WGS84 <-> UTM conversions for one study area; arrays in, arrays out."""
+
+    def __init__(self, epsg: int):
+        self.epsg = int(epsg)
+        self.crs = f"EPSG:{self.epsg}"
+
+    @classmethod
+    def for_lonlat(cls, lon, lat) -> "SpatialLayer":
+        """UTM zone of the centre of the given points."""
+        from data.utils import utm_epsg_from_lonlat  # deferred: data.utils pulls in numba
+        lon = np.asarray(lon, dtype=np.float64); lat = np.asarray(lat, dtype=np.float64)
+        return cls(utm_epsg_from_lonlat(float(np.mean(lon)), float(np.mean(lat))))
+
+    def to_xy(self, lon, lat) -> Tuple[np.ndarray, np.ndarray]:
+        x, y = transformer("EPSG:4326", self.crs).transform(np.asarray(lon, dtype=np.float64),
+                                                            np.asarray(lat, dtype=np.float64))
+        return np.asarray(x), np.asarray(y)
+
+    def to_lonlat(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        lon, lat = transformer(self.crs, "EPSG:4326").transform(np.asarray(x, dtype=np.float64),
+                                                                np.asarray(y, dtype=np.float64))
+        return np.asarray(lon), np.asarray(lat)
+
+    def project(self, lonlat) -> np.ndarray:
+        """(N, 2) lon/lat -> (N, 2) x/y metres."""
+        lonlat = np.asarray(lonlat, dtype=np.float64).reshape(-1, 2)
+        if not len(lonlat):
+            return np.empty((0, 2))
+        return np.column_stack(self.to_xy(lonlat[:, 0], lonlat[:, 1]))
+
+    @staticmethod
+    def kdtree(points_xy: np.ndarray):
+        points_xy = np.asarray(points_xy, dtype=np.float64).reshape(-1, 2)
+        return cKDTree(points_xy) if len(points_xy) else None
@@ -0,0 +1,157 @@
+"""
+Uniform-grid spatial hash (cell list) for fixed-radius neighbour queries.
+
+Points are binned into square cells, sorted by cell key and indexed by per-cell
+offsets, so a rebuild is one sort and a query touches only the cells overlapping the
+search disk. Queries are batched: query points are expanded against their candidate
+cells one cell offset at a time, so cost is linear in the number of candidate pairs, not
+N^2, and memory stays bounded.
+
+count_within needs only how many points are near, not which: co-located points (agents
+share graph nodes) are collapsed to distinct positions weighted by multiplicity and
+binned on a finer grid of radius / COUNT_SPLIT cells. Cells wholly inside the search
+disk add their totals directly; only cells straddling its edge are expanded into pairs,
+so the work grows with the points near the disk boundary, not with all neighbours.
+"""
+from typing import Iterator, Tuple
+
+import numpy as np
+
+COUNT_SPLIT = 8  # count_within cells per search radius
+
+class SpatialHash:
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self.points = np.empty((0, 2))
+        self._origin = np.zeros(2)
+        self._nx = self._ny = 1
+        self._slot_of = None  # dense cell key -> slot table when the grid is small
+        self._order = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)    # occupied cell keys, sorted
+        self._starts = np.empty(0, dtype=np.int64)  # offsets into _order, one per key (+ end)
+        self._distinct = None  # (distinct points, multiplicity), computed by count_within
+
+    def build(self, points: np.ndarray) -> "SpatialHash":
+        """(Re)index points (N, 2); returns self."""
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self._distinct = None
+        if not len(self.points):
+            self._order = np.empty(0, dtype=np.int64)
+            self._keys = np.empty(0, dtype=np.int64)
+            self._starts = np.zeros(1, dtype=np.int64)
+            self._slot_of = None
+            return self
+        self._origin = self.points.min(axis=0)
+        cells = self._cells(self.points)
+        self._nx = int(cells[:, 0].max()) + 1
+        self._ny = int(cells[:, 1].max()) + 1
+        key = cells[:, 0] * self._ny + cells[:, 1]
+        self._order = np.argsort(key, kind="stable")
+        sorted_key = key[self._order]
+        self._keys, first = np.unique(sorted_key, return_index=True)
+        self._starts = np.append(first, len(sorted_key)).astype(np.int64)
+        self._slot_of = None
+        if self._nx * self._ny <= max(4 * len(self.points), 1 << 20):
+            self._slot_of = np.full(self._nx * self._ny, -1, dtype=np.int64)
+            self._slot_of[self._keys] = np.arange(len(self._keys))
+        return self
+
+    def _cells(self, pts: np.ndarray) -> np.ndarray:
+        return np.floor((pts - self._origin) / self.cell_size).astype(np.int64)
+
+    def _cell_hits(self, qcell: np.ndarray, dx: int, dy: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Queries whose cell shifted by (dx, dy) is occupied, and that cell's slot in _keys."""
+        cx = qcell[:, 0] + dx
+        cy = qcell[:, 1] + dy
+        valid = (cx >= 0) & (cx < self._nx) & (cy >= 0) & (cy < self._ny)
+        key = np.where(valid, cx * self._ny + cy, -1)
+        if self._slot_of is not None:
+            slot = np.where(valid, self._slot_of[np.maximum(key, 0)], -1)
+            q = np.nonzero(slot >= 0)[0]
+        else:
+            slot = np.minimum(np.searchsorted(self._keys, key), len(self._keys) - 1)
+            q = np.nonzero(valid & (self._keys[slot] == key))[0]
+        return q, slot[q]
+
+    def _pair_blocks(self, queries: np.ndarray, radius: float, chunk: int,
+                     offsets=None) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        # Candidates are expanded per (query chunk, cell offset), so memory is bounded by
+        # chunk x cell occupancy rather than by the total number of candidate pairs
+        reach = int(np.ceil(radius / self.cell_size))
+        if offsets is None:
+            offsets = [(dx, dy) for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)]
+        for q0 in range(0, len(queries), chunk):
+            qpts = queries[q0:q0 + chunk]
+            qcell = self._cells(qpts)
+            for dx, dy in offsets:
+                q, slot = self._cell_hits(qcell, dx, dy)
+                if not len(q):
+                    continue
+                lo = self._starts[slot]
+                n = self._starts[slot + 1] - lo
+                # Expand each query's cell range into candidate pairs
+                rep_q = np.repeat(q, n)
+                offs = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n)
+                pj = self._order[np.repeat(lo, n) + offs]
+                d = np.sqrt(((qpts[rep_q] - self.points[pj]) ** 2).sum(axis=1))
+                keep = d <= radius
+                yield rep_q[keep] + q0, pj[keep], d[keep]
+
+    def query_pairs(self, queries: np.ndarray, radius: float,
+                    chunk: int = 16384) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All (query index, point index, distance) with distance <= radius, in no
+        particular order. Query points need not be the indexed points.
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        parts = list(self._pair_blocks(queries, radius, chunk)) if len(queries) and len(self._keys) else []
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        qi, pj, d = (np.concatenate(x) for x in zip(*parts))
+        return qi, pj, d
+
+    def count_within(self, queries: np.ndarray, radius: float, exclude_self: bool = False,
+                     chunk: int = 16384) -> np.ndarray:
+        """
+        Number of indexed points within radius of each query. With exclude_self the
+        queries are taken to be the indexed points themselves and each drops itself.
+        Pairs are counted as they are found and never stored.
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        counts = np.zeros(len(queries), dtype=np.int64)
+        if not len(queries) or not len(self._keys):
+            return counts
+        if self._distinct is None:
+            distinct, multiplicity = np.unique(self.points, axis=0, return_counts=True)
+            self._distinct = (distinct, multiplicity.astype(np.float64))
+        distinct, multiplicity = self._distinct
+        where, inverse = np.unique(queries, axis=0, return_inverse=True)
+        if radius <= 0:
+            index = SpatialHash(self.cell_size).build(distinct)
+            inner, edge = [], None
+        else:
+            index = SpatialHash(radius / COUNT_SPLIT).build(distinct)
+            # Offsets whose cell lies wholly inside / partly inside the disk of any query in cell (0, 0)
+            inner, edge = [], []
+            for dx in range(-COUNT_SPLIT - 1, COUNT_SPLIT + 2):
+                for dy in range(-COUNT_SPLIT - 1, COUNT_SPLIT + 2):
+                    if np.hypot(abs(dx) + 1, abs(dy) + 1) * index.cell_size <= radius:
+                        inner.append((dx, dy))
+                    elif np.hypot(max(abs(dx) - 1, 0), max(abs(dy) - 1, 0)) * index.cell_size <= radius:
+                        edge.append((dx, dy))
+        cell_total = np.add.reduceat(multiplicity[index._order], index._starts[:-1])
+
+        total = np.zeros(len(where))
+        for q0 in range(0, len(where), chunk):
+            qcell = index._cells(where[q0:q0 + chunk])
+            for dx, dy in inner:
+                q, slot = index._cell_hits(qcell, dx, dy)
+                total[q0 + q] += cell_total[slot]
+        for qi, pj, _ in index._pair_blocks(where, radius, chunk, edge):
+            total += np.bincount(qi, weights=multiplicity[pj], minlength=len(where))
+        counts = np.rint(total).astype(np.int64)[inverse.ravel()]
+        if exclude_self:
+            counts -= 1
+        return counts
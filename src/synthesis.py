@@ -0,0 +1,72 @@
+"""
+Population synthesis from GPS telemetry.
+
+The tagged birds are a sample of the population, not the population: a run with
+NUM_HARRIERS birds needs start positions, stages and nests for many more agents than
+there are tracks. PopulationSynthesizer keeps, from the telemetry, each tagged bird's
+first fix and breeding flag and the projected positions of all fixes. sample(n) returns
+the tagged birds first (at their first fix, with their own flags), then n - tagged
+further birds starting at fixes drawn uniformly from the tracks, breeding with the
+tagged birds' breeding ratio. Breeders get a nest and a breeding month drawn uniformly,
+and every bird a starting height, as HarrierAgent.__init__ would draw them.
+
+Everything comes back as arrays, so HarrierAgent.bulk builds 10^5 agents in a fraction
+of a second and HarrierModel registers them with the scheduler and space in one update.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.config import BREEDING_MONTHS
+
+DEFAULT_BREEDING_FRACTION = 0.12  # used when the telemetry carries no breeding flags
+
+
+class PopulationSynthesizer:
+    def __init__(self, start_xy: np.ndarray, breeding: np.ndarray, fix_xy: Optional[np.ndarray] = None):
+        """
+        start_xy/breeding describe the tagged birds (first fix in metres, breeding flag);
+        fix_xy are all their fixes (default: the start positions).
+        """
+        self.start_xy = np.asarray(start_xy, dtype=np.float64).reshape(-1, 2)
+        self.breeding = np.asarray(breeding, dtype=bool).reshape(-1)
+        self.fix_xy = self.start_xy if fix_xy is None else np.asarray(fix_xy, dtype=np.float64).reshape(-1, 2)
+        self.breeding_fraction = float(self.breeding.mean()) if len(self.breeding) else DEFAULT_BREEDING_FRACTION
+
+    @classmethod
+    def from_gps(cls, agents_df, telemetry, spatial) -> "PopulationSynthesizer":
+        """From process_gps_data's per-bird table and the telemetry it was built from."""
+        n = len(agents_df)
+        start_xy = spatial.project([(p.x, p.y) for p in agents_df["initial_pos"]]) if n else np.empty((0, 2))
+        if "breeding" in agents_df:
+            breeding = agents_df["breeding"].to_numpy(dtype=bool)
+        else:
+            breeding = np.arange(n) < int(DEFAULT_BREEDING_FRACTION * n)
+        x, y = spatial.to_xy(telemetry["lon"].to_numpy(), telemetry["lat"].to_numpy())
+        return cls(start_xy, breeding, np.column_stack([x, y]))
+
+    @property
+    def extent_xy(self) -> np.ndarray:
+        """Every position sample() can return, for sizing the model's space."""
+        return np.vstack([self.start_xy, self.fix_xy])
+
+    def sample(self, n: Optional[int], rng: np.random.Generator, n_nests: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Arrays for n agents (the tagged birds when n is None): xy (n, 2), breeding, nest
+        (index into n_nests nests, -1 for none), breeding_month (0 for non-breeders) and
+        height.
+        """
+        tagged = len(self.start_xy)
+        n = tagged if n is None else int(n)
+        keep = min(n, tagged)
+        extra = n - keep
+        if extra and not len(self.fix_xy):
+            raise ValueError("no GPS fixes to draw start positions from")
+        xy = np.vstack([self.start_xy[:keep], self.fix_xy[rng.integers(len(self.fix_xy), size=extra)]])
+        breeding = np.concatenate([self.breeding[:keep], rng.random(extra) < self.breeding_fraction])
+        nest = np.full(n, -1, dtype=np.int64)
+        if n_nests:
+            nest[breeding] = rng.integers(n_nests, size=int(breeding.sum()))
+        breeding_month = np.where(breeding, rng.choice(BREEDING_MONTHS, size=n), 0)
+        return {"xy": xy, "breeding": breeding, "nest": nest, "breeding_month": breeding_month,
+                "height": rng.uniform(0.0, 100.0, size=n)}
@@ -0,0 +1,125 @@
+"""
+GPS telemetry ingestion.
+
+Fixes are read from CSV (chunked) or Parquet (a file or a hive-partitioned directory, as
+written by generate_harrier_gps_parquet) with compact dtypes: float32 coordinates and
+kinematics, categorical harrier ids and datetime64 timestamps. Row filters (speed, altitude
+band) are applied while reading, so only the retained rows of the requested columns are
+ever held in memory.
+"""
+import os
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import BSA_HEIGHT
+
+MAX_SPEED = 20.0
+
+# Columns needed by each consumer
+TRACK_COLUMNS = ("harrier_id", "timestamp", "lat", "lon")
+BSA_COLUMNS = ("lon", "lat", "alt")
+
+_FLOAT_COLUMNS = ("lat", "lon", "alt", "speed", "elev_m", "slope_deg", "alt_agl")
+
+
+def _is_parquet(path: str) -> bool:
+    return os.path.isdir(path) or os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        if col in _FLOAT_COLUMNS:
+            df[col] = df[col].astype(np.float32)
+        elif col == "harrier_id":
+            df[col] = df[col].astype(np.int32)
+        elif col == "timestamp" and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format="ISO8601")
+    return df
+
+
+def _row_mask(df: pd.DataFrame, max_speed: Optional[float],
+              alt_range: Optional[Tuple[float, float]]) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    if max_speed is not None:
+        mask &= df["speed"].to_numpy() < max_speed
+    if alt_range is not None:
+        alt = df["alt"].to_numpy()
+        mask &= (alt >= alt_range[0]) & (alt <= alt_range[1])
+    return mask
+
+
+def _csv_chunks(path: str, read_cols: Sequence[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    dtypes = {c: np.float32 for c in read_cols if c in _FLOAT_COLUMNS}
+    if "harrier_id" in read_cols:
+        dtypes["harrier_id"] = np.int32
+    yield from pd.read_csv(path, usecols=list(read_cols), dtype=dtypes, chunksize=chunksize)
+
+
+def _parquet_chunks(path: str, read_cols: Sequence[str], max_speed: Optional[float],
+                    alt_range: Optional[Tuple[float, float]], chunksize: int) -> Iterator[pd.DataFrame]:
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    expr = None
+    if max_speed is not None:
+        expr = ds.field("speed") < max_speed
+    if alt_range is not None:
+        band = (ds.field("alt") >= alt_range[0]) & (ds.field("alt") <= alt_range[1])
+        expr = band if expr is None else expr & band
+    for batch in dataset.to_batches(columns=list(read_cols), filter=expr, batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def iter_telemetry(path: str, columns: Optional[Iterable[str]] = None,
+                   max_speed: Optional[float] = MAX_SPEED,
+                   alt_range: Optional[Tuple[float, float]] = None,
+                   chunksize: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """
+    Yield filtered, compact chunks of at most chunksize fixes with only `columns`
+    (all columns when None). max_speed keeps speed < max_speed; alt_range keeps
+    alt within the closed band. For Parquet the filters are pushed down to the scan.
+    """
+    columns = list(columns) if columns is not None else None
+    parquet = _is_parquet(path)
+    if columns is None:
+        if parquet:
+            import pyarrow.dataset as ds
+            columns = ds.dataset(path, format="parquet", partitioning="hive").schema.names
+        else:
+            columns = list(pd.read_csv(path, nrows=0).columns)
+    filter_cols = (["speed"] if max_speed is not None else []) + (["alt"] if alt_range is not None else [])
+    read_cols = list(dict.fromkeys(columns + filter_cols))
+
+    if parquet:
+        chunks = _parquet_chunks(path, read_cols, max_speed, alt_range, chunksize)
+    else:
+        chunks = (df[_row_mask(df, max_speed, alt_range)]
+                  for df in _csv_chunks(path, read_cols, chunksize))
+    for df in chunks:
+        yield _compact(df[columns].reset_index(drop=True))
+
+
+def read_telemetry(path: str, columns: Optional[Iterable[str]] = None,
+                   max_speed: Optional[float] = MAX_SPEED,
+                   alt_range: Optional[Tuple[float, float]] = None,
+                   chunksize: int = 1_000_000) -> pd.DataFrame:
+    """
+    Load telemetry into one compact DataFrame (see iter_telemetry); harrier_id becomes
+    categorical. Peak memory is the retained rows plus one chunk.
+    """
+    frames = list(iter_telemetry(path, columns, max_speed, alt_range, chunksize))
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = _compact(pd.DataFrame({c: pd.Series(dtype=np.float64) for c in (columns or TRACK_COLUMNS)}))
+    if "harrier_id" in df.columns:
+        df["harrier_id"] = df["harrier_id"].astype("category")
+    return df
+
+
+def bsa_view(telemetry: pd.DataFrame, alt_range: Tuple[float, float] = BSA_HEIGHT) -> pd.DataFrame:
+    """Fixes inside the blade-swept altitude band, reduced to the Bayesian update's columns."""
+    alt = telemetry["alt"].to_numpy()
+    mask = (alt >= alt_range[0]) & (alt <= alt_range[1])
+    return telemetry.loc[mask, list(BSA_COLUMNS)].reset_index(drop=True)
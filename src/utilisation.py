@@ -0,0 +1,132 @@
+"""
+Streaming utilisation-distribution rasters.
+
+UtilisationRaster counts agent-steps per pixel on the DEM's grid (same transform, CRS
+and shape), optionally split by calendar month and by flight-height band, in one
+(months, bands, rows, cols) int32 array. Each step adds the alive agents with a single
+np.add.at; agents sitting on graph nodes are binned through a node -> pixel table built
+once, so only agents off the graph are reprojected. Rasters from replicates or worker
+processes merge by addition (save/load as .npz to move them between processes), and
+export as a multi-band GeoTIFF aligned to the DEM, one band per (month, height band).
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+from affine import Affine
+
+from src.spatial import transformer
+
+
+class UtilisationRaster:
+    def __init__(self, shape, transform: Affine, crs: Optional[str], source_crs: str,
+                 by_month: bool = False, height_bands: Optional[Sequence[float]] = None):
+        """
+        shape/transform/crs describe the target grid (e.g. the DEM's); source_crs is the
+        CRS of the positions passed to add (the model's UTM zone). height_bands are band
+        edges in metres, e.g. (0, 30, 130, inf); heights outside them are not counted.
+        """
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.transform = Affine(*tuple(transform)[:6])
+        self.crs = crs
+        self.source_crs = source_crs
+        self.by_month = bool(by_month)
+        self.height_bands = None if height_bands is None else np.asarray(height_bands, dtype=np.float64)
+        n_bands = 1 if self.height_bands is None else len(self.height_bands) - 1
+        self.counts = np.zeros((12 if self.by_month else 1, n_bands, *self.shape), dtype=np.int32)
+        self.steps = 0
+        self.outside = 0  # agent-steps that fell off the grid or outside every height band
+        self._inverse = ~self.transform
+
+    @classmethod
+    def for_dem(cls, dem, source_crs: str, **kwargs) -> "UtilisationRaster":
+        """Aligned to a DemSampler's grid."""
+        return cls(dem.elevation.shape, dem.transform, dem.crs or "EPSG:4326", source_crs, **kwargs)
+
+    def locate(self, xy: np.ndarray) -> np.ndarray:
+        """Flat pixel index (row * width + col) of (N, 2) source-CRS positions; -1 off the grid."""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        x, y = xy[:, 0], xy[:, 1]
+        if self.crs is not None and self.crs != self.source_crs:
+            x, y = transformer(self.source_crs, self.crs).transform(x, y)
+        col, row = self._inverse @ (np.asarray(x), np.asarray(y))
+        col = np.floor(np.asarray(col)).astype(np.int64)
+        row = np.floor(np.asarray(row)).astype(np.int64)
+        h, w = self.shape
+        return np.where((row >= 0) & (row < h) & (col >= 0) & (col < w), row * w + col, -1)
+
+    def add(self, pixel: np.ndarray, height: Optional[np.ndarray] = None, month: int = 1) -> None:
+        """Count one step of agents at flat pixel indices (from locate); -1 entries are skipped."""
+        pixel = np.asarray(pixel, dtype=np.int64)
+        keep = pixel >= 0
+        band = np.zeros(len(pixel), dtype=np.int64)
+        if self.height_bands is not None:
+            band = np.searchsorted(self.height_bands, np.asarray(height, dtype=np.float64), side="right") - 1
+            keep &= (band >= 0) & (band < self.counts.shape[1])
+        layer = (month - 1 if self.by_month else 0) * self.counts.shape[1] + band[keep]
+        np.add.at(self.counts.reshape(-1), layer * (self.shape[0] * self.shape[1]) + pixel[keep], 1)
+        self.outside += int(len(pixel) - keep.sum())
+        self.steps += 1
+
+    # ---------------------
+    # Combining and export
+    # ---------------------
+    def _check_compatible(self, other: "UtilisationRaster") -> None:
+        same = (self.counts.shape == other.counts.shape and self.transform == other.transform
+                and self.crs == other.crs and
+                (self.height_bands is None) == (other.height_bands is None) and
+                (self.height_bands is None or np.array_equal(self.height_bands, other.height_bands)))
+        if not same:
+            raise ValueError("utilisation rasters are on different grids, bands or month splits")
+
+    def merge(self, *others: "UtilisationRaster") -> "UtilisationRaster":
+        """Add other rasters' counts into this one (replicates, worker processes); returns self."""
+        for other in others:
+            self._check_compatible(other)
+            self.counts += other.counts
+            self.steps += other.steps
+            self.outside += other.outside
+        return self
+
+    def density(self) -> np.ndarray:
+        """Counts normalised to sum to one per (month, band) layer; all-zero layers stay zero."""
+        total = self.counts.sum(axis=(2, 3), keepdims=True, dtype=np.int64)
+        return np.divide(self.counts, total, out=np.zeros(self.counts.shape), where=total > 0)
+
+    def band_names(self):
+        months = [f"month{m:02d}" for m in range(1, 13)] if self.by_month else ["all"]
+        if self.height_bands is None:
+            bands = ["all"]
+        else:
+            edges = self.height_bands
+            bands = [f"{edges[k]:g}-{edges[k + 1]:g}m" for k in range(len(edges) - 1)]
+        return [f"{m}_{b}" for m in months for b in bands]
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, counts=self.counts, transform=np.array(tuple(self.transform)[:6]),
+                            crs=np.array(self.crs or ""), source_crs=np.array(self.source_crs),
+                            height_bands=np.array([]) if self.height_bands is None else self.height_bands,
+                            tallies=np.array([self.steps, self.outside], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path: str) -> "UtilisationRaster":
+        with np.load(path) as z:
+            counts = z["counts"]
+            bands = z["height_bands"]
+            raster = cls(counts.shape[2:], Affine(*z["transform"]), str(z["crs"]) or None, str(z["source_crs"]),
+                         by_month=counts.shape[0] == 12, height_bands=bands if len(bands) else None)
+            raster.counts[...] = counts
+            raster.steps, raster.outside = (int(v) for v in z["tallies"])
+        return raster
+
+    def to_geotiff(self, path: str, normalise: bool = False) -> None:
+        """One band per (month, height band) layer on the DEM grid; int32 counts or float32 densities."""
+        import rasterio
+        data = self.density().astype(np.float32) if normalise else self.counts
+        layers = data.reshape(-1, *self.shape)
+        profile = dict(driver="GTiff", height=self.shape[0], width=self.shape[1], count=len(layers),
+                       dtype="float32" if normalise else "int32", crs=self.crs, transform=self.transform,
+                       tiled=True, compress="deflate")
+        with rasterio.open(path, "w", **profile) as dst:
+            for k, (layer, name) in enumerate(zip(layers, self.band_names()), start=1):
+                dst.write(layer, k)
+                dst.set_band_description(k, name)
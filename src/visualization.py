@@ -4,10 +4,10 @@ import matplotlib.pyplot as plt
 @solara.component
 def HarrierVisualization(model):
     fig, ax = plt.subplots(figsize=(8, 8))
-    ax.set_xlim(0, GRID_SIZE)
-    ax.set_ylim(0, GRID_SIZE)
-    ax.set_xlabel("Longitude")
-    ax.set_ylabel("Latitude")
+    ax.set_xlim(model.space.x_min, model.space.x_max)
+    ax.set_ylim(model.space.y_min, model.space.y_max)
+    ax.set_xlabel(f"Easting (m, {model.spatial.crs})")
+    ax.set_ylabel("Northing (m)")
     ax.set_title(f"Black Harrier Simulation (Month {model.month})")
    
     # Plot harriers
@@ -0,0 +1,143 @@
+"""
+Waypoint extraction from GPS fixes.
+
+Fixes are projected to local metres (equirectangular about the mean latitude) and
+pre-binned on a square grid; DBSCAN then runs on the occupied bin centroids weighted by
+their fix counts, so cost scales with the number of occupied bins rather than fixes.
+Labels are broadcast back to fixes and waypoints are the mean lat/lon of member fixes.
+Results are cached on disk keyed by a hash of the inputs and parameters.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from src.config import WAYPOINT_EPS_M, WAYPOINT_MIN_SAMPLES
+
+EARTH_RADIUS_M = 6_371_008.8
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "harrier_waypoints")
+
+
+def _local_metres(lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lat0 = np.deg2rad(np.mean(lat)) if len(lat) else 0.0
+    x = EARTH_RADIUS_M * np.cos(lat0) * np.deg2rad(lon)
+    y = EARTH_RADIUS_M * np.deg2rad(lat)
+    return x, y
+
+
+def _cache_key(lat: np.ndarray, lon: np.ndarray, *params) -> str:
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(lon, dtype=np.float64).tobytes())
+    h.update(repr(params).encode())
+    return h.hexdigest()
+
+
+def cluster_waypoints(lat, lon, eps_m: float = WAYPOINT_EPS_M,
+                      min_samples: int = WAYPOINT_MIN_SAMPLES,
+                      bin_m: Optional[float] = None, metric: str = "euclidean",
+                      cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster fixes into waypoints.
+
+    Returns (waypoints, labels): waypoints is (K, 2) [lat, lon] cluster means and labels is
+    the per-fix cluster index (-1 for noise). bin_m defaults to eps_m / 4, which bounds the
+    neighbourhood error by the bin diagonal. metric="haversine" clusters bin centroids with
+    a ball tree on great-circle distance instead of the local planar projection.
+    Pass cache_dir=None to disable the on-disk cache.
+    """
+    lat = np.asarray(lat, dtype=np.float64); lon = np.asarray(lon, dtype=np.float64)
+    bin_m = float(bin_m or eps_m / 4.0)
+
+    cache_path = None
+    if cache_dir:
+        key = _cache_key(lat, lon, eps_m, min_samples, bin_m, metric)
+        cache_path = os.path.join(cache_dir, f"{key}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as z:
+                return z["waypoints"], z["labels"]
+
+    if len(lat) == 0:
+        return np.empty((0, 2)), np.empty(0, dtype=np.int64)
+    from sklearn.cluster import DBSCAN
+
+    x, y = _local_metres(lat, lon)
+    ix = np.floor((x - x.min()) / bin_m).astype(np.int64)
+    iy = np.floor((y - y.min()) / bin_m).astype(np.int64)
+    _, inverse, counts = np.unique(ix * (iy.max() + 1) + iy, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+
+    if metric == "haversine":
+        c_lat = np.bincount(inverse, weights=lat) / counts
+        c_lon = np.bincount(inverse, weights=lon) / counts
+        db = DBSCAN(eps=eps_m / EARTH_RADIUS_M, min_samples=min_samples,
+                    metric="haversine", algorithm="ball_tree")
+        bin_labels = db.fit_predict(np.deg2rad(np.column_stack([c_lat, c_lon])), sample_weight=counts)
+    elif metric == "euclidean":
+        cx = np.bincount(inverse, weights=x) / counts
+        cy = np.bincount(inverse, weights=y) / counts
+        db = DBSCAN(eps=eps_m, min_samples=min_samples)
+        bin_labels = db.fit_predict(np.column_stack([cx, cy]), sample_weight=counts)
+    else:
+        raise ValueError(f"Unknown metric: {metric!r}")
+
+    labels = bin_labels[inverse].astype(np.int64)
+    k = int(labels.max()) + 1
+    member = labels >= 0
+    size = np.bincount(labels[member], minlength=k)
+    waypoints = np.column_stack([
+        np.bincount(labels[member], weights=lat[member], minlength=k) / np.maximum(size, 1),
+        np.bincount(labels[member], weights=lon[member], minlength=k) / np.maximum(size, 1),
+    ]) if k else np.empty((0, 2))
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache_path + f".{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp, waypoints=waypoints, labels=labels)
+        os.replace(tmp, cache_path)
+    return waypoints, labels
+
+
+def nearest_waypoint(waypoints: np.ndarray, x, y) -> np.ndarray:
+    """Index of the nearest waypoint for each fix; waypoints (W, 2) in the same units as x/y."""
+    tree = cKDTree(np.asarray(waypoints, dtype=np.float64))
+    _, idx = tree.query(np.column_stack([np.asarray(x, dtype=np.float64),
+                                         np.asarray(y, dtype=np.float64)]))
+    return idx.astype(np.int64)
+
+
+def transition_counts(month, start, end, n_waypoints: int) -> np.ndarray:
+    """(12, W, W) counts of start -> end waypoint transitions per calendar month."""
+    counts = np.zeros((12, n_waypoints, n_waypoints), dtype=np.int64)
+    np.add.at(counts, (np.asarray(month) - 1, np.asarray(start), np.asarray(end)), 1)
+    return counts
+
+
+def transition_probs_dict(counts: np.ndarray) -> Dict[Tuple[int, int, int], float]:
+    """Row-normalise (12, W, W) counts into the model's {(month, i, j): p} mapping."""
+    totals = counts.sum(axis=2)
+    probs: Dict[Tuple[int, int, int], float] = {}
+    n = counts.shape[1]
+    for m, i in zip(*np.nonzero(totals)):
+        row = counts[m, i] / totals[m, i]
+        for j in range(n):
+            probs[(int(m) + 1, int(i), j)] = float(row[j])
+    return probs
+
+
+def consecutive_transitions(bird, time, nearest) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (month, start, end) for every pair of consecutive fixes of the same bird, where start
+    and end are the waypoints of the earlier and later fix and month is the later fix's.
+    """
+    bird = np.asarray(bird, dtype=np.int64)
+    time = np.asarray(time, dtype="datetime64[ns]")
+    nearest = np.asarray(nearest, dtype=np.int64)
+    order = np.lexsort((time, bird))
+    b, t, w = bird[order], time[order], nearest[order]
+    same = b[1:] == b[:-1]
+    month = t[1:][same].astype("datetime64[M]").astype(np.int64) % 12 + 1
+    return month, w[:-1][same], w[1:][same]
@@ -0,0 +1,64 @@
+"""Shared fixtures: small synthetic model inputs and models built from them."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+import xarray as xr
+from affine import Affine
+
+from src.models import HarrierModel
+
+LON0, LAT0 = 25.6, -33.9
+
+@pytest.fixture(scope="session")
+def inputs(tmp_path_factory):
+    """Small synthetic inputs: 4 tracked birds, a 24x24 DEM, 49 turbines."""
+    d = tmp_path_factory.mktemp("inputs")
+    rng = np.random.default_rng(0)
+    rows = []
+    for bird in range(4):
+        t = pd.date_range("2023-01-01", periods=60, freq="6h")
+        rows.append(pd.DataFrame({"harrier_id": bird, "timestamp": t,
+                                  "lat": LAT0 + rng.normal(0, 0.05, len(t)), "lon": LON0 + rng.normal(0, 0.05, len(t)),
+                                  "alt": rng.uniform(0, 150, len(t)), "speed": rng.uniform(0, 10, len(t))}))
+    pd.concat(rows).to_csv(d / "gps.csv", index=False)
+
+    # ~1 km pixels with centres on the turbines, so graph nodes lie within COLLISION_RADIUS of them
+    n = 24
+    y, x = np.mgrid[0:n, 0:n]
+    elev = (100 + 400 * np.sin(x / 4.0) * np.cos(y / 6.0)).astype(np.float32)
+    transform = Affine(0.01, 0.0, LON0 - 0.115, 0.0, -0.01, LAT0 + 0.115)
+    with rasterio.open(d / "dem.tif", "w", driver="GTiff", height=n, width=n, count=2, dtype="float32",
+                       crs="EPSG:4326", transform=transform) as dst:
+        dst.write(elev, 1); dst.write(np.full((n, n), 10.0, dtype=np.float32), 2)
+
+    time = pd.date_range("2023-01-01", periods=24, freq="h")
+    lat = LAT0 + np.linspace(-0.1, 0.1, 3); lon = LON0 + np.linspace(-0.1, 0.1, 3)
+    xr.Dataset({"wind_speed": (("time", "lat", "lon"), np.full((24, 3, 3), 6.0)),
+                "pressure": (("time", "lat", "lon"), np.full((24, 3, 3), 1000.0))},
+               coords={"time": time, "lat": lat, "lon": lon}).to_netcdf(d / "weather.nc")
+
+    import geopandas as gpd
+    from shapely.geometry import Point
+    # A 7x7 turbine grid every 0.03 deg, on pixel centres
+    sites = [Point(LON0 + 0.03 * i, LAT0 + 0.03 * j) for j in range(-3, 4) for i in range(-3, 4)]
+    gpd.GeoDataFrame({"blade_radius": np.full(len(sites), 0.0005)}, geometry=sites,
+                     crs="EPSG:4326").to_file(d / "turbines.geojson", driver="GeoJSON")
+    return tuple(str(d / f) for f in ("gps.csv", "dem.tif", "weather.nc", "turbines.geojson"))
+
+
+@pytest.fixture
+def exposed_model(inputs):
+    """Factory for models whose birds all start within 500 m of a turbine, with no avoidance and no buffers."""
+    def build(n_agents=1000, seed=0):
+        random.seed(seed)
+        model = HarrierModel(*inputs, n_agents=n_agents)
+        model.avoidance_rate = 0.0
+        model._nest_positions = model._communal_roost_positions = model._single_roost_positions = np.empty((0, 2))
+        rng = np.random.default_rng(seed)
+        for i, a in enumerate(model.schedule.agents):
+            model.space.move_agent(a, tuple(model._turbine_positions[i % len(model._turbine_positions)] + rng.uniform(-500, 500, 2)))
+        return model
+    return build
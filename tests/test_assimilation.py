@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from src.assimilation import TelemetryAssimilator
+
+def _fixes(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "harrier_id": np.repeat([1, 2, 3], n),
+        "timestamp": np.tile(pd.date_range("2023-01-01", periods=n, freq="7h").to_numpy(), 3),
+        "lon": rng.uniform(25.3, 25.9, 3 * n),
+        "lat": rng.uniform(-34.2, -33.6, 3 * n),
+        "alt": rng.uniform(0, 200, 3 * n),
+    })
+
+def test_incremental_batches_match_full_history(tmp_path):
+    fixes = _fixes(400, 0)
+    waypoints = np.array([[25.4, -34.0], [25.8, -33.7], [25.6, -33.9]])
+    turbines = np.array([[25.5, -33.8], [25.7, -34.0]])
+    radius = np.array([2000.0, 3000.0])
+
+    full = TelemetryAssimilator(waypoints, turbines, radius)
+    full.assimilate(fixes)
+
+    inc = TelemetryAssimilator(waypoints, turbines, radius)
+    cut = fixes["timestamp"] < pd.Timestamp("2023-02-15")
+    inc.assimilate(fixes[cut])
+    path = tmp_path / "state.npz"
+    inc.save(str(path))
+    inc = TelemetryAssimilator.load(str(path))
+    inc.assimilate(fixes)  # overlapping resend: old fixes are skipped
+
+    np.testing.assert_array_equal(inc.counts, full.counts)
+    np.testing.assert_array_equal(inc.exposure, full.exposure)
+    assert inc.counts.sum() == 3 * (400 - 1)
+    assert inc.n_fixes == full.n_fixes == 1200
+    probs = inc.transition_probs()
+    assert abs(sum(probs[(1, 0, j)] for j in range(3)) - 1.0) < 1e-12
+
+def test_model_built_from_bundle_uses_assimilated_transitions(inputs):
+    import random
+    import geopandas as gpd
+    from src.models import HarrierModel
+    from src.telemetry import read_telemetry
+    gps, dem, weather, turbines = inputs
+    telemetry = read_telemetry(gps)
+    assim = TelemetryAssimilator.from_telemetry(telemetry, gpd.read_file(turbines),
+                                                waypoints_lonlat=[[25.55, -33.95], [25.65, -33.85], [25.6, -33.9]])
+    batch = telemetry.assign(timestamp=telemetry["timestamp"] + pd.Timedelta(days=60),
+                             lon=telemetry["lon"].to_numpy()[::-1], lat=telemetry["lat"].to_numpy()[::-1])
+    assim.assimilate(batch)
+    bundle = assim.bundle()
+
+    random.seed(0)
+    model = HarrierModel(gps, dem, weather, turbines, assimilated=bundle)
+    assert model.transition_probs == bundle["transition_probs"]
+    assert {(m, i) for m, i, _ in model.transition_probs} >= {(1, 0), (3, 0)}  # batch months included
+    assert model.collision_prob == bundle["collision_prob"]
+    xy = model.spatial.project([(p.x, p.y) for p in bundle["waypoints"]])
+    np.testing.assert_allclose([model.graph.nodes[i]["pos"] for i in range(3)], xy)
+    random.seed(0)
+    assert HarrierModel(gps, dem, weather, turbines).transition_probs != model.transition_probs
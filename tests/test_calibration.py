@@ -0,0 +1,63 @@
+import networkx as nx
+import numpy as np
+from src.calibration import HEIGHT_BINS, simulate_batch, utilisation_bins
+from src.graph_arrays import CompactGraph
+
+def _ring(n=12):
+    G = nx.Graph()
+    for i in range(n):
+        a = 2 * np.pi * i / n
+        G.add_node(i, pos=(25.6 + 0.1 * np.cos(a), -33.9 + 0.1 * np.sin(a)))
+    for i in range(n):
+        G.add_edge(i, (i + 1) % n, thermal=1.0, turbine_risk=0.0, turbine_active=False)
+    return G
+
+def test_compact_graph_samples_transition_weights():
+    g = CompactGraph.from_graph(_ring(), {(3, 0, 1): 0.8, (3, 0, 11): 0.2})
+    rng = np.random.default_rng(0)
+    edges = g.sample_edges(3, np.zeros(50000, dtype=np.int64), rng.random(50000))
+    share_to_1 = np.mean(g.indices[edges] == 1)
+    assert abs(share_to_1 - 0.8) < 0.01
+    edges = g.sample_edges(4, np.zeros(50000, dtype=np.int64), rng.random(50000))
+    assert abs(np.mean(g.indices[edges] == 1) - 0.5) < 0.01
+
+def test_simulate_batch_height_profile_tracks_bsa_fraction():
+    g = CompactGraph.from_graph(_ring())
+    params = {"bsa_fraction": np.array([0.0, 1.0])}
+    out = simulate_batch(g, params, np.arange(12), np.ones(12, dtype=bool), utilisation_bins(g, 2),
+                         n_steps=12, start_month=1, rng=np.random.default_rng(0))
+    in_bsa = out["height"][:, np.searchsorted(HEIGHT_BINS, 30.0):np.searchsorted(HEIGHT_BINS, 130.0)].sum(axis=1)
+    assert out["utilisation"].shape == (2, 4)
+    assert in_bsa[1] > in_bsa[0]
+    np.testing.assert_allclose(out["utilisation"].sum(axis=1), 1.0)
+
+def test_observed_steps_use_one_fix_per_bird_month():
+    import pandas as pd
+    from src.calibration import observed_summaries
+    g = CompactGraph.from_graph(_ring())
+    # Hourly fixes in January wander round the ring; later months start at nodes 3, 6 and 9
+    # (May follows a gap, so it adds no step)
+    visits = [("2023-01-01", [0, 1, 2, 1]), ("2023-02-01", [3, 4]), ("2023-03-01", [6, 5]), ("2023-05-01", [9])]
+    rows = []
+    for day, nodes in visits:
+        for h, n in enumerate(nodes):
+            lon, lat = g.pos[n]
+            rows.append({"harrier_id": 1, "timestamp": pd.Timestamp(day) + pd.Timedelta(hours=h),
+                         "lon": lon, "lat": lat, "alt": 50.0})
+    obs = observed_summaries(pd.DataFrame(rows), g, utilisation_bins(g, 2))
+    pos = g.km_scale * g.pos
+    steps = [np.linalg.norm(pos[3] - pos[0]), np.linalg.norm(pos[6] - pos[3])]
+    np.testing.assert_allclose(obs["step"], [np.mean(steps), np.std(steps)])
+
+def test_abc_smc_stops_when_no_proposal_fits_the_prior():
+    from src.calibration import abc_smc
+    g = CompactGraph.from_graph(_ring())
+    obs = simulate_batch(g, {"bsa_fraction": np.array([0.35])}, np.arange(12), np.ones(12, dtype=bool),
+                         utilisation_bins(g, 2), n_steps=6, rng=np.random.default_rng(1))
+    obs = {k: v[0] for k, v in obs.items() if k != "fatalities"}
+    # A point prior: every perturbed candidate lands outside it
+    out = abc_smc(g, obs, np.arange(12), np.ones(12, dtype=bool), utilisation_bins(g, 2),
+                  priors={"bsa_fraction": (0.35, 0.35)}, n_particles=20, batch_size=20, n_steps=6,
+                  max_simulations=200)
+    assert out["n_simulations"] == 20 and out["n_proposals"] >= 200
+    assert out["epsilons"] == [np.inf]
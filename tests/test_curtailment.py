@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+from src.curtailment import CurtailmentOptimizer, energy_cube, risk_cube, risk_cube_from_schedule
+
+def test_energy_cube_and_capped_schedule():
+    times = pd.date_range("2023-01-01", "2023-12-31 23:00", freq="h")
+    ws = xr.DataArray(np.full((len(times), 2, 2), 8.0), dims=("time", "lat", "lon"),
+                      coords={"time": times, "lat": [-34.0, -33.9], "lon": [25.4, 25.5]})
+    energy = energy_cube(ws, [(25.4, -34.0), (25.5, -33.9)])
+    assert energy.shape == (2, 12, 24)
+    assert np.isclose(energy[0, 0, 0], 31 * 1.0)  # 1000 kW for 31 hours in January
+
+    risk = risk_cube_from_schedule({0: [(1, 3)] * 4, 1: [(1, 3), (7, 5)]}, n_turbines=2, years=2)
+    assert risk.sum() == 3.0 and risk[0, 0, 3] == 2.0
+    energy[1, 6, 5] = 0.0  # a risky cell that produces nothing is stopped first
+    opt = CurtailmentOptimizer(energy, risk)
+    plan = opt.for_cap(2.5)
+    assert plan.feasible and plan.lost_mwh == 0.0 and plan.schedule()[1] == [(7, 5)]
+    plan = opt.for_cap(0.5)
+    assert plan.feasible and plan.lost_mwh >= opt.lower_bound(0.5)
+    assert plan.schedule()[0] == [(1, 3)]
+    curve = opt.tradeoff()
+    assert curve["residual_fatalities"].is_monotonic_decreasing and curve["lost_mwh"].is_monotonic_increasing
+
+def test_risk_cube_from_model_run_spans_hours(exposed_model):
+    model = exposed_model()
+    for _ in range(6):
+        model.step()
+    n = len(model.turbines)
+    t, m, h = (np.array(c) for c in zip(*[(e[3], e[1], e[2]) for e in model.collision_events]))
+    risk = risk_cube(t, m, h, n)
+    assert risk.sum() == len(model.collision_events)
+    assert np.array_equal(risk, risk_cube_from_schedule(model.curtailment_schedule, n))
+    assert np.count_nonzero(risk.sum(axis=(0, 1))) > 1
+    plan = CurtailmentOptimizer(np.ones_like(risk), risk).for_cap(0.0)
+    assert len({hour for cells in plan.schedule().values() for _, hour in cells}) > 1
@@ -6,4 +6,11 @@ def test_process_gps_data():
     waypoints, agents, transition_probs = process_gps_data("data/harrier_gps.csv")
     assert not waypoints.empty
     assert not agents.empty
-    assert len(transition_probs) > 0
\ No newline at end of file
+    assert len(transition_probs) > 0
+
+
+def test_point_within_shapely_geometry():
+    from shapely.geometry import box
+    from src.data_processing import Point
+    assert Point(0.5, 0.5).within(box(0, 0, 1, 1))
+    assert not Point(2.0, 0.5).within(box(0, 0, 1, 1))
@@ -0,0 +1,36 @@
+import numpy as np
+import rasterio
+from affine import Affine
+from data.dem_ingest import ingest_dem_windowed
+from data.utils import slope_degrees_from_dem_m
+from src.data_processing import process_lidar_data
+from src.dem_sampler import read_dem_bands
+
+def _write_source(path, h=320, w=256, pixel=10.0):
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:h, 0:w]
+    elev = (200 + 40 * np.sin(x / 17.0) * np.cos(y / 23.0) + rng.normal(0, 2, (h, w))).astype(np.float32)
+    transform = Affine(pixel, 0.0, 400000.0, 0.0, -pixel, 6250000.0)
+    with rasterio.open(path, "w", driver="GTiff", height=h, width=w, count=1, dtype="float32",
+                       crs="EPSG:32735", transform=transform) as dst:
+        dst.write(elev, 1)
+    return elev
+
+def test_tiled_ingest_matches_whole_array_slope_and_builds_overviews(tmp_path):
+    src = str(tmp_path / "src.tif")
+    elev = _write_source(src)
+    out = ingest_dem_windowed(src, str(tmp_path / "dem.tif"), tile_size=64, block_size=64, model_resolution_m=100.0)
+    with rasterio.open(out) as dst:
+        np.testing.assert_array_equal(dst.read(1), elev)
+        np.testing.assert_array_equal(dst.read(2), slope_degrees_from_dem_m(elev.astype(np.float64), 10.0, 10.0))
+        assert dst.overviews(1) == dst.overviews(2) == [2, 4, 8, 16]
+
+    # Decimated reads at the model resolution, for the sampler and the graph nodes
+    full = read_dem_bands(out)
+    coarse = read_dem_bands(out, resolution_m=100.0)
+    assert full[0].shape == (320, 256) and coarse[0].shape == (32, 26)
+    assert abs(coarse[2].a * 26 - 2560.0) < 1e-6 and coarse[2].e == -100.0 and coarse[2].c == full[2].c
+    np.testing.assert_allclose(coarse[0].mean(), elev.mean(), rtol=1e-3)
+    nodes = process_lidar_data(out, min_slope=0.0)
+    assert len(nodes) == 32 * 26
+    assert len(process_lidar_data(out, min_slope=0.0, resolution_m=None)) == 320 * 256
@@ -0,0 +1,45 @@
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.transform import xy
+from src.dem_sampler import DemSampler
+
+def _write_dem(path):
+    elev = np.arange(20 * 30, dtype=np.float32).reshape(20, 30)
+    slope = (elev % 7).astype(np.float32)
+    transform = Affine(100.0, 0.0, 400000.0, 0.0, -100.0, 6250000.0)
+    with rasterio.open(path, "w", driver="GTiff", height=20, width=30, count=2, dtype="float32",
+                       crs="EPSG:32735", transform=transform) as dst:
+        dst.write(elev, 1); dst.write(slope, 2)
+    return elev, transform
+
+def test_sampler_matches_raster_in_batch(tmp_path):
+    path = str(tmp_path / "dem.tif")
+    elev, transform = _write_dem(path)
+    dem = DemSampler.from_path(path)
+    rows = np.array([0, 5, 19]); cols = np.array([0, 12, 29])
+    x, y = xy(transform, rows, cols, offset="center")
+    e, s = dem.sample_xy(x, y)
+    assert np.array_equal(e, elev[rows, cols])
+    assert np.array_equal(s, elev[rows, cols] % 7)
+    # halfway between two pixel centres along a row
+    eb, _ = dem.sample_xy(np.array(x[:2]) + 50.0, y[:2], mode="bilinear")
+    assert np.allclose(eb, elev[rows[:2], cols[:2]] + 0.5)
+    assert np.isnan(dem.sample(0.0, 0.0)[0])
+
+def test_geographic_dem_is_decimated_in_metres(tmp_path):
+    from src.config import DEM_RESOLUTION_M
+    from src.data_processing import process_lidar_data
+    path = str(tmp_path / "geo.tif")
+    lat0 = -33.9
+    transform = Affine(0.001, 0.0, 25.5, 0.0, -0.001, lat0 + 0.1)
+    slope = np.full((200, 200), 10.0, dtype=np.float32)
+    with rasterio.open(path, "w", driver="GTiff", height=200, width=200, count=2, dtype="float32",
+                       crs="EPSG:4326", transform=transform) as dst:
+        dst.write(np.zeros((200, 200), dtype=np.float32), 1); dst.write(slope, 2)
+    # 0.001 deg is ~92 m east-west and ~111 m north-south here: only columns are merged
+    dem = DemSampler.from_path(path, DEM_RESOLUTION_M)
+    assert dem.elevation.shape == (200, 185)
+    assert np.isclose(abs(dem.transform.a) * 185, 0.2)
+    assert DemSampler.from_path(path, 500.0).elevation.shape == (44, 37)
+    assert len(process_lidar_data(path)) == 200 * 185
@@ -0,0 +1,12 @@
+import pandas as pd
+from data.generate_harrier_gps import generate_harrier_gps_parquet
+
+def test_parquet_generator_independent_of_worker_count(tmp_path):
+    serial = generate_harrier_gps_parquet(seed=3, num_harriers=4, points_per_harrier=400,
+                                          workers=1, out_dir=str(tmp_path / "serial"))
+    pooled = generate_harrier_gps_parquet(seed=3, num_harriers=4, points_per_harrier=400,
+                                          workers=2, out_dir=str(tmp_path / "pooled"))
+    a = pd.read_parquet(serial).sort_values(["harrier_id", "timestamp"]).reset_index(drop=True)
+    b = pd.read_parquet(pooled).sort_values(["harrier_id", "timestamp"]).reset_index(drop=True)
+    assert len(a) == 4 * 400
+    pd.testing.assert_frame_equal(a, b)
@@ -0,0 +1,49 @@
+import networkx as nx
+import numpy as np
+from src.graph_hierarchy import CoarseGraph
+
+def test_coarse_graph_aggregates_crossing_edges_and_flags_turbine_cells():
+    rng = np.random.default_rng(0)
+    pos = rng.uniform(0, 20000, (200, 2))
+    G = nx.Graph()
+    for i, p in enumerate(pos):
+        G.add_node(i, pos=tuple(p))
+    for i in range(200):
+        for j in rng.choice(200, 6, replace=False):
+            if i != j:
+                G.add_edge(i, int(j), thermal=rng.uniform(0.5, 2.0), turbine_risk=0.0, turbine_active=False)
+    probs = {(3, 0, j): 0.9 for j in G.neighbors(0)}
+    coarse = CoarseGraph(G, probs, turbine_positions=np.array([[1000.0, 1000.0]]), cell_m=5000.0)
+
+    assert coarse.n_cells == 16 and coarse.graph.indices.max() < 16
+    # Every representative lies in its own cell
+    assert (coarse.cell_of[coarse.rep] == np.arange(coarse.n_cells)).all()
+    # Month-independent default weights conserve the crossing flow (both directions)
+    deg = np.array([G.degree[n] for n in range(200)])
+    flow = sum(d["thermal"] * (1 / deg[u] + 1 / deg[v]) for u, v, d in G.edges(data=True)
+               if coarse.cell_of[u] != coarse.cell_of[v])
+    assert np.isclose(coarse.graph.weights[0].sum(), flow)
+    assert coarse.graph.weights[2].sum() > coarse.graph.weights[0].sum()  # month 3 overrides from node 0
+    # Only the cell holding the turbine (and neighbours within influence) is fine-level
+    assert coarse.near_turbine[coarse.cell_of[np.argmin(((pos - 1000.0) ** 2).sum(axis=1))]]
+    assert coarse.near_turbine.sum() <= 4
+    rows, w = coarse.neighbours(int(coarse.rep[-1]), 1)
+    assert len(rows) == len(w) > 0 and set(coarse.cell_of[rows]) <= set(range(16))
+
+def test_coarse_graph_without_crossing_edges():
+    # One node (the default synthetic inputs), and two cells with edges only inside them
+    single = nx.Graph()
+    single.add_node(0, pos=(0.0, 0.0))
+    coarse = CoarseGraph(single, cell_m=5000.0)
+    assert coarse.n_cells == 1 and coarse.graph.weights.shape == (12, 0)
+    assert coarse.graph.weights.dtype == np.float64 and not coarse.near_turbine.any()
+
+    G = nx.Graph()
+    for i, p in enumerate([(0.0, 0.0), (10.0, 0.0), (9000.0, 0.0), (9010.0, 0.0)]):
+        G.add_node(i, pos=p)
+    G.add_edge(0, 1, thermal=1.0)
+    G.add_edge(2, 3, thermal=1.0)
+    coarse = CoarseGraph(G, {(1, 0, 1): 0.5}, cell_m=5000.0)
+    assert coarse.n_cells == 2 and coarse.graph.weights.shape == (12, 0)
+    rows, w = coarse.neighbours(0, 1)
+    assert len(rows) == len(w) == 0
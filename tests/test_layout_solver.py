@@ -0,0 +1,25 @@
+import numpy as np
+from data.layout_solver import exclusion_disk, solve_discrete_layout
+
+def test_discrete_layout_respects_spacing():
+    rng = np.random.default_rng(0)
+    scores = rng.random((60, 60))
+    lat = np.linspace(-34.2, -33.6, 60)
+    lon = np.linspace(25.3, 25.9, 60)
+    disk = exclusion_disk(lat, lon, 3000.0)
+    rows, cols, _ = solve_discrete_layout(scores, disk, 40)
+    assert len(rows) == 40
+    assert len(set(zip(rows, cols))) == 40
+    R = disk.shape[0] // 2
+    for i in range(len(rows)):
+        for j in range(i + 1, len(rows)):
+            dr, dc = rows[j] - rows[i], cols[j] - cols[i]
+            assert abs(dr) > R or abs(dc) > R or not disk[dr + R, dc + R]
+
+def test_discrete_layout_swaps_do_not_lose_score():
+    rng = np.random.default_rng(1)
+    scores = rng.random((40, 40))
+    disk = exclusion_disk(np.linspace(0, 0.4, 40), np.linspace(0, 0.4, 40), 2500.0)
+    greedy_r, greedy_c, _ = solve_discrete_layout(scores, disk, 30, max_passes=0)
+    rows, cols, _ = solve_discrete_layout(scores, disk, 30)
+    assert scores[rows, cols].sum() >= scores[greedy_r, greedy_c].sum()
@@ -0,0 +1,140 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.config import (BREEDING_MONTHS, BSA_HEIGHT, COLLISION_RADIUS, MIGRATION_HEIGHT, MIGRATION_MONTHS,
+                        NEST_BUFFER_VERY_HIGH, ROOST_BUFFER_COMMUNAL, ROOST_BUFFER_SINGLE)
+from src.models import HarrierModel
+from src.spatial import KM
+
+def test_bulk_population_registers_agents_and_allocates_fresh_ids(inputs):
+    random.seed(0)
+    model = HarrierModel(*inputs, n_agents=300)
+    agents = list(model.schedule.agents)
+    assert model.schedule.get_agent_count() == 300 == len({a.unique_id for a in agents})
+    assert sorted(a.unique_id for a in agents) == list(range(300))
+    assert all(a.nest is not None for a in agents if a.breeding)
+    probe = agents[123]
+    near = model.space.get_neighbors(probe.pos, 1.0)
+    assert probe in near and all(np.hypot(*np.subtract(a.pos, probe.pos)) <= 1.0 for a in near)
+    assert len(model.space.get_neighbors(probe.pos, 1e7)) == 300
+
+    # Kill a few birds in a breeding month: replacements get new ids, never the dead birds'
+    dead = agents[:5]
+    for a in dead:
+        a.alive = False
+    for a in agents[5:100]:
+        a.breeding = True
+    model.month = 6
+    model.step()
+    ids = [a.unique_id for a in model.schedule.agents]
+    assert len(ids) == len(set(ids)) == model.schedule.get_agent_count()
+    assert not {a.unique_id for a in dead} & set(ids)
+    recruits = [i for i in ids if i >= 300]
+    assert recruits and recruits == list(range(300, 300 + len(recruits)))
+    assert model._next_id == 300 + len(recruits)
+    assert all(a in model.space._agent_to_index for a in model.schedule.agents)
+
+@pytest.mark.parametrize("month", [7, 4, 3])
+def test_collision_candidates_match_brute_force(inputs, month):
+    random.seed(1)
+    rng = np.random.default_rng(1)
+    model = HarrierModel(*inputs, n_agents=400)
+    model.month = month
+    turbines = model._turbine_positions
+    sites = turbines[[0, -1]]  # opposite corners of the turbine grid
+    # Nodes and buffers close to the turbines so every branch is exercised
+    model._node_positions = sites[np.arange(8) % 2] + rng.uniform(-1200, 1200, (8, 2))
+    model._node_turbine_distance, model._node_turbine = model._turbine_kdtree.query(model._node_positions)
+    model._nest_positions = sites[:1] + [[NEST_BUFFER_VERY_HIGH * KM + 600.0, 0.0]]
+    model._communal_roost_positions = sites[1:] + [[0.0, ROOST_BUFFER_COMMUNAL * KM + 700.0]]
+    model._single_roost_positions = sites[1:] + [[-ROOST_BUFFER_SINGLE * KM - 500.0, 0.0]]
+
+    agents = list(model.schedule.agents)
+    for i, a in enumerate(agents):
+        k = i % 8
+        if i % 4 == 0:  # on its node
+            xy, a._node_index = model._node_positions[k], k
+        elif i % 4 == 1:  # assigned a node but not yet moved onto it
+            xy, a._node_index = sites[i % 2] + rng.uniform(-1300, 1300, 2), k
+        else:
+            xy, a._node_index = sites[i % 2] + rng.uniform(-1300, 1300, 2), -1
+        model.space.move_agent(a, tuple(xy))
+        a.height = rng.uniform(0, 150)
+        a.communal = i % 7 == 0
+        a.alive = i % 11 != 0
+
+    bands = [b for b, months in ((BSA_HEIGHT, BREEDING_MONTHS), (MIGRATION_HEIGHT, MIGRATION_MONTHS))
+             if month in months]
+    expected = {}
+    for a in agents:
+        if not a.alive or a.communal or not any(lo <= a.height <= hi for lo, hi in bands):
+            continue
+        d = np.hypot(*(turbines - np.asarray(a.pos)).T)
+        if d.min() >= COLLISION_RADIUS * KM:
+            continue
+        buffered = any((np.hypot(*(centres - np.asarray(a.pos)).T) < radius * KM).any()
+                       for centres, radius in ((model._nest_positions, NEST_BUFFER_VERY_HIGH),
+                                               (model._communal_roost_positions, ROOST_BUFFER_COMMUNAL),
+                                               (model._single_roost_positions, ROOST_BUFFER_SINGLE)))
+        if not buffered:
+            expected[a.unique_id] = int(d.argmin())
+
+    candidates, tid = model._collision_candidates(agents)
+    assert {a.unique_id: int(t) for a, t in zip(candidates, tid)} == expected
+    assert len(candidates) == len(expected)
+    if bands:
+        assert expected and any(a._node_index >= 0 for a in candidates)
+
+def test_collision_events_carry_the_model_step(exposed_model):
+    model = exposed_model()
+    for _ in range(6):
+        model.step()
+    assert model.steps == 6
+    steps = {e[0] for e in model.collision_events}
+    assert len(steps) > 1 and steps <= set(range(1, 7))
+    assert all(hour == step % 24 for step, _, hour, _ in model.collision_events)
+
+def test_bulk_agents_match_init_and_are_bounds_checked(inputs, monkeypatch):
+    import mesa
+    from src.models import HarrierAgent
+    random.seed(0)
+    model = HarrierModel(*inputs, n_agents=10)
+    inside = np.array([model._extent_point(50.0, 50.0)])
+    one = np.ones(1, dtype=bool)
+    bulk = HarrierAgent.bulk(model, np.array([100]), inside, one, np.zeros(1, np.int64), np.array([7]), np.array([5.0]))[0]
+    single = HarrierAgent(101, model, tuple(inside[0]), breeding=True)
+    assert vars(bulk).keys() == vars(single).keys()
+    assert bulk.nest == model.nests[0] and bulk.breeding_month == 7 and bulk in model.agents_[HarrierAgent]
+
+    outside = np.array([[model.space.x_max, model.space.y_min]])
+    with pytest.raises(ValueError):
+        HarrierAgent.bulk(model, np.array([102]), outside, one, np.zeros(1, np.int64), np.array([7]), np.array([5.0]))
+    monkeypatch.setattr(mesa, "__version__", "3.0.0")
+    with pytest.raises(RuntimeError):
+        model._add_agents([bulk])
+
+def test_terrain_aware_collision_charged_to_the_rotor_band_turbine(inputs):
+    from scipy.spatial import cKDTree
+    random.seed(0)
+    model = HarrierModel(*inputs, n_agents=10, terrain_aware=True)
+    model.month = 7
+    model._nest_positions = model._communal_roost_positions = model._single_roost_positions = np.empty((0, 2))
+    bird = list(model.schedule.agents)[0]
+    xy = np.array(model._extent_point(50.0, 50.0))
+    model.space.move_agent(bird, tuple(xy))
+    bird.current_node, bird._node_index, bird.height, bird.communal = None, -1, 50.0, False
+    # Turbine 0 is nearer, but only turbine 1's rotor band holds the bird
+    model._turbine_positions = np.array([xy + [300.0, 0.0], xy + [0.0, 600.0]])
+    model._turbine_kdtree = cKDTree(model._turbine_positions)
+    asl = np.nan_to_num(model._ground_at(xy[None])[0]) + bird.height
+    model._rotor_bottom_asl = np.array([asl + 100.0, asl - 10.0])
+    model._rotor_top_asl = np.array([asl + 200.0, asl + 10.0])
+    assert model._update_rotor_exposure([bird]).tolist() == [1] and bird.rotor_turbine == 1
+    candidates, tid = model._collision_candidates([bird])
+    assert candidates == [bird] and tid.tolist() == [1]
+    # Both bands hold it: the nearer turbine is charged
+    model._rotor_bottom_asl[0], model._rotor_top_asl[0] = asl - 10.0, asl + 10.0
+    model._update_rotor_exposure([bird])
+    assert model._collision_candidates([bird])[1].tolist() == [0]
@@ -0,0 +1,86 @@
+import networkx as nx
+import numpy as np
+from src.graph_arrays import CompactGraph
+from src.occupancy import OccupancySolver, height_band_fraction
+
+
+def _graph():
+    rng = np.random.default_rng(1)
+    pos = rng.uniform(0, 6000, (60, 2))
+    G = nx.Graph(crs="EPSG:32630")
+    for i, p in enumerate(pos):
+        G.add_node(i, pos=tuple(p))
+    for i in range(60):
+        for j in rng.choice(60, 4, replace=False):
+            if i != j:
+                G.add_edge(i, int(j), thermal=rng.uniform(0.5, 2.0))
+    probs = {(7, i, j): 0.9 for i, j in G.edges(0)}
+    return CompactGraph.from_graph(G, probs, turbine_positions=np.array([[3000.0, 3000.0], [500.0, 5500.0]]))
+
+
+def test_periodic_stationary_matches_dense_solution_and_walkers():
+    graph = _graph()
+    solver = OccupancySolver(graph, wake_coeff=0.1)
+    occ = solver.stationary()
+    assert occ.shape == (12, graph.n_nodes) and np.allclose(occ.sum(axis=1), 1.0)
+
+    # Dense check: December occupancy is the fixed point of the annual product
+    A = np.eye(graph.n_nodes)
+    for P in solver.P:
+        assert np.allclose(P.sum(axis=1), 1.0)
+        A = A @ P.toarray()
+    assert np.allclose(occ[11] @ A, occ[11], atol=1e-8)
+    # Moves into the displacement zone are rejected, so those nodes end up empty
+    blocked = graph.turbine_distance < 500.0
+    assert blocked.any() and np.allclose(occ[:, blocked], 0.0)
+
+    # Walkers sampled with the batched simulator's edge sampler visit nodes at the same rates
+    rng = np.random.default_rng(0)
+    wake = np.clip(1.0 - 0.1 * graph.edge_wake, 0.1, 1.0)
+    nodes = rng.integers(0, graph.n_nodes, 20000)
+    counts = np.zeros((12, graph.n_nodes))
+    for year in range(40):
+        for month in range(1, 13):
+            e = graph.sample_edges(month, nodes, rng.random(len(nodes)))
+            # Rejection on the wake multiplier (its row maximum is at most 1)
+            accept = (e >= 0) & (rng.random(len(nodes)) < np.where(e >= 0, wake[np.maximum(e, 0)], 0.0))
+            while not accept.all():
+                redo = ~accept & (e >= 0)
+                if not redo.any():
+                    break
+                e[redo] = graph.sample_edges(month, nodes[redo], rng.random(redo.sum()))
+                accept[redo] = rng.random(redo.sum()) < wake[e[redo]]
+            dest = np.where(e >= 0, graph.indices[np.maximum(e, 0)], nodes)
+            nodes = np.where(blocked[dest], nodes, dest)
+            if year >= 20:
+                counts[month - 1] += np.bincount(nodes, minlength=graph.n_nodes)
+    assert np.abs(counts / counts.sum(axis=1, keepdims=True) - occ).sum(axis=1).max() < 0.05
+
+
+def test_turbine_exposure_and_fatality_maps():
+    graph = _graph()
+    solver = OccupancySolver(graph, population=(40, 10))
+    band = height_band_fraction()
+    assert np.isclose(band[1, 6], 0.35) and band[0, 6] == 0.0 and band[0, 0] == 1.0 and band[:, 2].sum() == 0.0
+
+    presence = solver.presence()
+    assert presence.shape == (2, 12) and (presence <= 1.0).all() and presence.sum() > 0
+    exposure = solver.turbine_exposure()
+    assert np.allclose(exposure, presence * (40 * band[0] + 10 * band[1]))
+    fat = solver.expected_fatalities(avoidance_rate=0.9, collision_prob=0.2)
+    assert (fat <= exposure * 0.1 * 0.2 + 1e-12).all() and fat[:, 2].sum() == 0.0
+    frame = solver.to_frame(avoidance_rate=0.9, collision_prob=0.2)
+    assert len(frame) == 24 and np.isclose(frame["expected_fatalities"].sum(), fat.sum())
+
+    # Exempt nodes (nest/roost buffers) never contribute
+    exempt = OccupancySolver(graph, exempt=np.ones(graph.n_nodes, dtype=bool), population=(40, 10))
+    assert exempt.presence().sum() == 0.0
+
+
+def test_components_keep_their_start_mass():
+    pos = np.array([[0, 0], [1, 0], [0, 1], [50, 50], [51, 50], [50, 51]], dtype=float)
+    rows = np.array([0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5]); cols = np.array([1, 2, 0, 2, 0, 1, 4, 5, 3, 5, 3, 4])
+    indptr = np.r_[0, np.cumsum(np.bincount(rows, minlength=6))]
+    graph = CompactGraph(pos, indptr, cols, np.ones((12, 12)), geographic=False)
+    occ = OccupancySolver(graph, start=np.array([3, 0, 0, 1, 0, 0])).stationary()
+    assert np.allclose(occ[:, :3], 0.25) and np.allclose(occ[:, 3:], 0.25 / 3)
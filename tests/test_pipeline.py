@@ -0,0 +1,40 @@
+import os
+import tempfile
+from data.pipeline import ArtifactStore, Pipeline, Stage
+
+CALLS = []
+
+def _make(seed, value=1):
+    CALLS.append("make")
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{seed}:{value}")
+    return path
+
+def _double(src, seed):
+    CALLS.append("double")
+    with open(src) as f:
+        text = f.read()
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w") as f:
+        f.write(text * 2)
+    return path
+
+def test_pipeline_reuses_cached_stages_and_reruns_stale(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    build = lambda value: Pipeline([Stage("a", _make, {"value": value}),
+                                    Stage("b", _double, deps=("a",))], store)
+    CALLS.clear()
+    first = build(1).run(seed=3, workers=1)
+    assert CALLS == ["make", "double"]
+    assert open(first["b"]).read() == "3:13:1"
+
+    CALLS.clear()
+    assert build(1).run(seed=3, workers=1) == first
+    assert CALLS == []
+
+    # A changed parameter invalidates the stage and everything downstream of it
+    CALLS.clear()
+    second = build(2).run(seed=3, workers=1)
+    assert CALLS == ["make", "double"]
+    assert second["b"] != first["b"] and os.path.exists(first["b"])
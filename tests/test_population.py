@@ -0,0 +1,20 @@
+import numpy as np
+from src.config import BREEDING_MONTHS
+from src.population import VitalRates, extinction_curve, project
+
+def test_projection_matches_expected_decline_and_replacement():
+    exposure = np.full((2, 12), 1000.0)
+    # 1% monthly mortality, no fledglings: E[N_t] = N0 * 0.99^(12 t)
+    rates = VitalRates(exposure, exposure * 0.01, np.zeros(12), ceiling=100)
+    traj = project(rates, (80, 20), years=5, replicates=4000, parameter_uncertainty=False)
+    expected = 100 * 0.99 ** (12 * np.arange(6))
+    np.testing.assert_allclose(traj.mean(axis=0), expected, rtol=0.02)
+
+    # Deaths only in breeding months, each replaced by abundant fledglings: the population holds
+    deaths = np.zeros((2, 12)); deaths[:, [m - 1 for m in BREEDING_MONTHS]] = 10.0
+    rates = VitalRates(exposure, deaths, np.full(12, 2000.0), ceiling=100)
+    traj = project(rates, (80, 20), years=5, replicates=500, parameter_uncertainty=False)
+    assert (traj == 100).all()
+
+    curve = extinction_curve(np.array([[3, 1, 0, 0], [3, 2, 1, 1]]))
+    assert curve["p_extinct"].tolist() == [0.0, 0.0, 0.5, 0.5]
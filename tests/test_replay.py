@@ -0,0 +1,85 @@
+import numpy as np
+from src.config import (BREEDING_MONTHS, BSA_HEIGHT, MIGRATION_HEIGHT, MIGRATION_MONTHS, MITIGATION_BLADE_PAINT,
+                        MITIGATION_SHUTDOWN, PREY_REDUCTION_FACTOR)
+from src.replay import COMMUNAL, DIED, TrajectoryRecord, record, replay, replay_many
+
+
+def _record(seed=0):
+    rng = np.random.default_rng(seed)
+    node_xy = rng.uniform(0, 10000, (300, 2))
+    S, A = 48, 60
+    node = rng.integers(0, 300, (S, A)).astype(np.int32)
+    node[:5, 50:] = -1  # slots that appear later (recruits)
+    height = rng.choice([15.0, 50.0, 80.0, 120.0], (S, A)).astype(np.float32)
+    flags = np.zeros((S, A), np.uint8)
+    flags[:, 0] |= COMMUNAL
+    flags[30, 1] |= DIED; node[31:, 1] = -1  # died in the recorded run
+    exempt = np.zeros(300, bool); exempt[:10] = True
+    return TrajectoryRecord(node, height, flags, (np.arange(S) % 12) + 1, np.arange(S), np.full(S, 0.9),
+                            0.2, node_xy, exempt, 32735, seed=7)
+
+
+def _brute_force(rec, turbine_xy, u):
+    dead = set(); events = []
+    for s in range(rec.shape[0]):
+        m = int(rec.month[s])
+        for a in range(rec.shape[1]):
+            n = rec.node[s, a]
+            if n < 0 or a in dead:
+                continue
+            h = rec.height[s, a]
+            band = (m in BREEDING_MONTHS and BSA_HEIGHT[0] <= h <= BSA_HEIGHT[1]) or \
+                   (m in MIGRATION_MONTHS and MIGRATION_HEIGHT[0] <= h <= MIGRATION_HEIGHT[1])
+            d = np.sqrt(((turbine_xy - rec.node_xy[n]) ** 2).sum(axis=1))
+            if not band or d.min() >= 1000.0 or rec.exempt[n] or rec.flags[s, a] & COMMUNAL:
+                continue
+            if u[s, a, 0] <= rec.avoidance_rate:
+                continue
+            p = rec.collision_prob[s]
+            p *= 0.29 if u[s, a, 1] < MITIGATION_BLADE_PAINT else 1.0
+            p *= 0.5 if (u[s, a, 2] < MITIGATION_SHUTDOWN and m in BREEDING_MONTHS) else 1.0
+            p *= 0.5 if u[s, a, 3] < PREY_REDUCTION_FACTOR else 1.0
+            if u[s, a, 4] < p:
+                dead.add(a); events.append((s, a, int(np.argmin(d))))
+    return events
+
+
+def test_replay_matches_check_collision_rules_with_common_random_numbers(tmp_path):
+    rec = _record()
+    rec.save(str(tmp_path / "rec.npz"))
+    rec = TrajectoryRecord.load(str(tmp_path / "rec.npz"))
+    u = rec.uniforms()
+    assert u.shape == (48, 60, 5) and np.array_equal(u, rec.uniforms())
+
+    layout = np.array([[2000.0, 2000.0], [7000.0, 6000.0], [5000.0, 9000.0]])
+    result = replay(rec, layout)
+    expected = _brute_force(rec, layout, u)
+    assert result.fatalities == len(expected) > 0
+    assert sorted(zip(result.events["step"], result.events["turbine"])) == sorted((s, t) for s, _, t in expected)
+    assert result.exposure.shape == (3, 12) and result.exposure.sum() >= result.fatalities
+
+    # Common random numbers: a turbine far from every bird changes nothing
+    far = replay(rec, np.vstack([layout, [[1e6, 1e6]]]))
+    assert far.events.equals(result.events)
+    assert replay(rec, [[1e6, 1e6]]).fatalities == 0
+
+    summary = replay_many(rec, [layout, layout[:1], np.empty((0, 2))])
+    assert summary["fatalities"].tolist()[0] == result.fatalities and summary["fatalities"].iloc[2] == 0
+    assert summary["fatalities"].iloc[1] <= summary["fatalities"].iloc[0]
+
+
+def test_displacement_flags_layouts_that_need_a_rerun():
+    rec = _record()
+    crowded = replay(rec, rec.node_xy[:40], rerun_tol=0.01)
+    assert crowded.displaced_fraction > 0.01 and crowded.needs_rerun
+    far = replay(rec, [[1e6, 1e6]])
+    assert not far.needs_rerun and far.censored == 1  # slot 1's recorded death is not reproduced
+
+
+def test_record_from_model_keeps_step_ids(exposed_model):
+    model = exposed_model()
+    rec = record(model, 6)
+    assert np.array_equal(rec.step, np.arange(1, 7)) and rec.step[-1] == model.steps
+    result = replay(rec, model._turbine_positions)
+    assert result.events["step"].nunique() > 1 and set(result.events["step"]) <= set(range(1, 7))
+    assert np.array_equal(result.events["hour"], result.events["step"] % 24)
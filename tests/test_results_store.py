@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from src.results_store import ResultsStore
+
+def _run(fatalities, events):
+    return pd.DataFrame({"Population": 10, "Fatalities": fatalities, "Collision_Prob": 0.1}), events
+
+def test_results_store_aggregates_across_runs(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    for rep in range(4):
+        mv, ev = _run([rep, 0, 0], [(0, 3, 5, 2)] * rep + [(1, 4, 6, 0)])
+        store.write_run("curtail", {"cut_in": 5.0}, rep, mv, ev, n_turbines=3)
+    mv, ev = _run([9, 9, 9], [(0, 1, 1, 1)] * 27)
+    h = store.write_run("baseline", {"cut_in": 3.0}, 0, mv, ev, n_turbines=3)
+
+    q = store.fatality_quantiles(q=(0.5,))
+    assert q.loc["curtail", 0.5] == np.median([r * 4 for r in range(4)])
+    assert q.loc["curtail", "runs"] == 4 and q.loc["baseline", 0.5] == 108
+
+    ranking = store.turbine_risk_ranking(scenarios=["curtail"])
+    assert list(ranking["turbine"]) == [2, 0, 1]
+    assert ranking["per_run"].tolist() == [1.5, 1.0, 0.0]
+
+    events = store.read("events", scenarios=["baseline"], param_hashes=[h])
+    assert len(events) == 27 and set(events["turbine"]) == {1}
+    assert store.params(h) == {"cut_in": 3.0}
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from src.service import DecisionService, DecisionTables
+
+def _tables(version, scheduled_hour):
+    lonlat = [(25.50, -34.00), (25.60, -34.00)]
+    curtail = np.zeros((2, 12, 24), dtype=bool)
+    curtail[1, 6, scheduled_hour] = True
+    return DecisionTables(lonlat, np.full((2, 12, 24), 0.01), curtail, version=version)
+
+def test_service_batches_decisions_and_hot_reloads(tmp_path):
+    _tables("v2", 15).save(str(tmp_path / "v2.npz"))
+
+    async def scenario():
+        service = DecisionService(_tables("v1", 14))
+        port = await service.start(port=0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        async def ask(req):
+            writer.write(json.dumps(req).encode() + b"\n")
+            await writer.drain()
+            return json.loads(await reader.readline())
+
+        queries = [{"month": 7, "hour": 14, "wind_speed": 9.0, "fixes": [[25.5005, -34.0005, 80.0]]},
+                   {"month": 7, "hour": 14, "wind_speed": 9.0, "fixes": [[25.5005, -34.0005, 300.0]]},
+                   {"month": 7, "hour": 14, "wind_speed": 1.0, "fixes": [[25.5005, -34.0005, 80.0]]}]
+        first = await ask({"op": "decide", "queries": queries})
+        reload = await ask({"op": "reload", "path": str(tmp_path / "v2.npz")})
+        second = await ask({"op": "decide", "queries": queries[1:2]})
+        bad = await ask({"op": "nope"})
+        writer.close()
+        await service.close()
+        return first, reload, second, bad
+
+    first, reload, second, bad = asyncio.run(scenario())
+    r = first["results"]
+    assert first["version"] == "v1"
+    assert r[0]["curtail"] == [True, True] and r[0]["birds_near"] == [1, 0]   # bird near 0, schedule on 1
+    assert r[1]["curtail"] == [False, True]                                   # bird above the rotor
+    assert r[2]["curtail"] == [False, False]                                  # below cut-in
+    assert reload["version"] == "v2" and second["version"] == "v2"
+    assert second["results"][0]["curtail"] == [False, False]                  # schedule moved to 15:00
+    assert "error" in bad
+
+def test_decide_rejects_out_of_range_month_and_turbines():
+    tables = _tables("v1", 14)
+    assert tables.decide([{"month": 12, "hour": 0, "turbines": [1]}])[0]["turbines"] == [1]
+    for bad in ({"month": 0, "hour": 0}, {"month": 13, "hour": 0},
+                {"month": 7, "hour": 0, "turbines": [-1]}, {"month": 7, "hour": 0, "turbines": [2]}):
+        with pytest.raises(ValueError):
+            tables.decide([{"month": 7, "hour": 0}, bad])
+
+    with pytest.raises(ValueError, match="month"):  # _client turns this into an error reply
+        asyncio.run(DecisionService(tables).handle({"queries": [{"month": 0, "hour": 3}]}))
@@ -0,0 +1,20 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import xarray as xr
+from src.data_processing import Point, build_graph
+from src.spatial import SpatialLayer
+
+def test_build_graph_uses_metric_ranges():
+    spatial = SpatialLayer.for_lonlat([25.6], [-33.9])
+    x0, y0 = spatial.to_xy(25.6, -33.9)
+    # Waypoint at origin; node A 17 km north (beyond FORAGING_RANGE), node B 17 km beyond A
+    lon, lat = spatial.to_lonlat([x0, x0], [y0 + 17000.0, y0 + 34000.0])
+    nodes = pd.DataFrame({"lon": lon, "lat": lat, "elevation": [0.0, 0.0]})
+    turbines = gpd.GeoDataFrame({"blade_radius": [], "zone_radius_m": []}, geometry=[], crs="EPSG:4326")
+    weather = xr.Dataset({"thermal": ("t", np.ones(2)), "turbine_active": ("t", np.ones(2, dtype=bool))})
+    G = build_graph([Point(25.6, -33.9)], nodes, turbines, weather, spatial=spatial)
+    assert G.graph["crs"] == spatial.crs
+    assert not G.has_edge(0, 1)
+    assert G.has_edge(1, 2)
+    assert abs(G[1][2]["weight"] - 17000.0) < 1.0
@@ -0,0 +1,52 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from src.spatial_hash import SpatialHash
+
+def test_query_pairs_matches_kdtree():
+    rng = np.random.default_rng(0)
+    pts = rng.uniform(0, 10000, (3000, 2))
+    queries = rng.uniform(-500, 10500, (500, 2))
+    h = SpatialHash(400.0).build(pts)
+    for radius in (250.0, 900.0):
+        qi, pj, d = h.query_pairs(queries, radius)
+        got = set(zip(qi.tolist(), pj.tolist()))
+        expected = {(i, j) for i, js in enumerate(cKDTree(pts).query_ball_point(queries, radius)) for j in js}
+        assert got == expected
+        np.testing.assert_allclose(d, np.linalg.norm(queries[qi] - pts[pj], axis=1))
+
+def test_count_within_excludes_self():
+    pts = np.array([[0.0, 0.0], [1.0, 0.0], [5.0, 0.0]])
+    counts = SpatialHash(2.0).build(pts).count_within(pts, 1.5, exclude_self=True)
+    assert counts.tolist() == [1, 1, 0]
+
+def test_count_within_scales_with_distinct_positions(monkeypatch):
+    # Counts match a KD-tree; agents stacked on nodes cost what the nodes cost, and only
+    # cells straddling the disk edge are expanded into pairs
+    examined = []
+    blocks = SpatialHash._pair_blocks
+
+    def counting(self, *args):
+        for qi, pj, d in blocks(self, *args):
+            examined.append(len(qi))
+            yield qi, pj, d
+
+    monkeypatch.setattr(SpatialHash, "_pair_blocks", counting)
+    rng = np.random.default_rng(1)
+    nodes = rng.uniform(0, 20000, (150, 2))
+    pairs = []
+    for n in (1000, 8000):
+        examined.clear()
+        pts = np.vstack([nodes, nodes[rng.integers(len(nodes), size=n)]])
+        counts = SpatialHash(5000.0).build(pts).count_within(pts, 3000.0, exclude_self=True)
+        expected = np.array([len(js) - 1 for js in cKDTree(pts).query_ball_point(pts, 3000.0)])
+        np.testing.assert_array_equal(counts, expected)
+        pairs.append(sum(examined))
+    assert pairs[0] == pairs[1]
+
+    examined.clear()
+    pts = rng.uniform(0, 20000, (6000, 2))
+    counts = SpatialHash(5000.0).build(pts).count_within(pts, 3000.0)
+    expected = cKDTree(pts).query_ball_point(pts, 3000.0, return_length=True)
+    np.testing.assert_array_equal(counts, expected)
+    assert sum(examined) < 0.5 * expected.sum()
+    assert SpatialHash(1.0).build(pts[:3]).count_within(pts[:3], 0.0).tolist() == [1, 1, 1]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from src.config import BREEDING_MONTHS
+from src.synthesis import PopulationSynthesizer
+
+def test_sample_keeps_tagged_birds_and_draws_the_rest_from_fixes():
+    starts = np.array([[0.0, 0.0], [10.0, 0.0], [20.0, 0.0], [30.0, 0.0]])
+    fixes = np.column_stack([np.arange(100.0), np.full(100, 5.0)])
+    synth = PopulationSynthesizer(starts, [True, False, False, False], fixes)
+
+    tagged = synth.sample(None, np.random.default_rng(0), n_nests=5)
+    np.testing.assert_array_equal(tagged["xy"], starts)
+    assert tagged["breeding"].tolist() == [True, False, False, False]
+    assert tagged["nest"][1:].tolist() == [-1, -1, -1] and 0 <= tagged["nest"][0] < 5
+
+    s = synth.sample(20_000, np.random.default_rng(1), n_nests=5)
+    assert {k: len(v) for k, v in s.items()} == dict.fromkeys(s, 20_000)
+    np.testing.assert_array_equal(s["xy"][:4], starts)
+    assert np.isin(s["xy"][4:, 0], fixes[:, 0]).all() and (s["xy"][4:, 1] == 5.0).all()
+    assert abs(s["breeding"].mean() - 0.25) < 0.01
+    assert ((s["nest"] >= 0) == s["breeding"]).all() and s["nest"].max() == 4
+    assert np.isin(s["breeding_month"][s["breeding"]], BREEDING_MONTHS).all()
+    assert (s["breeding_month"][~s["breeding"]] == 0).all()
+    assert ((s["height"] >= 0) & (s["height"] <= 100)).all()
+
+    # Same generator state, same population
+    again = synth.sample(20_000, np.random.default_rng(1), n_nests=5)
+    assert all(np.array_equal(s[k], again[k]) for k in s)
+    with pytest.raises(ValueError):
+        PopulationSynthesizer(np.empty((0, 2)), [], np.empty((0, 2))).sample(3, np.random.default_rng(0))
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from src.telemetry import read_telemetry
+
+def test_read_telemetry_chunked_filters_and_dtypes(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1000
+    raw = pd.DataFrame({
+        "harrier_id": rng.integers(1, 5, n),
+        "timestamp": pd.date_range("2023-01-01", periods=n, freq="h").strftime("%Y-%m-%dT%H:%M:%S"),
+        "lat": rng.uniform(-34.2, -33.6, n),
+        "lon": rng.uniform(25.3, 25.9, n),
+        "alt": rng.uniform(0, 300, n),
+        "speed": rng.uniform(0, 30, n),
+    })
+    path = tmp_path / "gps.csv"
+    raw.to_csv(path, index=False)
+
+    df = read_telemetry(str(path), columns=("harrier_id", "timestamp", "lat", "alt"),
+                        alt_range=(50, 150), chunksize=97)
+    expected = raw[(raw.speed < 20) & (raw.alt >= 50) & (raw.alt <= 150)]
+    assert list(df.columns) == ["harrier_id", "timestamp", "lat", "alt"]
+    assert len(df) == len(expected)
+    assert df["lat"].dtype == np.float32
+    assert isinstance(df["harrier_id"].dtype, pd.CategoricalDtype)
+    assert df["timestamp"].dt.month.iloc[0] == 1
+    np.testing.assert_allclose(df["lat"].to_numpy(), expected["lat"].to_numpy(), rtol=1e-6)
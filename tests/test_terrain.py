@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import rasterio
+from data.terrain import build_dem_geotiff_tiled
+from data.utils import _lattice_hash, perlin_noise_tile, slope_degrees_from_dem_m
+
+PARAMS = dict(seed=7, n_x=300, n_y=200, lat_min=-34.0, lat_max=-33.98, lon_min=25.6, lon_max=25.63,
+              feature_scale_m=500.0, octaves=4, persistence=0.5, lacunarity=2.0,
+              base_min=100.0, base_span=200.0, noise_amplitude=150.0, elev_clip=(0.0, 2000.0))
+
+def _read(path):
+    with rasterio.open(path) as src:
+        return src.read(1), src.read(2), src.res
+
+def test_lattice_hash_is_32_bit_and_deterministic():
+    corners = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (-5, 3, 11), (2**40, -2**40, 2**33)]
+    hashes = [_lattice_hash(*c) for c in corners]
+    assert hashes == [_lattice_hash(*c) for c in corners]
+    assert all(0 <= h < 2**32 for h in hashes)
+    assert len(set(hashes[:4])) == 4
+    assert _lattice_hash(3, 4, 0) != _lattice_hash(3, 4, 1)
+
+def test_noise_tiles_match_the_whole_window():
+    whole = perlin_noise_tile(0, 0, 90, 110, 12.5, 4, 0.5, 2.0, 3)
+    for r0, c0, h, w in [(0, 0, 45, 55), (45, 55, 45, 55), (17, 81, 30, 29), (89, 109, 1, 1)]:
+        np.testing.assert_allclose(perlin_noise_tile(r0, c0, h, w, 12.5, 4, 0.5, 2.0, 3),
+                                   whole[r0:r0 + h, c0:c0 + w], rtol=0, atol=1e-12)
+    assert not np.allclose(whole, perlin_noise_tile(0, 0, 90, 110, 12.5, 4, 0.5, 2.0, 4))
+
+@pytest.mark.parametrize("tile_size,workers", [(64, 1), (100, 1), (64, 2)])
+def test_tiled_dem_independent_of_tile_size_and_workers(tmp_path, tile_size, workers):
+    ref_elev, ref_slope, _ = _read(build_dem_geotiff_tiled(**PARAMS, tile_size=2048,
+                                                           out_path=str(tmp_path / "ref.tif"))[0])
+    elev, slope, _ = _read(build_dem_geotiff_tiled(**PARAMS, tile_size=tile_size, workers=workers,
+                                                   out_path=str(tmp_path / "tiled.tif"))[0])
+    np.testing.assert_allclose(elev, ref_elev, rtol=0, atol=1e-3)
+    np.testing.assert_allclose(slope, ref_slope, rtol=0, atol=1e-3)
+
+def test_tiled_slope_has_no_seams(tmp_path):
+    elev, slope, (dx, dy) = _read(build_dem_geotiff_tiled(**PARAMS, tile_size=64,
+                                                          out_path=str(tmp_path / "tiled.tif"))[0])
+    # Slope from the stitched elevation: tile edges see their neighbours through the halo.
+    # The builder's spacing is span / (n - 1), the GeoTIFF pixel span / n.
+    ny, nx = elev.shape
+    whole = slope_degrees_from_dem_m(elev.astype(np.float64), dx * nx / (nx - 1), dy * ny / (ny - 1))
+    np.testing.assert_allclose(slope, whole, rtol=0, atol=1e-2)
+    for k in (64, 128, 192):
+        across = np.abs(np.diff(elev[:, k - 2:k + 2], axis=1)).max()
+        inside = np.abs(np.diff(elev[:, k - 32:k - 28], axis=1)).max()
+        assert across < 4 * inside + 1e-3
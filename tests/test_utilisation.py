@@ -0,0 +1,47 @@
+import numpy as np
+import rasterio
+from affine import Affine
+from src.utilisation import UtilisationRaster
+
+
+def test_raster_bins_merges_and_exports_aligned_geotiff(tmp_path):
+    transform = Affine(100.0, 0.0, 400000.0, 0.0, -100.0, 6250000.0)
+    raster = UtilisationRaster((20, 30), transform, "EPSG:32735", "EPSG:32735",
+                               by_month=True, height_bands=(0, 30, 130, np.inf))
+    xy = np.array([[400050.0, 6249950.0], [402950.0, 6248050.0], [399000.0, 6249000.0], [400150.0, 6249950.0]])
+    pixel = raster.locate(xy)
+    assert pixel.tolist() == [0, 19 * 30 + 29, -1, 1]
+    raster.add(pixel, height=np.array([10.0, 80.0, 50.0, 200.0]), month=7)
+    raster.add(pixel[:1], height=np.array([10.0]), month=8)
+    assert raster.counts.dtype == np.int32 and raster.counts.sum() == 4 and raster.outside == 1
+    assert raster.counts[6, 0, 0, 0] == 1 and raster.counts[6, 1, 19, 29] == 1 and raster.counts[6, 2, 0, 1] == 1
+    assert raster.counts[7, 0, 0, 0] == 1
+
+    other = UtilisationRaster.load(_saved(raster, tmp_path))
+    assert np.array_equal(other.counts, raster.counts) and other.steps == 2 and other.outside == 1
+    merged = raster.merge(other)
+    assert merged.counts.sum() == 8 and merged.steps == 4
+    layer_sums = merged.density().sum(axis=(2, 3))
+    assert np.allclose(layer_sums[merged.counts.sum(axis=(2, 3)) > 0], 1.0) and layer_sums.sum() == 4
+
+    path = str(tmp_path / "ud.tif")
+    merged.to_geotiff(path)
+    with rasterio.open(path) as src:
+        assert src.transform == transform and src.crs.to_epsg() == 32735 and src.count == 36
+        assert src.descriptions[18] == "month07_0-30m"
+        assert src.read(19)[0, 0] == 2
+
+
+def test_positions_reprojected_onto_geographic_dem():
+    transform = Affine(0.01, 0.0, 30.0, 0.0, -0.01, -34.0)
+    raster = UtilisationRaster((10, 10), transform, "EPSG:4326", "EPSG:32735")
+    # lon 30.055, lat -34.025 in UTM 35S
+    from src.spatial import SpatialLayer
+    xy = SpatialLayer(32735).project([[30.055, -34.025]])
+    assert raster.locate(xy).tolist() == [2 * 10 + 5]
+
+
+def _saved(raster, tmp_path):
+    path = str(tmp_path / "ud.npz")
+    raster.save(path)
+    return path
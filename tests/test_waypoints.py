@@ -0,0 +1,21 @@
+import numpy as np
+from src.waypoints import cluster_waypoints, transition_counts, transition_probs_dict
+
+def test_binned_clustering_recovers_separated_roosts():
+    rng = np.random.default_rng(0)
+    centres = np.array([[-34.0, 25.4], [-33.8, 25.8], [-33.7, 25.4]])
+    pts = np.concatenate([c + rng.normal(0, 0.005, (400, 2)) for c in centres])
+    noise = np.column_stack([rng.uniform(-34.2, -33.6, 5), rng.uniform(25.3, 25.9, 5)])
+    pts = np.concatenate([pts, noise])
+    waypoints, labels = cluster_waypoints(pts[:, 0], pts[:, 1], eps_m=2000, min_samples=10, cache_dir=None)
+    assert len(waypoints) == 3
+    for c in centres:
+        assert np.min(np.abs(waypoints - c).sum(axis=1)) < 0.005
+    for k in range(3):
+        assert len(set(labels[k * 400:(k + 1) * 400])) == 1
+
+def test_transition_probs_rows_normalise():
+    counts = transition_counts([1, 1, 1, 3], [0, 0, 1, 1], [1, 0, 1, 1], 2)
+    probs = transition_probs_dict(counts)
+    assert probs[(1, 0, 0)] == 0.5 and probs[(1, 0, 1)] == 0.5
+    assert probs[(3, 1, 1)] == 1.0 and (3, 0, 0) not in probs
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from data.layout_solver import cell_energy_grid
+from data.weather_core import (build_weather_dataset, open_weather, storage_chunks, write_weather_netcdf,
+                               write_weather_zarr)
+from src.curtailment import energy_cube
+
+
+def _dataset():
+    lat = np.linspace(-34.2, -33.9, 12); lon = np.linspace(25.3, 25.7, 20)
+    elev = np.outer(np.linspace(0, 300, 12), np.ones(20)); slope = np.full((12, 20), 5.0)
+    return build_weather_dataset(lat, lon, elev, slope, seed=3)
+
+
+def test_layouts_compression_and_packing_round_trip(tmp_path):
+    ds = _dataset()
+    plain = write_weather_netcdf(ds, str(tmp_path / "plain.nc"))
+    store = write_weather_netcdf(ds, str(tmp_path / "store.nc"), zlib=True, pack=True, timeseries_copy=True)
+
+    with open_weather(store, access="spatial") as sp, open_weather(store, access="timeseries") as ts, \
+            open_weather(plain, access="timeseries") as old:
+        assert storage_chunks(sp["wind_speed"]) == (168, 12, 20)
+        assert storage_chunks(ts["wind_speed"]) == (8760, 8, 8)
+        assert ts["wind_speed"].encoding["dtype"] == np.int16 and ts["wind_speed"].encoding["zlib"]
+        step = float(ts["wind_speed"].encoding["scale_factor"])
+        assert np.abs(ts["wind_speed"].values - ds["wind_speed"].values).max() <= step
+        assert np.array_equal(sp["turbine_active"].values, ds["turbine_active"].values)
+        # A single-layout file opens its only layout for either access pattern
+        assert storage_chunks(old["wind_speed"]) == (168, 12, 20)
+
+        # Readers give the same energy whichever layout they iterate
+        expected = cell_energy_grid(old["wind_speed"])
+        assert np.allclose(cell_energy_grid(ts["wind_speed"], time_chunk=100), expected, rtol=1e-3)
+        assert np.allclose(cell_energy_grid(sp["wind_speed"]), expected, rtol=1e-3)
+        turbines = [(25.4, -34.0), (25.6, -33.95)]
+        assert np.allclose(energy_cube(ts["wind_speed"], turbines), energy_cube(old["wind_speed"], turbines),
+                           rtol=1e-3, atol=1e-6)
+    import os
+    assert os.path.getsize(store) < os.path.getsize(plain)
+
+
+def test_generator_default_keeps_the_spatial_layout_plain(tmp_path):
+    ds = _dataset()
+    path = write_weather_netcdf(ds, str(tmp_path / "mixed.nc"), timeseries_copy=True,
+                                timeseries_zlib=True, timeseries_pack=True)
+    with open_weather(path, access="spatial") as sp, open_weather(path, access="timeseries") as ts:
+        assert sp["wind_speed"].encoding["dtype"] == np.float32 and not sp["wind_speed"].encoding.get("zlib")
+        assert np.array_equal(sp["wind_speed"].values, ds["wind_speed"].values.astype(np.float32))
+        assert ts["wind_speed"].encoding["dtype"] == np.int16 and ts["wind_speed"].encoding["zlib"]
+
+
+def test_zarr_store_holds_both_layouts(tmp_path):
+    pytest.importorskip("zarr")
+    ds = _dataset()
+    path = write_weather_zarr(ds, str(tmp_path / "weather.zarr"), pack=True)
+    with open_weather(path, access="timeseries") as ts, open_weather(path) as sp:
+        assert storage_chunks(ts["wind_speed"])[0] == 8760 and storage_chunks(sp["wind_speed"])[0] == 168
+        assert np.allclose(ts["pressure"].values, sp["pressure"].values)